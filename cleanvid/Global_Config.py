@@ -12,6 +12,32 @@ RETENTION_HOURS_FAILURE = 48 # Keep for 48 hours if processing failed or was int
 MAX_MONTHLY_MINUTES = 1000  # Maximum minutes allowed per month (configurable)
 UTILIZATION_FILE = Path("./personal/utilization")  # Pickle file for tracking
 
+# Audio extracted for transcription (see utils.AUDIO_PROFILES): "dialogue-mono-16k",
+# "center-channel-only" or "source"
+AUDIO_PROFILE = "dialogue-mono-16k"
+
+# Cut music/silence out of the extracted audio before upload (see voice_activity); word
+# timestamps are mapped back to the source video
+TRIM_NON_SPEECH = False
+
+# Uploads
+UPLOAD_CHUNK_MB = 8                # resumable upload chunk size (rounded to a multiple of 256 KB)
+UPLOAD_PARALLELISM = 8             # concurrent slices for parallel composite uploads (max 32)
+COMPOSITE_UPLOAD_THRESHOLD_MB = 100  # files at least this large are uploaded as composite slices
+
+# Rendering: "filter" (re-encode the whole audio track), "splice" (re-encode only around mutes)
+# or "pcm" (mute decoded samples in process, with short fades)
+RENDER_ENGINE = "filter"
+
+# Per-step pipeline traces ({video stem}.trace.jsonl, see tracing.py); None to disable writing
+TRACE_FOLDER = Path("./data/traces")
+
+# ffprobe metadata cache (sqlite, keyed by path/size/mtime)
+PROBE_CACHE_FILE = Path("./data/probe_cache.sqlite")
+
+# Persistent video library index (sqlite, refreshed by folder mtime; see video_index.py)
+VIDEO_INDEX_FILE = Path("./data/video_index.sqlite")
+
 # Default Batch File
 DEFAULT_BATCH_FILE = Path("./personal/BATCH.txt")
 
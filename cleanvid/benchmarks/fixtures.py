@@ -0,0 +1,111 @@
+"""
+Synthetic fixtures for the text benchmarks.
+
+Deterministic (seeded) stand-ins for the data the hot paths see in practice:
+- feature: one ~2 hour film (transcribed words, an offset SRT, a words CSV, an API response)
+- season: ten ~45 minute episodes of the same
+- filenames: a mixed library listing for parse_filename
+"""
+
+import csv
+import random
+from pathlib import Path
+from typing import Dict, List
+
+import utils
+
+VOCABULARY = ("the and you what hello never think really something about going know right here "
+              "there come get out look this that don't man just wait second okay yeah well").split()
+
+
+def _srt_time(t):
+    h, rem = divmod(t, 3600)
+    m, s = divmod(rem, 60)
+    return f"{int(h):02d}:{int(m):02d}:{int(s):02d},{int(round((s % 1) * 1000)) % 1000:03d}"
+
+
+def make_words(minutes, seed=0, swear_rate=0.01, words_per_minute=140) -> List[Dict]:
+    """Transcribed words over `minutes` of audio, with swears from swears.txt mixed in."""
+    rng = random.Random(seed)
+    swears = [w for w in utils.parse_swears() if w and " " not in w]
+    words = []
+    t = rng.uniform(0, 2)
+    end = minutes * 60
+    step = 60.0 / words_per_minute
+    while t < end:
+        word = rng.choice(swears) if rng.random() < swear_rate else rng.choice(VOCABULARY)
+        duration = step * rng.uniform(0.4, 0.9)
+        words.append({"word": word, "start": round(t, 3), "end": round(t + duration, 3),
+                      "confidence": round(rng.uniform(0.6, 0.99), 3)})
+        t += step * rng.uniform(0.8, 1.3)
+    return words
+
+
+def make_srt_lines(words, seed=0, offset=1.7, drop_rate=0.05) -> List[Dict]:
+    """Subtitle lines grouping 3-9 words, shifted by `offset`; some swears only in the subtitles."""
+    rng = random.Random(seed + 1)
+    subs = []
+    i = 0
+    while i < len(words):
+        chunk = words[i:i + rng.randint(3, 9)]
+        text = " ".join(w["word"] for w in chunk)
+        if rng.random() < drop_rate:
+            text += " god damn"
+        subs.append({"start": chunk[0]["start"] + offset, "end": chunk[-1]["end"] + offset, "text": text})
+        i += len(chunk) + rng.randint(0, 4)
+    return subs
+
+
+def write_srt(subs, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for n, sub in enumerate(subs, 1):
+            f.write(f"{n}\n{_srt_time(sub['start'])} --> {_srt_time(sub['end'])}\n{sub['text']}\n\n")
+
+
+def write_csv(words, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["start", "end", "word", "confidence"])
+        writer.writeheader()
+        writer.writerows(words)
+
+
+def make_filenames(count=10000, seed=0) -> List[str]:
+    """Library-style file names: episodes (SxxExx) and films (title, year, release tags)."""
+    rng = random.Random(seed + 2)
+    titles = ["The Office", "Breaking Bad", "Margin Call", "Argo", "Twenty Bucks", "The Wire", "Fargo",
+              "Star Trek The Next Generation", "2001 A Space Odyssey", "Arrested Development"]
+    tags = ["1080p.BluRay.x265", "720p.WEB-DL", "DVDRIP.XVID", "[Unknown] [R]", "HDTV"]
+    names = []
+    for _ in range(count):
+        title = rng.choice(titles)
+        sep = rng.choice([".", " ", "_"])
+        if rng.random() < 0.7:
+            stem = sep.join(title.split()) + f"{sep}S{rng.randint(1, 12):02d}E{rng.randint(1, 24):02d}"
+        else:
+            stem = f"{title} ({rng.randint(1950, 2024)})"
+        names.append(f"{stem} {rng.choice(tags)}{rng.choice(['.mkv', '.mp4', '.avi', '.srt'])}")
+    return names
+
+
+class Fixture:
+    """One title's worth of benchmark inputs, written under `folder`."""
+
+    def __init__(self, name, minutes, folder, seed=0):
+        self.name = name
+        self.words = make_words(minutes, seed)
+        self.subs = make_srt_lines(self.words, seed)
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        self.csv_path = folder / f"{name}_words.csv"
+        self.srt_path = folder / f"{name}.srt"
+        write_csv(self.words, self.csv_path)
+        write_srt(self.subs, self.srt_path)
+
+
+def make_fixtures(folder) -> Dict[str, List[Fixture]]:
+    """{"feature": [one 120 min film], "season": [ten 45 min episodes]}"""
+    folder = Path(folder)
+    return {
+        "feature": [Fixture("feature", 120, folder / "feature")],
+        "season": [Fixture(f"episode{k:02d}", 45, folder / "season", seed=k) for k in range(10)],
+    }
@@ -0,0 +1,171 @@
+"""
+Micro-benchmarks for the text hot paths.
+
+Times the word/subtitle processing functions on synthetic feature-length and season-length
+fixtures (see fixtures.py), writes the results as JSON and compares them with a stored baseline.
+Google services are emulated (google_emulator), so no credentials or network are needed.
+
+    python benchmarks/run_benchmarks.py                   # run, compare with benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --save_baseline   # run and make this the new baseline
+    python benchmarks/run_benchmarks.py --filter season   # only matching cases
+
+Exits with status 1 if any case is slower than the baseline by more than --tolerance.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add root directory to sys.path
+current_dir = Path(__file__).resolve().parent
+root_dir = current_dir.parent
+sys.path.append(str(root_dir))
+
+BENCHMARK_DIR = current_dir
+BASELINE_PATH = BENCHMARK_DIR / "baseline.json"
+RESULTS_DIR = BENCHMARK_DIR / "results"
+
+
+def build_cases(work_dir):
+    """{case_name: zero-argument callable}, one per (fixture, function)."""
+    os.environ.setdefault("CLEANVID_EMULATOR", str(Path(work_dir) / "emulator"))
+    import google_api
+    import google_emulator
+    import Global_Config
+    from google.protobuf import json_format
+    from benchmarks import fixtures
+    from scripts import align_subtitles, regenerate_mute_lists
+
+    api = google_api.google_speech_api(credential_path=Global_Config.GCS_CREDENTIALS_PATH, api="video",
+                                       require_api_confirmation=False)
+    sets = fixtures.make_fixtures(Path(work_dir) / "fixtures")
+
+    cases = {}
+    for set_name, titles in sets.items():
+        # Inputs that are parsed once outside the timed calls
+        subs = [align_subtitles.parse_srt(t.srt_path) for t in titles]
+        responses = []
+        for t in titles:
+            response_path = Path(work_dir) / f"{t.name}.response"
+            message = google_emulator.annotate_response(f"gs://bench/{t.name}.flac", t.words)
+            json.dump(json_format.MessageToJson(message), response_path.open("w"))
+            responses.append(api.load_response(response_path))
+        out_dir = Path(work_dir) / "out" / set_name
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        cases[f"{set_name}/create_mute_list_from_words"] = \
+            lambda titles=titles: [api.create_mute_list_from_words(t.words) for t in titles]
+        cases[f"{set_name}/inject_subtitles_into_words"] = \
+            lambda titles=titles, out_dir=out_dir: [
+                align_subtitles.inject_subtitles_into_words(t.csv_path, t.srt_path, out_dir / f"{t.name}.csv",
+                                                            words=t.words) for t in titles]
+        cases[f"{set_name}/calculate_offset"] = \
+            lambda titles=titles, subs=subs: [align_subtitles.calculate_offset(t.words, s) for t, s in zip(titles, subs)]
+        cases[f"{set_name}/parse_srt"] = \
+            lambda titles=titles: [align_subtitles.parse_srt(t.srt_path) for t in titles]
+        cases[f"{set_name}/get_words_from_response"] = \
+            lambda responses=responses: [api.get_words_from_response(r) for r in responses]
+        cases[f"{set_name}/load_words_from_csv"] = \
+            lambda titles=titles: [api.load_words_from_csv(t.csv_path) for t in titles]
+        cases[f"{set_name}/save_words_to_csv"] = \
+            lambda titles=titles, out_dir=out_dir: [api.save_words_to_csv(t.words, out_dir / f"{t.name}_saved.csv")
+                                                    for t in titles]
+
+    names = fixtures.make_filenames()
+    cases["library/parse_filename"] = lambda: [regenerate_mute_lists.parse_filename(Path(n).stem) for n in names]
+    return cases
+
+
+def time_case(func, repeat):
+    """Run once to warm up, then `repeat` timed runs (seconds); output is discarded."""
+    runs = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            runs.append(time.perf_counter() - started)
+    return {"median": statistics.median(runs), "min": min(runs), "runs": runs}
+
+
+def compare(results, baseline, tolerance):
+    """Print current vs baseline medians; returns the names of regressed cases."""
+    regressions = []
+    print(f"\n{'case':<45} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<45} {'-':>10} {result['median'] * 1000:>8.1f}ms {'new':>7}")
+            continue
+        ratio = result["median"] / max(base["median"], 1e-9)
+        flag = ""
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<45} {base['median'] * 1000:>8.1f}ms {result['median'] * 1000:>8.1f}ms {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the word/subtitle hot paths.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--filter", default=None, help="Only run cases containing this text")
+    parser.add_argument("--output", type=Path, default=None, help="Results JSON (default benchmarks/results/...)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Baseline JSON to compare against")
+    parser.add_argument("--save_baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown before a case counts as a regression (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="cleanvid-bench-") as work_dir:
+        print("Building fixtures...")
+        cases = build_cases(work_dir)
+        results = {}
+        for name, func in cases.items():
+            if args.filter and args.filter not in name:
+                continue
+            results[name] = time_case(func, args.repeat)
+            print(f"  {name:<45} {results[name]['median'] * 1000:8.1f} ms")
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / f"{datetime.now().strftime('%Y-%m-%d %H;%M;%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print("No baseline to compare against (run with --save_baseline)")
+        return 0
+    baseline = json.loads(args.baseline.read_text())["results"]
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,10 @@
 import re
 import utils
+import lexicon
+import operation_poller
+import word_cache
+import voice_activity
+import tracing
 from pathlib import Path
 from datetime import datetime
 from time import sleep
@@ -32,6 +37,207 @@ from google.cloud import videointelligence_v1p3beta1 as video_v1
 
 #https://cloud.google.com/video-intelligence/docs/transcription#video_speech_transcription_gcs-python
 
+if os.environ.get("CLEANVID_EMULATOR"):
+    # Offline runs: local stand-ins for GCS and Video Intelligence (see google_emulator)
+    import google_emulator
+    google_emulator.install(os.environ["CLEANVID_EMULATOR"])
+
+
+def get_storage_client():
+    """Storage client for the real bucket, or for a local fake GCS server when
+    STORAGE_EMULATOR_HOST is set (e.g. fake-gcs-server on http://localhost:4443)."""
+    from google.cloud import storage
+    emulator_host = os.environ.get("STORAGE_EMULATOR_HOST")
+    if emulator_host:
+        from google.auth.credentials import AnonymousCredentials
+        return storage.Client(project="cleanvid-test", credentials=AnonymousCredentials(),
+                              client_options={"api_endpoint": emulator_host})
+    return storage.Client()
+
+
+def get_bucket(storage_client=None):
+    """Project bucket, created on first use."""
+    storage_client = storage_client or get_storage_client()
+    try:
+        return storage_client.create_bucket(Global_Config.BUCKET_NAME)
+    except Exception:
+        return storage_client.get_bucket(Global_Config.BUCKET_NAME)
+
+
+def blob_exists(gcs_uri, storage_client=None):
+    """True if the object named by a gs:// URI is already in its bucket."""
+    from google.cloud import storage
+    storage_client = storage_client or get_storage_client()
+    bucket_name, _, name = re.sub(r"^gs://", "", str(gcs_uri)).partition("/")
+    return storage.Blob(bucket=storage_client.bucket(bucket_name), name=name).exists(storage_client)
+
+
+def chunk_size_bytes(chunk_mb=None):
+    """Resumable upload chunk size in bytes; GCS requires a multiple of 256 KB."""
+    chunk_mb = chunk_mb or Global_Config.UPLOAD_CHUNK_MB
+    return max(1, round(chunk_mb * 4)) * 256 * 1024
+
+
+class _FileSlice:
+    """Read-only view of bytes [offset, offset + length) of a file, positioned from 0."""
+
+    def __init__(self, path, offset, length):
+        self._file = open(path, "rb")
+        self._offset = offset
+        self._length = length
+        self._file.seek(offset)
+
+    def read(self, size=-1):
+        remaining = self._length - self.tell()
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        return self._file.read(size)
+
+    def tell(self):
+        return self._file.tell() - self._offset
+
+    def seek(self, position, whence=0):
+        if whence == 1:
+            position += self.tell()
+        elif whence == 2:
+            position += self._length
+        self._file.seek(self._offset + position)
+        return position
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def composite_upload(source_path, destination, parallelism=None, chunk_mb=None, metadata=None,
+                     content_type=None):
+    """Upload a large file as concurrent slices and compose them into one object server-side.
+
+    A single resumable stream is limited by per-connection throughput; N slices in flight use
+    the whole uplink. The slice objects are deleted after the compose, or after a failed upload.
+
+    Args:
+        source_path: Local file to upload.
+        destination: Object name in Global_Config.BUCKET_NAME.
+        parallelism: Number of slices uploaded at once (GCS composes at most 32 objects).
+        chunk_mb: Resumable chunk size per slice, in MB.
+        metadata: Custom metadata for the composed object.
+        content_type: Content type of the composed object.
+
+    Returns:
+        str: The GCS URI of the composed object.
+    """
+    import mimetypes
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from google.api_core.exceptions import NotFound
+
+    parallelism = min(parallelism or Global_Config.UPLOAD_PARALLELISM, 32)
+    chunk_size = chunk_size_bytes(chunk_mb)
+    total_bytes = os.path.getsize(source_path)
+    slice_count = max(1, min(parallelism, -(-total_bytes // chunk_size)))
+    slice_size = -(-total_bytes // slice_count)
+    slices = [(k, k * slice_size, min(slice_size, total_bytes - k * slice_size)) for k in range(slice_count)]
+
+    # Clients are not guaranteed thread-safe; give each worker its own
+    local = threading.local()
+
+    def upload_slice(part):
+        k, offset, length = part
+        if not hasattr(local, "bucket"):
+            local.bucket = get_storage_client().bucket(Global_Config.BUCKET_NAME)
+        blob = local.bucket.blob(f"{destination}.part{k:02d}")
+        blob.chunk_size = chunk_size
+        with _FileSlice(source_path, offset, length) as stream:
+            blob.upload_from_file(stream, size=length)
+        return blob.name
+
+    storage_client = get_storage_client()
+    bucket = get_bucket(storage_client)
+    part_names = [f"{destination}.part{k:02d}" for k, _, _ in slices]
+    print(f"Uploading {destination} as {slice_count} parallel slices...")
+    started = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=slice_count) as executor:
+            list(executor.map(upload_slice, slices))
+
+        blob = bucket.blob(destination)
+        blob.content_type = content_type or mimetypes.guess_type(str(source_path))[0] or "application/octet-stream"
+        if metadata:
+            blob.metadata = metadata
+        blob.compose([bucket.blob(name) for name in part_names])
+    finally:
+        # Slices are billed until deleted, also when an upload or the compose failed
+        for name in part_names:
+            try:
+                bucket.blob(name).delete()
+            except NotFound:
+                pass
+            except Exception as e:
+                print(f"Could not delete slice {name}: {e}")
+
+    elapsed = max(time.monotonic() - started, 1e-6)
+    print(f"Uploaded {total_bytes / 1e6:.1f} MB in {elapsed:.1f}s "
+          f"({total_bytes / 1e6 / elapsed:.1f} MB/s, {slice_count} slices)")
+    return f"gs://{Global_Config.BUCKET_NAME}/{destination}"
+
+
+class HashingStream:
+    """Read-only file object over a pipe that hashes the bytes as they pass.
+
+    The resumable upload needs tell() and may rewind to the start of the last chunk after a
+    partial commit, so the bytes of the most recent read are kept for seek(); each byte is hashed once.
+    """
+
+    def __init__(self, raw, hash_name="md5"):
+        import hashlib
+        self._raw = raw
+        self._hash = hashlib.new(hash_name) if hash_name else None
+        self._buffer = b""
+        self._buffer_start = 0
+        self._position = 0
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        start = self._position
+        data = b""
+        if self._position < self.bytes_read:
+            # Replay part of the last chunk after a rewind
+            offset = self._position - self._buffer_start
+            data = self._buffer[offset:] if size is None or size < 0 else self._buffer[offset:offset + size]
+            self._position += len(data)
+            if size is not None and size >= 0:
+                size -= len(data)
+                if size == 0:
+                    return data
+        new = self._raw.read() if size is None or size < 0 else self._raw.read(size)
+        if self._hash is not None:
+            self._hash.update(new)
+        self.bytes_read += len(new)
+        self._position = self.bytes_read
+        self._buffer = data + new
+        self._buffer_start = start
+        return self._buffer
+
+    def tell(self):
+        return self._position
+
+    def seek(self, position, whence=0):
+        if whence != 0 or not self._buffer_start <= position <= self.bytes_read:
+            import io
+            raise io.UnsupportedOperation(f"cannot seek to {position} in a pipe")
+        self._position = position
+        return position
+
+    def hexdigest(self):
+        return self._hash.hexdigest() if self._hash is not None else None
+
 
 class google_speech_api:
 
@@ -46,6 +252,7 @@ class google_speech_api:
                  ):
         self.swears = utils.parse_swears()
         self.subtitle_exceptions = utils.parse_subtitle_exceptions()
+        self.lexicon = lexicon.load_lexicon()
         self.codec = codec
         self.sample_rate = sample_rate
         self.api = api
@@ -68,54 +275,144 @@ class google_speech_api:
         self.require_api_confirmation = require_api_confirmation
         self.response_output_folder = config.api_response_root if config is not None else Path("./data/google_api")
 
-    def upload_file(self, source_path, overwrite=True):
+    def upload_file(self, source_path, overwrite=False, parallel=None):
         """Upload a file to Google Cloud Storage.
 
+        Objects are named by content digest, so audio that is already in the bucket (e.g. after a
+        re-extraction or a rename) is not uploaded again. Only bytes actually sent count as the
+        traced step's bytes_uploaded.
+
         Args:
             source_path: Local path to the file to upload.
-            overwrite: If True, overwrite existing blob in GCS.
+            overwrite: If True, upload even if the object already exists.
+            parallel: Use a parallel composite upload (see composite_upload). Default: files of at
+                least Global_Config.COMPOSITE_UPLOAD_THRESHOLD_MB.
 
         Returns:
             str: The GCS URI (gs://bucket/destination) of the uploaded file.
         """
-        import hashlib
+        import time
         import tqdm
         from google.cloud import storage
 
-        BLOB_SIZE = 1  # MB
-        storage.blob._MAX_MULTIPART_SIZE = BLOB_SIZE * 1024 * 1024
-        storage.blob._DEFAULT_CHUNKSIZE = BLOB_SIZE * 1024 * 1024
-
-        storage_client = storage.Client()
-        try:
-            bucket = storage_client.create_bucket(Global_Config.BUCKET_NAME)
-        except Exception:
-            bucket = storage_client.get_bucket(Global_Config.BUCKET_NAME)
+        storage_client = get_storage_client()
+        bucket = get_bucket(storage_client)
 
         source_path = str(source_path)
-        gcs_uri = utils.generate_gcs_uri(source_path)
+        digest = utils.file_digest(source_path)
+        gcs_uri = utils.generate_gcs_uri(source_path, digest=digest)
         destination = gcs_uri.replace(f"gs://{Global_Config.BUCKET_NAME}/", "")
 
+        metadata = {"cleanvid-digest": digest, "cleanvid-source": Path(source_path).name}
+        total_bytes = os.path.getsize(source_path)
+        if parallel is None:
+            parallel = total_bytes >= Global_Config.COMPOSITE_UPLOAD_THRESHOLD_MB * 1024 * 1024
+
         blob_exists = storage.Blob(bucket=bucket, name=destination).exists(storage_client)
-        if not blob_exists or overwrite:
+        if blob_exists and not overwrite:
+            print(f"{destination} already uploaded ({Path(source_path).name})")
+        elif parallel:
+            composite_upload(source_path, destination, metadata=metadata)
+            tracing.add("bytes_uploaded", total_bytes)
+        else:
             print(f"Uploading {destination}...")
             blob = bucket.blob(destination)
-            blob.chunk_size = BLOB_SIZE * 1024 * 1024
+            blob.chunk_size = chunk_size_bytes()
+            blob.metadata = metadata
 
+            started = time.monotonic()
             with open(source_path, "rb") as in_file:
-                total_bytes = os.fstat(in_file.fileno()).st_size
                 with tqdm.tqdm.wrapattr(
                     in_file, "read", total=total_bytes, miniters=1,
                     desc=f"upload to {bucket.name}"
                 ) as file_obj:
                     blob.upload_from_file(file_obj, size=total_bytes)
-        else:
-            print(f"{destination} already uploaded")
+            tracing.add("bytes_uploaded", total_bytes)
+            elapsed = max(time.monotonic() - started, 1e-6)
+            print(f"Uploaded {total_bytes / 1e6:.1f} MB in {elapsed:.1f}s ({total_bytes / 1e6 / elapsed:.1f} MB/s)")
 
         print("Done uploading")
         gcs_uri = f"gs://{Global_Config.BUCKET_NAME}/{destination}"
         return gcs_uri
 
+    def stream_upload_audio(self, video_path, name=None, length=3600, codec="flac", hash_name="md5",
+                            ffmpeg_path="ffmpeg", chunk_mb=None, profile=None, ffprobe_path="ffprobe"):
+        """Extract audio with ffmpeg and pipe it straight into resumable GCS uploads.
+
+        Extraction and upload overlap and nothing is written to local disk. Segments are cut at
+        the same boundaries as utils.split_audio and named by utils.stream_segment_uris; segments
+        already in the bucket are skipped.
+
+        Args:
+            video_path: Path to the video.
+            name: Source name recorded in the blob metadata (defaults to the video stem).
+            length: Segment length in seconds.
+            codec: Audio codec/container for the stream.
+            hash_name: hashlib algorithm applied to the streamed bytes (None to skip); the digest
+                is stored in the blob metadata.
+            ffmpeg_path: Path to ffmpeg.
+            chunk_mb: Resumable upload chunk size in MB (default Global_Config.UPLOAD_CHUNK_MB).
+            profile: Extraction profile from utils.AUDIO_PROFILES.
+            ffprobe_path: Path to ffprobe (segment boundaries).
+
+        Returns:
+            list: GCS URIs of the uploaded segments, in order.
+        """
+        import subprocess
+        import tempfile
+        import time
+
+        video_path = Path(video_path)
+        name = name or video_path.stem
+        segments = utils.stream_segment_uris(video_path, length, codec, ffprobe_path=ffprobe_path, profile=profile)
+
+        storage_client = get_storage_client()
+        bucket = get_bucket(storage_client)
+        chunk_size = chunk_size_bytes(chunk_mb)
+
+        gcs_uris = []
+        for i, (gcs_uri, start, segment_length) in enumerate(segments):
+            destination = gcs_uri.replace(f"gs://{Global_Config.BUCKET_NAME}/", "")
+            if blob_exists(gcs_uri, storage_client):
+                print(f"{destination} already uploaded ({name} segment {i})")
+                gcs_uris.append(gcs_uri)
+                continue
+            command = utils.stream_audio_command(video_path, start, segment_length, ffmpeg_path, codec, profile=profile)
+            print(" ".join(command))
+
+            blob = bucket.blob(destination)
+            blob.chunk_size = chunk_size
+            started = time.monotonic()
+            with tempfile.TemporaryFile() as stderr:
+                process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr)
+                stream = HashingStream(process.stdout, hash_name)
+                try:
+                    # size=None -> resumable session; the total is only known once ffmpeg exits
+                    blob.upload_from_file(stream, size=None, content_type=f"audio/{codec}")
+                finally:
+                    process.stdout.close()
+                    return_code = process.wait()
+                if return_code != 0:
+                    stderr.seek(0)
+                    try:
+                        blob.delete()  # don't leave a truncated segment behind
+                    except Exception:
+                        pass
+                    raise ValueError(f"ffmpeg failed while streaming {destination}: "
+                                     f"{stderr.read().decode(errors='ignore')}")
+
+            metadata = {"cleanvid-source": f"{name}_{i:03d}.{codec}", "cleanvid-bytes": str(stream.bytes_read)}
+            if hash_name:
+                metadata[f"cleanvid-{hash_name}"] = stream.hexdigest()
+            blob.metadata = metadata
+            blob.patch()
+            tracing.add("bytes_uploaded", stream.bytes_read)
+            elapsed = max(time.monotonic() - started, 1e-6)
+            print(f"  Streamed {destination}: {stream.bytes_read / 1e6:.1f} MB "
+                  f"in {elapsed:.1f}s ({stream.bytes_read / 1e6 / elapsed:.1f} MB/s)")
+            gcs_uris.append(gcs_uri)
+        return gcs_uris
+
     def serialize_operation(self, future, name):
         now = datetime.now().strftime("%Y-%m-%d %H;%M;%S")
         # if isinstance(future, _video_intelligence.AnnotateVideoResponse):
@@ -130,9 +427,17 @@ class google_speech_api:
         json.dump(operation_json, Path(f"{self.response_output_folder}/{name}_{now}.operation").open("w"))
         return operation_json
 
-    def serialize_response(self, response, name):
+    def serialize_response(self, response, name, remap=None):
+        """Save a response as {name}_{timestamp}.response.
+
+        Args:
+            remap: voice_activity.Remap of the transcribed audio; saved next to the response so
+                words loaded from it later come back in source-video time.
+        """
         now = datetime.now().strftime("%Y-%m-%d %H;%M;%S")
         response_path = Path(f"{self.response_output_folder}/{name}_{now}.response")
+        if remap is not None:
+            remap.save(voice_activity.remap_path(response_path))
         try:
             operation_json = json_format.MessageToJson(response)
         except: # video_intelligence.AnnotateVideoResponse
@@ -193,43 +498,16 @@ class google_speech_api:
 
         return future
 
-    def get_response(self, operation=None, name=None):
+    def get_response(self, operation=None, name=None, remap=None):
         if operation is None:
             operation = self.restore_operation(Path(f"{self.response_output_folder}/{name}.operation"))
-        done = False
-
-        i = 0
-        while not done:
-            i += 1
-            print("Waiting for response...")
-            try:
-                response = operation.result(timeout=60)
-                if response is None:
-                    if hasattr(operation, "operation"):
-                        response = operation.operation.response
-                        done = True
-                        # NOT WORKING YET - THIS HAPPENS WHEN LOADING AN OPERATION
-                else:
-                    done = True
 
-            except Exception as e:
-                if i > 30 and i % 10 == 0:
-                    print(e)
-                print("TRYING SOMETHING ELSE")
-                try:
-                    if hasattr(operation.metadata, "progress_percent"):
-                        print(f"No response...trying again {operation.metadata.progress_percent}%")
-                    else:
-                        percent = operation.metadata.annotation_progress._pb[0].progress_percent
-                        print(f"No response...trying again {percent}%")
-                except:
-                    print("Problem with metadata")
-                    traceback.print_exc()
-            sleep(10)
+        print("Waiting for response...")
+        response = operation_poller.wait_for_operation(operation, name)
 
         # Save the response!
         try:
-            response = self.serialize_response(response, name=name) # take the _pb attribute as needed
+            response = self.serialize_response(response, name=name, remap=remap) # take the _pb attribute as needed
         except:
             traceback.print_exc()
         return response
@@ -252,50 +530,33 @@ class google_speech_api:
         self.serialize_operation(operation, name=name)
         return operation, name
 
-    def poll_all_operations(self, operations):
+    def poll_all_operations(self, operations, remaps=None):
         """Poll multiple operations concurrently until all complete.
         
         Args:
             operations: List of (operation, name) tuples from submit_operation.
+            remaps: Optional {name: voice_activity.Remap} saved next to each response.
             
         Returns:
             List of (response, name) tuples in the same order.
         """
-        pending = {i: (op, name) for i, (op, name) in enumerate(operations)}
-        results = [None] * len(operations)
-        
-        while pending:
-            still_pending = {}
-            for i, (operation, name) in pending.items():
-                try:
-                    response = operation.result(timeout=5)
-                    if response is not None:
-                        try:
-                            response = self.serialize_response(response, name=name)
-                        except:
-                            traceback.print_exc()
-                        results[i] = (response, name)
-                        print(f"  ✓ Segment '{name}' transcription complete.")
-                        continue
-                except Exception:
-                    # Still in progress — check metadata for progress
-                    try:
-                        if hasattr(operation.metadata, "progress_percent"):
-                            pct = operation.metadata.progress_percent
-                        else:
-                            pct = operation.metadata.annotation_progress._pb[0].progress_percent
-                        print(f"  [{name}] {pct}%")
-                    except:
-                        print(f"  [{name}] waiting...")
-                still_pending[i] = (operation, name)
-            
-            pending = still_pending
-            if pending:
-                sleep(10)
-        
-        return results
+        serialized = {}
 
-    def process_speech(self, storage_uri, name=None, response=None, operation=None, path=None):
+        def on_complete(name, response):
+            # Save each response as soon as it arrives
+            try:
+                serialized[name] = self.serialize_response(response, name=name,
+                                                           remap=(remaps or {}).get(name))
+            except:
+                traceback.print_exc()
+
+        results = operation_poller.wait_for_operations(operations, on_complete=on_complete)
+        failed = [name for response, name in results if isinstance(response, Exception)]
+        if failed:
+            raise RuntimeError(f"Transcription failed for: {', '.join(failed)}")
+        return [(serialized.get(name, response), name) for response, name in results]
+
+    def process_speech(self, storage_uri, name=None, response=None, operation=None, path=None, remap=None):
         if name is None:
             name = Path(storage_uri).stem
 
@@ -309,14 +570,14 @@ class google_speech_api:
                     print(self.api)
                     raise Exception("Unknown API")
                 self.serialize_operation(operation, name=name)
-            response = self.get_response(operation, name=name)
+            response = self.get_response(operation, name=name, remap=remap)
         else:
             response = self.load_response(response)
         path = Path(f"./data/mute_lists") if path is None else Path(path)
         path.mkdir(exist_ok=True, parents=True)
         
         # New workflow: Words -> CSV -> Mute List
-        words = self.get_words_from_response(response)
+        words = self.get_words_from_response(response, remap=remap)
         
         # Save words to CSV for manual editing
         csv_path = self.response_output_folder / f"{name}_words.csv"
@@ -329,7 +590,14 @@ class google_speech_api:
                     (path / f"{name}.pickle").open("wb"))
         return mute_list, transcript
 
-    def get_words_from_response(self, response):
+    def get_words_from_response(self, response, remap=None):
+        """Word dicts (word, start, end, confidence) of a response.
+
+        Args:
+            remap: voice_activity.Remap of the transcribed audio. Timestamps in a response are in
+                the time of the uploaded (possibly trimmed) segment; the remap brings them back to
+                source-video time.
+        """
         def convert_to_seconds(word_time):
             if hasattr(word_time, "nanos"):
                 start = word_time.seconds + word_time.nanos * 10 ** -9
@@ -365,6 +633,9 @@ class google_speech_api:
                      word_text = getattr(word_info, "word", "")
                      confidence = getattr(word_info, "confidence", 0.0)
                      
+                     if remap is not None:
+                         start, end = remap.to_source(start), remap.to_source(end)
+
                      words.append({
                          "word": word_text,
                          "start": start,
@@ -373,6 +644,18 @@ class google_speech_api:
                      })
         return words
 
+    def load_words_from_response_file(self, response_path):
+        """Words of a saved .response file, read through the columnar word cache.
+
+        The response is only parsed the first time (or after it changes); see word_cache. A remap
+        saved next to the response (trimmed audio, see voice_activity) is applied when parsing.
+        """
+        def parse(path):
+            remap = voice_activity.Remap.load(voice_activity.remap_path(path))
+            return self.get_words_from_response(self.load_response(path), remap=remap)
+
+        return word_cache.load_words(response_path, parse)
+
     def save_words_to_csv(self, words, path):
         import csv
         with open(path, 'w', newline='', encoding='utf-8') as f:
@@ -402,61 +685,10 @@ class google_speech_api:
             words: List of word dicts with 'word', 'start', 'end' keys.
             subtitle_confirmed_words: Optional set of words that appear in subtitles.
                 If a word is in subtitle_exceptions AND in this set, it won't be muted.
-        """
-        mute_list = []
-        mute_details = []  # (start, end, censored_word) for human-readable report
-        transcript = []
-        cleaned_transcript = []
-        
-        strip_punctuation = re.compile('[^-a-zA-Z \']+')
-        
-        previous_word = ""
-        previous_start_time = 0.0
-        
-        phrase_buffer = []
-        subtitle_confirmed_words = subtitle_confirmed_words or set()
-
-        for i, word_obj in enumerate(words):
-            word_text = word_obj["word"]
-            start = word_obj["start"]
-            end = word_obj["end"]
-            
-            phrase_buffer.append(word_text)
-            
-            _word = strip_punctuation.sub("", word_text).lower()
-            compound_phrase = f"{previous_word} {_word}".strip()
-            
-            # Check if word is in subtitle exceptions and confirmed by subtitles
-            is_exception = _word in self.subtitle_exceptions and _word in subtitle_confirmed_words
-            
-            if compound_phrase in self.swears and previous_start_time:
-                # Mute the compound phrase (e.g., "god damn")
-                # Check if compound is exceptioned
-                compound_is_exception = (
-                    compound_phrase in self.subtitle_exceptions and 
-                    compound_phrase in subtitle_confirmed_words
-                )
-                if not compound_is_exception:
-                    mute_list.append((previous_start_time, end))
-                    mute_details.append((previous_start_time, end, compound_phrase[0] + '*' * (len(compound_phrase) - 1)))
-            elif _word in self.swears:
-                if is_exception:
-                    # Word is allowed because it's in subtitles
-                    cleaned_transcript.append(word_text)
-                else:
-                    censored = word_text[0] + "*"*(len(_word)-1)
-                    mute_list.append((start, end))
-                    mute_details.append((start, end, censored))
-                    cleaned_transcript.append(censored)
-            else:
-                cleaned_transcript.append(word_text)
 
-            previous_word = _word
-            previous_start_time = start
-            
-        transcript = [" ".join(phrase_buffer)]
-        print(" ".join(cleaned_transcript))
-        return mute_list, transcript, mute_details
+        Single words and phrases of any length are matched in one pass by the compiled lexicon.
+        """
+        return self.lexicon.create_mute_list(words, subtitle_confirmed_words)
 
     def create_mute_list_from_response(self, response):
         # Legacy method kept for compatibility if needed, but refactored to use new pipeline
@@ -0,0 +1,503 @@
+"""
+Local stand-in for Google Cloud Storage and the Video Intelligence API.
+
+Lets Pipeline, MAIN and BATCH run end to end offline (for orchestration benchmarks and regression
+runs) with google_speech_api unmodified: install() swaps the client classes in the google.cloud
+modules for fakes backed by a local folder.
+
+    CLEANVID_EMULATOR=./emulator python scripts/run_pipeline.py --video_file movie.mkv
+
+- Storage: buckets are folders under {root}/buckets, object metadata lives in {root}/meta.
+  Supports exists/upload/compose/patch/delete/list, with optional per-call latency and upload
+  bandwidth.
+- Video Intelligence: annotate_video returns a real google.api_core Operation whose refreshes go
+  to a fake operations client. Operations are saved in {root}/operations, so a serialized
+  .operation can be restored and resumed from another process. Progress follows a configurable
+  curve over queue + processing time, and the finished operation carries a canned transcript.
+
+Settings come from EmulatorConfig, or from a JSON file named by CLEANVID_EMULATOR_CONFIG.
+"""
+
+import csv
+import hashlib
+import json
+import math
+import os
+import random
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass, fields
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+from google.api_core import exceptions
+from google.api_core.operation import from_gapic
+from google.longrunning import operations_pb2
+from google.protobuf import any_pb2, json_format
+from google.rpc import status_pb2
+
+FILLER = ("the well you know I think we should go now what is that there over here right okay "
+          "come on get out of here look at this I don't know man just wait a second").split()
+
+
+@dataclass
+class EmulatorConfig:
+    root: Path = Path("./emulator")
+    api_latency: float = 0.0             # seconds added to every storage / API call
+    upload_mb_per_second: float = 0.0    # upload bandwidth limit (0 = unlimited)
+    queue_seconds: float = 2.0           # time at 0% before processing starts
+    seconds_per_audio_minute: float = 0.1  # processing time per minute of audio
+    progress_curve: str = "linear"       # "linear", "sigmoid" or "stall" (stuck at 50%, then done)
+    transcript: Optional[Path] = None    # words CSV (start,end,word,confidence) or plain text
+    words_per_minute: float = 140.0      # generated transcript density
+    swear_rate: float = 0.01             # share of generated words taken from swears.txt
+    failure_rate: float = 0.0            # share of operations that finish with an error
+    seed: int = 0
+
+    @classmethod
+    def from_json(cls, path, **overrides) -> "EmulatorConfig":
+        with open(path) as f:
+            data = json.load(f)
+        data.update(overrides)
+        known = {f.name for f in fields(cls)}
+        config = cls(**{k: v for k, v in data.items() if k in known})
+        config.root = Path(config.root)
+        config.transcript = Path(config.transcript) if config.transcript else None
+        return config
+
+
+_config = EmulatorConfig()
+_lock = threading.Lock()
+
+
+def _latency():
+    if _config.api_latency:
+        time.sleep(_config.api_latency)
+
+
+def _object_path(bucket_name, name) -> Path:
+    return _config.root / "buckets" / bucket_name / name
+
+
+def _meta_path(bucket_name, name) -> Path:
+    return _config.root / "meta" / bucket_name / (name + ".json")
+
+
+# --- Storage ---
+
+class FakeBlob:
+    """Subset of google.cloud.storage.Blob backed by a local file."""
+
+    def __init__(self, name, bucket=None, chunk_size=None, **kwargs):
+        self.name = name
+        self.bucket = bucket
+        self.chunk_size = chunk_size
+        self.content_type = None
+        self._metadata = None
+        self.size = None
+        self.md5_hash = None
+        self.time_created = None
+
+    @property
+    def metadata(self):
+        # Like the real client, the getter returns a copy
+        return dict(self._metadata) if self._metadata is not None else None
+
+    @metadata.setter
+    def metadata(self, value):
+        self._metadata = dict(value) if value is not None else None
+
+    @property
+    def _path(self) -> Path:
+        return _object_path(self.bucket.name, self.name)
+
+    def exists(self, client=None, **kwargs) -> bool:
+        _latency()
+        return self._path.exists()
+
+    def reload(self, client=None, **kwargs):
+        _latency()
+        meta_path = _meta_path(self.bucket.name, self.name)
+        if not self._path.exists():
+            raise exceptions.NotFound(f"No such object: {self.bucket.name}/{self.name}")
+        meta = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+        self._metadata = meta.get("metadata")
+        self.content_type = meta.get("content_type")
+        self.md5_hash = meta.get("md5")
+        self.size = self._path.stat().st_size
+        created = meta.get("time_created", self._path.stat().st_mtime)
+        self.time_created = datetime.fromtimestamp(created, tz=timezone.utc)
+
+    def _save_meta(self, md5=None):
+        meta_path = _meta_path(self.bucket.name, self.name)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        meta = json.loads(meta_path.read_text()) if meta_path.exists() else {"time_created": time.time()}
+        meta.update({"metadata": self._metadata, "content_type": self.content_type})
+        if md5 is not None:
+            meta["md5"] = md5
+        meta_path.write_text(json.dumps(meta))
+
+    def upload_from_file(self, file_obj, size=None, content_type=None, rewind=False, **kwargs):
+        _latency()
+        if rewind:
+            file_obj.seek(0)
+        if content_type:
+            self.content_type = content_type
+        path = self._path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.uploading")
+        chunk = self.chunk_size or 1024 * 1024
+        md5 = hashlib.md5()
+        written = 0
+        started = time.monotonic()
+        try:
+            with open(tmp, "wb") as out:
+                while size is None or written < size:
+                    data = file_obj.read(chunk if size is None else min(chunk, size - written))
+                    if not data:
+                        break
+                    out.write(data)
+                    md5.update(data)
+                    written += len(data)
+                    if _config.upload_mb_per_second:
+                        ahead = written / 1e6 / _config.upload_mb_per_second - (time.monotonic() - started)
+                        if ahead > 0:
+                            time.sleep(ahead)
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        self.size = written
+        self._save_meta(md5.hexdigest())
+
+    def upload_from_filename(self, filename, content_type=None, **kwargs):
+        with open(filename, "rb") as f:
+            self.upload_from_file(f, size=os.path.getsize(filename), content_type=content_type)
+
+    def download_to_filename(self, filename, **kwargs):
+        _latency()
+        if not self._path.exists():
+            raise exceptions.NotFound(f"No such object: {self.bucket.name}/{self.name}")
+        shutil.copyfile(self._path, filename)
+
+    def download_as_bytes(self, **kwargs) -> bytes:
+        _latency()
+        if not self._path.exists():
+            raise exceptions.NotFound(f"No such object: {self.bucket.name}/{self.name}")
+        return self._path.read_bytes()
+
+    def patch(self, client=None, **kwargs):
+        _latency()
+        if not self._path.exists():
+            raise exceptions.NotFound(f"No such object: {self.bucket.name}/{self.name}")
+        self._save_meta()
+
+    def compose(self, sources, client=None, **kwargs):
+        _latency()
+        path = self._path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        md5 = hashlib.md5()
+        with open(path, "wb") as out:
+            for source in sources:
+                with open(_object_path(source.bucket.name, source.name), "rb") as f:
+                    for data in iter(lambda: f.read(1024 * 1024), b""):
+                        out.write(data)
+                        md5.update(data)
+        self.size = path.stat().st_size
+        self._save_meta(md5.hexdigest())
+
+    def delete(self, client=None, **kwargs):
+        _latency()
+        if not self._path.exists():
+            raise exceptions.NotFound(f"No such object: {self.bucket.name}/{self.name}")
+        self._path.unlink()
+        meta_path = _meta_path(self.bucket.name, self.name)
+        if meta_path.exists():
+            meta_path.unlink()
+
+
+class FakeBucket:
+    """Subset of google.cloud.storage.Bucket backed by a local folder."""
+
+    def __init__(self, client=None, name=None, **kwargs):
+        self.client = client
+        self.name = name
+
+    @property
+    def _path(self) -> Path:
+        return _config.root / "buckets" / self.name
+
+    def blob(self, blob_name, chunk_size=None, **kwargs) -> FakeBlob:
+        return FakeBlob(blob_name, bucket=self, chunk_size=chunk_size)
+
+    def get_blob(self, blob_name, **kwargs) -> Optional[FakeBlob]:
+        blob = self.blob(blob_name)
+        try:
+            blob.reload()
+        except exceptions.NotFound:
+            return None
+        return blob
+
+    def exists(self, client=None, **kwargs) -> bool:
+        _latency()
+        return self._path.is_dir()
+
+    def list_blobs(self, prefix=None, **kwargs) -> List[FakeBlob]:
+        _latency()
+        blobs = []
+        if self._path.is_dir():
+            for path in sorted(self._path.rglob("*")):
+                name = path.relative_to(self._path).as_posix()
+                if path.is_file() and not name.endswith(".uploading") and name.startswith(prefix or ""):
+                    blob = self.blob(name)
+                    blob.reload()
+                    blobs.append(blob)
+        return blobs
+
+    def delete_blob(self, blob_name, **kwargs):
+        self.blob(blob_name).delete()
+
+
+class FakeStorageClient:
+    """Subset of google.cloud.storage.Client."""
+
+    def __init__(self, project=None, credentials=None, client_options=None, **kwargs):
+        self.project = project or "cleanvid-emulator"
+
+    def bucket(self, bucket_name, **kwargs) -> FakeBucket:
+        return FakeBucket(self, bucket_name)
+
+    def get_bucket(self, bucket_or_name, **kwargs) -> FakeBucket:
+        bucket = self.bucket(getattr(bucket_or_name, "name", bucket_or_name))
+        if not bucket.exists():
+            raise exceptions.NotFound(f"No such bucket: {bucket.name}")
+        return bucket
+
+    def lookup_bucket(self, bucket_name, **kwargs) -> Optional[FakeBucket]:
+        bucket = self.bucket(bucket_name)
+        return bucket if bucket.exists() else None
+
+    def create_bucket(self, bucket_or_name, **kwargs) -> FakeBucket:
+        bucket = self.bucket(getattr(bucket_or_name, "name", bucket_or_name))
+        _latency()
+        with _lock:
+            if bucket._path.is_dir():
+                raise exceptions.Conflict(f"Bucket already exists: {bucket.name}")
+            bucket._path.mkdir(parents=True)
+        return bucket
+
+    def list_blobs(self, bucket_or_name, prefix=None, **kwargs) -> List[FakeBlob]:
+        return self.bucket(getattr(bucket_or_name, "name", bucket_or_name)).list_blobs(prefix=prefix)
+
+
+# --- Video Intelligence ---
+
+def _operation_path(name) -> Path:
+    return _config.root / "operations" / (name.rsplit("/", 1)[-1] + ".json")
+
+
+def _audio_seconds(input_uri) -> float:
+    """Duration of the uploaded audio (ffprobe, else estimated from its size)."""
+    import utils
+
+    bucket_name, _, name = input_uri.replace("gs://", "").partition("/")
+    path = _object_path(bucket_name, name)
+    if not path.exists():
+        raise exceptions.NotFound(f"No such object: {input_uri}")
+    try:
+        return float(utils.get_length(path))
+    except Exception:
+        return path.stat().st_size / utils.AUDIO_PROFILES["dialogue-mono-16k"]["bytes_per_minute"] * 60
+
+
+def _progress(record) -> float:
+    """Progress (0-1) of an operation at the current time."""
+    elapsed = time.time() - record["created"] - record["queue_seconds"]
+    if elapsed <= 0:
+        return 0.0
+    fraction = min(1.0, elapsed / max(record["processing_seconds"], 1e-6))
+    curve = record.get("curve", "linear")
+    if fraction >= 1.0:
+        return 1.0
+    if curve == "sigmoid":
+        s = lambda x: 1 / (1 + math.exp(-10 * (x - 0.5)))
+        return (s(fraction) - s(0)) / (s(1) - s(0))
+    if curve == "stall":
+        return min(fraction, 0.5)
+    return fraction
+
+
+def _canned_words(seconds, seed_text) -> List[dict]:
+    """Transcript words for `seconds` of audio: from the configured transcript, else generated."""
+    if _config.transcript and Path(_config.transcript).suffix.lower() == ".csv":
+        with open(_config.transcript, newline="", encoding="utf-8") as f:
+            return [{"word": row["word"], "start": float(row["start"]), "end": float(row["end"]),
+                     "confidence": float(row.get("confidence") or 0.9)}
+                    for row in csv.DictReader(f) if float(row["start"]) < seconds]
+
+    import utils
+
+    rng = random.Random(f"{_config.seed}:{seed_text}")
+    if _config.transcript:
+        vocabulary = Path(_config.transcript).read_text(encoding="utf-8").split()
+    else:
+        vocabulary = FILLER
+    swears = [w for w in utils.parse_swears() if w and " " not in w] if _config.swear_rate else []
+    step = 60.0 / _config.words_per_minute
+    words = []
+    t = rng.uniform(0, 2)
+    i = 0
+    while t + step < seconds:
+        if swears and rng.random() < _config.swear_rate:
+            word = rng.choice(swears)
+        else:
+            word = vocabulary[i % len(vocabulary)] if _config.transcript else rng.choice(vocabulary)
+        duration = step * rng.uniform(0.5, 0.9)
+        words.append({"word": word, "start": round(t, 1), "end": round(t + duration, 1),
+                      "confidence": round(rng.uniform(0.6, 0.99), 3)})
+        t += step * rng.uniform(0.8, 1.2)
+        i += 1
+    return words
+
+
+def annotate_response(input_uri, words):
+    """AnnotateVideoResponse (v1 protobuf) with the words split into ~20-word transcriptions."""
+    from google.cloud import videointelligence
+
+    def duration(seconds):
+        return f"{seconds:.3f}s"
+
+    transcriptions = []
+    for k in range(0, len(words), 20):
+        chunk = words[k:k + 20]
+        transcriptions.append({
+            "alternatives": [{
+                "transcript": " ".join(w["word"] for w in chunk),
+                "confidence": sum(w["confidence"] for w in chunk) / len(chunk),
+                "words": [{"startTime": duration(w["start"]), "endTime": duration(w["end"]),
+                           "word": w["word"], "confidence": w["confidence"]} for w in chunk],
+            }],
+            "languageCode": "en-us",
+        })
+    message = videointelligence.AnnotateVideoResponse.pb()()
+    json_format.ParseDict({"annotationResults": [{"inputUri": input_uri, "speechTranscriptions": transcriptions}]},
+                          message)
+    return message
+
+
+class FakeOperationsClient:
+    """Answers get_operation for emulated operations (used through api_core's from_gapic)."""
+
+    def get_operation(self, name, *args, **kwargs):
+        from google.cloud import videointelligence
+
+        _latency()
+        path = _operation_path(name)
+        if not path.exists():
+            raise exceptions.NotFound(f"No such operation: {name}")
+        record = json.loads(path.read_text())
+        progress = 1.0 if record.get("cancelled") else _progress(record)
+
+        progress_pb = videointelligence.AnnotateVideoProgress.pb()()
+        json_format.ParseDict({"annotationProgress": [{
+            "inputUri": record["input_uri"], "progressPercent": int(progress * 100),
+            "startTime": datetime.fromtimestamp(record["created"], tz=timezone.utc).isoformat().replace("+00:00", "Z"),
+        }]}, progress_pb)
+        metadata = any_pb2.Any()
+        metadata.Pack(progress_pb)
+
+        operation = operations_pb2.Operation(name=record["name"], metadata=metadata, done=progress >= 1.0)
+        if record.get("cancelled"):
+            operation.error.CopyFrom(status_pb2.Status(code=1, message="Operation cancelled"))
+        elif operation.done and record["fail"]:
+            operation.error.CopyFrom(status_pb2.Status(code=13, message="Emulated transcription failure"))
+        elif operation.done:
+            response = any_pb2.Any()
+            response.Pack(annotate_response(record["input_uri"],
+                                             _canned_words(record["audio_seconds"], record["input_uri"])))
+            operation.response.CopyFrom(response)
+        return operation
+
+    def cancel_operation(self, name, *args, **kwargs):
+        path = _operation_path(name)
+        with _lock:
+            record = json.loads(path.read_text())
+            record["cancelled"] = True
+            path.write_text(json.dumps(record))
+
+    def delete_operation(self, name, *args, **kwargs):
+        path = _operation_path(name)
+        if path.exists():
+            path.unlink()
+
+
+class _Transport:
+    def __init__(self):
+        self.operations_client = self._operations_client = FakeOperationsClient()
+
+
+class FakeVideoIntelligenceClient:
+    """Subset of VideoIntelligenceServiceClient: annotate_video and the operations transport."""
+
+    def __init__(self, *args, **kwargs):
+        self.transport = self._transport = _Transport()
+
+    def annotate_video(self, request=None, *, input_uri=None, features=None, video_context=None, **kwargs):
+        from google.cloud import videointelligence
+
+        _latency()
+        if request is not None:
+            input_uri = request.get("input_uri") if isinstance(request, dict) else request.input_uri
+        seconds = _audio_seconds(input_uri)
+        rng = random.Random(f"{_config.seed}:{input_uri}:{time.time()}")
+        record = {
+            "name": f"projects/cleanvid-emulator/locations/local/operations/{uuid.uuid4().hex}",
+            "input_uri": input_uri,
+            "created": time.time(),
+            "audio_seconds": seconds,
+            "queue_seconds": _config.queue_seconds,
+            "processing_seconds": seconds / 60 * _config.seconds_per_audio_minute,
+            "curve": _config.progress_curve,
+            "fail": rng.random() < _config.failure_rate,
+        }
+        path = _operation_path(record["name"])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(record))
+
+        operations_client = self.transport.operations_client
+        return from_gapic(operations_client.get_operation(record["name"]), operations_client,
+                          videointelligence.AnnotateVideoResponse,
+                          metadata_type=videointelligence.AnnotateVideoProgress)
+
+
+def install(root=None, config: EmulatorConfig = None) -> EmulatorConfig:
+    """Replace the storage and Video Intelligence clients with the local fakes.
+
+    Args:
+        root: Folder for buckets and operations (overrides config.root).
+        config: Emulator settings; default from CLEANVID_EMULATOR_CONFIG or EmulatorConfig().
+
+    Returns:
+        EmulatorConfig: the active settings.
+    """
+    global _config
+    from google.cloud import storage, videointelligence, videointelligence_v1p3beta1
+
+    if config is None:
+        config_path = os.environ.get("CLEANVID_EMULATOR_CONFIG")
+        config = EmulatorConfig.from_json(config_path) if config_path else EmulatorConfig()
+    if root is not None:
+        config.root = Path(root)
+    config.root.mkdir(parents=True, exist_ok=True)
+    _config = config
+
+    storage.Client = FakeStorageClient
+    storage.Bucket = FakeBucket
+    storage.Blob = FakeBlob
+    videointelligence.VideoIntelligenceServiceClient = FakeVideoIntelligenceClient
+    videointelligence_v1p3beta1.VideoIntelligenceServiceClient = FakeVideoIntelligenceClient
+    print(f"Google services emulated in {config.root.resolve()}")
+    return config
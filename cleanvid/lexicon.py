@@ -0,0 +1,180 @@
+"""
+Compiled profanity lexicon.
+
+Single words are looked up in a hash set; multi-word phrases ("god damn", "cock sucker", ...) are
+stored in a token trie so a phrase of any length is matched in one pass over the word stream.
+Subtitle exceptions (words that are allowed when the subtitles confirm them) are applied here too.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import utils
+
+# Same normalization as the transcript: keep letters, hyphens and apostrophes (he'll != hell)
+STRIP_PUNCTUATION = re.compile('[^-a-zA-Z \']+')
+
+_END = None  # trie key marking the end of a phrase
+
+
+def normalize(word: str) -> str:
+    """Normalize a transcribed token for lexicon lookup."""
+    return STRIP_PUNCTUATION.sub("", word).lower()
+
+
+class Lexicon:
+    """Swear lexicon compiled for one-pass matching over a token stream."""
+
+    def __init__(self, swears: Iterable[str], subtitle_exceptions: Iterable[str] = ()):
+        self.words: Set[str] = set()
+        self.trie: Dict = {}
+        self.max_phrase_length = 1
+
+        for swear in swears:
+            tokens = [normalize(t) for t in swear.split()]
+            tokens = [t for t in tokens if t]
+            if not tokens:
+                continue
+            if len(tokens) == 1:
+                self.words.add(tokens[0])
+                continue
+            node = self.trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node[_END] = " ".join(tokens)
+            self.max_phrase_length = max(self.max_phrase_length, len(tokens))
+
+        self.exceptions: Set[str] = {" ".join(normalize(t) for t in e.split()) for e in subtitle_exceptions}
+
+    def __contains__(self, phrase: str) -> bool:
+        tokens = [normalize(t) for t in phrase.split()]
+        if len(tokens) == 1:
+            return tokens[0] in self.words
+        node = self.trie
+        for token in tokens:
+            node = node.get(token)
+            if node is None:
+                return False
+        return _END in node
+
+    def _longest_phrase(self, tokens: List[str], i: int) -> Optional[Tuple[int, str]]:
+        """Longest multi-word phrase starting at tokens[i], as (end_index_exclusive, phrase)."""
+        node = self.trie.get(tokens[i])
+        if node is None:
+            return None
+        best = None
+        j = i + 1
+        while j < len(tokens):
+            node = node.get(tokens[j])
+            if node is None:
+                break
+            j += 1
+            if _END in node:
+                best = (j, node[_END])
+        return best
+
+    def is_exception(self, phrase: str, confirmed: Optional[Set[str]]) -> bool:
+        """True if the phrase is a subtitle exception and the subtitles confirm it."""
+        return bool(confirmed) and phrase in self.exceptions and phrase in confirmed
+
+    def scan(self, tokens: List[str]) -> List[Tuple[int, int, str]]:
+        """Find matches in a normalized token stream.
+
+        At each position the longest phrase wins; a phrase is reported when it extends past the
+        previous match (so "oh god damn" yields both "oh god" and "god damn"), and single words
+        are only reported when no phrase already covers them.
+
+        Returns:
+            list: (start_index, end_index_exclusive, phrase) tuples in order.
+        """
+        matches = []
+        covered_end = 0
+        for i, token in enumerate(tokens):
+            phrase = self._longest_phrase(tokens, i) if self.trie else None
+            if phrase and phrase[0] > covered_end:
+                matches.append((i, phrase[0], phrase[1]))
+                covered_end = phrase[0]
+            elif i >= covered_end and token in self.words:
+                matches.append((i, i + 1, token))
+                covered_end = i + 1
+        return matches
+
+    def find_all(self, tokens: List[str]) -> Set[str]:
+        """Every lexicon entry present in a token stream, including overlapping ones
+        (e.g. both "god damn" and "damn")."""
+        found = {t for t in tokens if t in self.words}
+        if self.trie:
+            for i in range(len(tokens)):
+                node = self.trie.get(tokens[i])
+                j = i + 1
+                while node is not None and j <= len(tokens):
+                    if _END in node:
+                        found.add(node[_END])
+                    if j == len(tokens):
+                        break
+                    node = node.get(tokens[j])
+                    j += 1
+        return found
+
+    def create_mute_list(self, words, subtitle_confirmed_words=None):
+        """Create a mute list from transcribed words.
+
+        Args:
+            words: List of word dicts with 'word', 'start', 'end' keys.
+            subtitle_confirmed_words: Optional set of words/phrases that appear in subtitles.
+                Matches that are subtitle exceptions AND in this set are not muted.
+
+        Returns:
+            tuple: (mute_list, transcript, mute_details) where mute_list is [(start, end)] and
+                mute_details is [(start, end, censored_word)].
+        """
+        confirmed = {" ".join(normalize(t) for t in w.split()) for w in (subtitle_confirmed_words or ())}
+        tokens = [normalize(w["word"]) for w in words]
+
+        mute_list = []
+        mute_details = []
+        cleaned_transcript = [w["word"] for w in words]
+
+        for start_i, end_i, phrase in self.scan(tokens):
+            if self.is_exception(phrase, confirmed):
+                continue
+            start = words[start_i]["start"]
+            end = words[end_i - 1]["end"]
+            mute_list.append((start, end))
+            # Single words keep the transcribed first letter ("S***"), phrases the normalized one
+            first = words[start_i]["word"][:1] if end_i - start_i == 1 else phrase[0]
+            mute_details.append((start, end, first + "*" * (len(phrase) - 1)))
+            for k in range(start_i, end_i):
+                word_text = words[k]["word"]
+                cleaned_transcript[k] = word_text[:1] + "*" * (len(tokens[k]) - 1)
+
+        transcript = [" ".join(w["word"] for w in words)]
+        print(" ".join(cleaned_transcript))
+        return mute_list, transcript, mute_details
+
+
+_CACHE = {}
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def load_lexicon(swears_path=None, exceptions_path=None) -> Lexicon:
+    """Compile (or reuse) the lexicon for swears.txt / subtitle_exceptions.txt.
+
+    The compiled lexicon is cached per process and rebuilt when either file changes.
+    """
+    swears_path = Path(swears_path or utils.ROOT / "swears.txt")
+    exceptions_path = Path(exceptions_path or utils.ROOT / "subtitle_exceptions.txt")
+    key = (str(swears_path), _mtime(swears_path), str(exceptions_path), _mtime(exceptions_path))
+    if key not in _CACHE:
+        _CACHE.clear()
+        _CACHE[key] = Lexicon(utils.parse_swears(swears_path),
+                              utils.parse_subtitle_exceptions(exceptions_path))
+    return _CACHE[key]
@@ -0,0 +1,174 @@
+"""
+Asynchronous poller for Google long-running operations.
+
+Any number of operations (from google_speech_api.submit_operation or restore_operation) are
+tracked on one asyncio event loop. Each operation has its own polling interval, adapted to the
+progress_percent the API reports: fast-moving operations are checked close to their estimated
+finish, stalled or queued ones back off. The blocking status refreshes run in a small thread pool
+so one slow request never holds up the others.
+
+Blocking wrappers (wait_for_operation / wait_for_operations) are provided for existing callers.
+"""
+
+import asyncio
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import tracing
+
+MIN_INTERVAL = 5     # never check one operation more often than this (seconds)
+MAX_INTERVAL = 120   # never wait longer than this between checks (seconds)
+BACKOFF = 1.5        # interval growth when no progress is reported
+
+
+def operation_progress(operation) -> Optional[float]:
+    """Reported progress (0-100) of a speech or video operation, or None if unavailable."""
+    try:
+        metadata = operation.metadata
+        if metadata is None:
+            return None
+        if hasattr(metadata, "progress_percent"):
+            return float(metadata.progress_percent)
+        return float(metadata.annotation_progress._pb[0].progress_percent)
+    except Exception:
+        return None
+
+
+def operation_response(operation):
+    """Result of a finished operation (raises if the operation failed)."""
+    response = operation.result()
+    if response is None and hasattr(operation, "operation"):
+        # Restored operations may not unpack the result; fall back to the raw response
+        response = operation.operation.response
+    return response
+
+
+class _Tracked:
+    def __init__(self, operation, name, on_complete, on_error, min_interval, max_interval):
+        self.operation = operation
+        self.name = name
+        self.on_complete = on_complete
+        self.on_error = on_error
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.last_progress = None
+        self.last_progress_time = None
+        self.started = time.monotonic()
+
+    def next_interval(self, progress: Optional[float]) -> float:
+        """Adapt the polling interval to the reported progress."""
+        now = time.monotonic()
+        if progress is not None and self.last_progress is not None and progress > self.last_progress:
+            rate = (progress - self.last_progress) / max(now - self.last_progress_time, 1e-3)
+            remaining = (100.0 - progress) / rate
+            # Check a few times before the estimated finish
+            self.interval = remaining / 3
+        else:
+            self.interval *= BACKOFF
+        if progress is not None and progress != self.last_progress:
+            self.last_progress = progress
+            self.last_progress_time = now
+        self.interval = min(max(self.interval, self.min_interval), self.max_interval)
+        return self.interval
+
+
+class OperationPoller:
+    """Tracks many long-running operations on one event loop.
+
+    Usage:
+        poller = OperationPoller()
+        poller.track(operation, "movie", on_complete=lambda name, response: ...)
+        results = poller.run()  # {name: response or Exception}
+    """
+
+    def __init__(self, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL, max_concurrent_requests=16,
+                 verbose=True):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_concurrent_requests = max_concurrent_requests
+        self.verbose = verbose
+        self._tracked: List[_Tracked] = []
+
+    def track(self, operation, name, on_complete: Callable = None, on_error: Callable = None):
+        """Add an operation. Callbacks may be plain functions or coroutines:
+        on_complete(name, response), on_error(name, exception)."""
+        self._tracked.append(_Tracked(operation, name, on_complete, on_error, self.min_interval, self.max_interval))
+
+    async def _dispatch(self, callback, *args):
+        if callback is None:
+            return
+        result = callback(*args)
+        if inspect.isawaitable(result):
+            await result
+
+    async def _poll_one(self, tracked: _Tracked, pool: ThreadPoolExecutor):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                done = await loop.run_in_executor(pool, tracked.operation.done)
+            except Exception as e:
+                # Transient refresh failure (network, quota); keep trying with backoff
+                if self.verbose:
+                    print(f"  [{tracked.name}] status check failed: {e}")
+                done = False
+
+            if done:
+                try:
+                    response = await loop.run_in_executor(pool, operation_response, tracked.operation)
+                except Exception as e:
+                    if self.verbose:
+                        print(f"  ✗ '{tracked.name}' failed: {e}")
+                    await self._dispatch(tracked.on_error, tracked.name, e)
+                    return e
+                if self.verbose:
+                    elapsed = (time.monotonic() - tracked.started) / 60
+                    print(f"  ✓ '{tracked.name}' complete ({elapsed:.1f} min).")
+                await self._dispatch(tracked.on_complete, tracked.name, response)
+                return response
+
+            progress = operation_progress(tracked.operation)
+            delay = tracked.next_interval(progress)
+            if self.verbose:
+                pct = f"{progress:.0f}%" if progress is not None else "waiting..."
+                print(f"  [{tracked.name}] {pct} (next check in {delay:.0f}s)")
+            await asyncio.sleep(delay)
+
+    async def run_async(self) -> List[object]:
+        """Poll every tracked operation until all finish.
+
+        Returns:
+            list: response (or the Exception it failed with) per operation, in tracking order.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as pool:
+            return list(await asyncio.gather(*(self._poll_one(t, pool) for t in self._tracked)))
+
+    def run(self) -> Dict[str, object]:
+        """Blocking version of run_async. Returns {name: response or Exception}."""
+        results = asyncio.run(self.run_async())
+        return {t.name: r for t, r in zip(self._tracked, results)}
+
+
+def wait_for_operations(operations: List[Tuple[object, str]], on_complete: Callable = None,
+                        on_error: Callable = None, **kwargs) -> List[Tuple[object, str]]:
+    """Block until all (operation, name) pairs finish.
+
+    Returns:
+        list: (response_or_exception, name) tuples in the same order as the input.
+    """
+    poller = OperationPoller(**kwargs)
+    for operation, name in operations:
+        poller.track(operation, name, on_complete=on_complete, on_error=on_error)
+    with tracing.api_wait("transcription"):
+        results = asyncio.run(poller.run_async())
+    return [(response, name) for response, (_, name) in zip(results, operations)]
+
+
+def wait_for_operation(operation, name, **kwargs):
+    """Block until a single operation finishes and return its response (raises on failure)."""
+    (response, _), = wait_for_operations([(operation, name)], **kwargs)
+    if isinstance(response, Exception):
+        raise response
+    return response
@@ -0,0 +1,182 @@
+"""
+Persistent ffprobe metadata cache.
+
+Every probe of a video spawns an ffprobe subprocess, which is slow when the library lives on a
+network share. Results are stored in a small sqlite database keyed by the resolved path and
+validated against the file's size and mtime, so a file is only re-probed after it changes.
+"""
+
+import json
+import os
+import sqlite3
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import Global_Config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS probes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    probed_at REAL NOT NULL,
+    data TEXT NOT NULL
+)
+"""
+
+
+def _connect(cache_path=None) -> sqlite3.Connection:
+    """Open the cache database (one connection per call keeps this thread-safe)."""
+    cache_path = Path(cache_path or Global_Config.PROBE_CACHE_FILE)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(cache_path), timeout=30)
+    conn.execute(_SCHEMA)
+    return conn
+
+
+def _file_key(filename):
+    """Return (resolved_path, size, mtime_ns) for a file."""
+    path = Path(filename).resolve()
+    stat = os.stat(path)
+    return str(path), stat.st_size, stat.st_mtime_ns
+
+
+def run_ffprobe(filename, ffprobe_path="ffprobe") -> Dict:
+    """Run ffprobe on a file and return its format/stream metadata as a dict (uncached)."""
+    command = [str(ffprobe_path), "-v", "error", "-print_format", "json", "-show_format", "-show_streams", "-show_error",
+               str(filename)]
+    print(" ".join(command))
+    result = subprocess.run(command,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT)
+    # trim to end of json
+    data = result.stdout.decode(errors="ignore")
+    data = data[:data.rfind("}")+1]
+    return json.loads(data)
+
+
+def lookup(filename, cache_path=None) -> Optional[Dict]:
+    """Return cached ffprobe json for a file, or None if missing or stale."""
+    path, size, mtime_ns = _file_key(filename)
+    with _connect(cache_path) as conn:
+        row = conn.execute("SELECT size, mtime_ns, data FROM probes WHERE path = ?", (path,)).fetchone()
+    if row and row[0] == size and row[1] == mtime_ns:
+        return json.loads(row[2])
+    return None
+
+
+def store(filename, ffprobe_json, cache_path=None):
+    """Store ffprobe json for a file. Failed probes (no "format" section) are not cached."""
+    if "format" not in ffprobe_json:
+        return
+    path, size, mtime_ns = _file_key(filename)
+    with _connect(cache_path) as conn:
+        conn.execute("INSERT OR REPLACE INTO probes (path, size, mtime_ns, probed_at, data) VALUES (?, ?, ?, ?, ?)",
+                     (path, size, mtime_ns, time.time(), json.dumps(ffprobe_json)))
+
+
+def get_ffprobe_json(filename, ffprobe_path="ffprobe", cache_path=None) -> Dict:
+    """Return ffprobe json for a file, probing only on a cache miss.
+
+    Args:
+        filename: Path to the media file.
+        ffprobe_path: ffprobe executable used on a cache miss.
+        cache_path: Optional override for the sqlite cache location.
+    """
+    if not Path(filename).exists():
+        # Nothing to key on; let ffprobe report the error
+        return run_ffprobe(filename, ffprobe_path)
+
+    cached = lookup(filename, cache_path)
+    if cached is not None:
+        return cached
+
+    ffprobe_json = run_ffprobe(filename, ffprobe_path)
+    store(filename, ffprobe_json, cache_path)
+    return ffprobe_json
+
+
+def get_duration(ffprobe_json) -> Optional[float]:
+    """Extract the container duration (seconds) from ffprobe json."""
+    try:
+        return float(ffprobe_json["format"]["duration"])
+    except (KeyError, TypeError, ValueError):
+        pass
+    # Some containers only report duration per stream
+    durations = []
+    for stream in ffprobe_json.get("streams", []):
+        try:
+            durations.append(float(stream["duration"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return max(durations) if durations else None
+
+
+def bulk_probe(paths: Iterable, ffprobe_path="ffprobe", max_workers=8, cache_path=None) -> Dict[Path, Dict]:
+    """Fill the cache for many files at once, probing cache misses in parallel.
+
+    ffprobe spends most of its time waiting on the (network) filesystem, so a thread pool of
+    subprocesses scales well. Database writes happen on the calling thread.
+
+    Args:
+        paths: Files to probe.
+        ffprobe_path: ffprobe executable.
+        max_workers: Number of concurrent ffprobe processes.
+        cache_path: Optional override for the sqlite cache location.
+
+    Returns:
+        dict: {path: ffprobe_json} for every file that could be probed.
+    """
+    results = {}
+    misses = []
+    for p in paths:
+        p = Path(p)
+        if not p.exists():
+            continue
+        cached = lookup(p, cache_path)
+        if cached is not None:
+            results[p] = cached
+        else:
+            misses.append(p)
+
+    if misses:
+        print(f"Probing {len(misses)} files ({len(results)} cached)...")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            probed = executor.map(lambda p: _safe_probe(p, ffprobe_path), misses)
+            for p, ffprobe_json in zip(misses, probed):
+                if ffprobe_json is None:
+                    continue
+                store(p, ffprobe_json, cache_path)
+                results[p] = ffprobe_json
+    return results
+
+
+def _safe_probe(path, ffprobe_path):
+    try:
+        return run_ffprobe(path, ffprobe_path)
+    except Exception as e:
+        print(f"Could not probe {path}: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Pre-fill the ffprobe cache for a video library.")
+    parser.add_argument("roots", nargs="+", help="Folders (or files) to probe")
+    parser.add_argument("--ffprobe", default="ffprobe", help="Path to ffprobe")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent ffprobe processes")
+    args = parser.parse_args()
+
+    video_extensions = {".mp4", ".mkv", ".avi", ".m4v", ".mov"}
+    files = []
+    for root in args.roots:
+        root = Path(root)
+        if root.is_file():
+            files.append(root)
+        else:
+            files.extend(f for f in root.rglob("*") if f.suffix.lower() in video_extensions)
+    probed = bulk_probe(files, ffprobe_path=args.ffprobe, max_workers=args.workers)
+    print(f"Cached metadata for {len(probed)} / {len(files)} files")
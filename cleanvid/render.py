@@ -0,0 +1,430 @@
+"""
+Alternative render engines for the clean video (see utils.create_clean_video).
+
+Splice render: re-encode the audio only around mute regions.
+
+The filter render (utils.create_clean_video_command) decodes and re-encodes the whole audio track
+to silence a minute or two of it. For codecs with fixed-size frames the untouched stretches can be
+stream-copied instead:
+
+1. One copy pass cuts the source audio into pieces at frame-aligned window boundaries
+   (segment muxer, no decoding).
+2. Each window (a mute interval plus a margin, snapped outward to whole codec frames) is decoded,
+   muted and re-encoded with the source codec, bitrate and layout. The encoder's priming samples
+   are cut by encoding from a little before the window and keeping only the window's frames, so
+   every re-encoded piece is exactly as long as the audio it replaces.
+3. The copied pieces and the re-encoded windows are joined with the concat demuxer and muxed
+   next to the original track, exactly as the filter render does.
+
+Codecs without a known frame size (or any failure along the way) raise SpliceError so the caller
+can fall back to the full re-encode.
+
+PCM render: ffmpeg decodes the track to float PCM on a pipe; fixed-size blocks are muted in
+process with NumPy (sample-accurate, with short fade ramps) and piped into the encoder/muxer.
+Memory use is one block regardless of film length, and ffmpeg evaluates no filter expressions.
+"""
+
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+import probe_cache
+import utils
+
+# Samples per frame for codecs that can be cut and re-joined at frame boundaries
+FRAME_SIZES = {
+    "aac": 1024,
+    "ac3": 1536,
+    "eac3": 1536,
+    "mp3": 1152,
+    "mp2": 1152,
+}
+
+WINDOW_MARGIN = 0.5  # seconds of unmuted audio re-encoded on each side of a mute interval
+FADE_SECONDS = 0.01   # PCM render: gain ramp before and after each mute interval
+BLOCK_SECONDS = 1.0   # PCM render: audio processed per block
+SPLICE_TOLERANCE = 0.05  # seconds the spliced track may differ from the source, whatever the window count
+
+
+class SpliceError(Exception):
+    """The audio track can't be spliced; use the full re-encode instead."""
+
+
+def audio_stream_info(input_path, ffprobe_path="ffprobe"):
+    """Codec parameters of the first audio stream (the one the clean track is made from)."""
+    ffprobe_json = utils.get_ffprobe_json(input_path, ffprobe_path)
+    streams = [s for s in ffprobe_json.get("streams", []) if s.get("codec_type") == "audio"]
+    if not streams:
+        raise SpliceError(f"No audio stream in {input_path}")
+    stream = streams[0]
+    codec = stream.get("codec_name")
+    try:
+        sample_rate = int(stream["sample_rate"])
+    except (KeyError, ValueError):
+        raise SpliceError(f"Unknown sample rate for {codec} audio")
+    return {
+        "codec": codec,
+        "sample_rate": sample_rate,
+        "channels": int(stream.get("channels", 2)),
+        "channel_layout": stream.get("channel_layout"),
+        # Matroska only reports the bitrate in the stream tags
+        "bit_rate": stream.get("bit_rate") or stream.get("tags", {}).get("BPS"),
+        # ffmpeg seeks/cuts relative to the container start; frames are aligned to the stream start
+        "start_time": float(stream.get("start_time") or 0.0) - float(ffprobe_json.get("format", {}).get("start_time") or 0.0),
+        "duration": float(stream["duration"]) if stream.get("duration") else probe_cache.get_duration(ffprobe_json),
+    }
+
+
+def plan_windows(intervals, frame_duration, duration, margin=WINDOW_MARGIN) -> List[Tuple[float, float]]:
+    """Re-encode windows for a set of mute intervals.
+
+    Each interval is widened by `margin`, snapped outward to whole frames and clipped to the
+    track; windows that touch are merged.
+
+    Returns:
+        list: sorted [(window_start, window_end), ...] on frame boundaries
+    """
+    last_frame = math.floor(duration / frame_duration)
+    windows = []
+    for start, end in sorted(intervals):
+        first = max(0, math.floor((start - margin) / frame_duration))
+        last = min(last_frame, math.ceil((end + margin) / frame_duration))
+        if last <= first:
+            continue
+        if windows and first <= windows[-1][1]:
+            windows[-1][1] = max(windows[-1][1], last)
+        else:
+            windows.append([first, last])
+    return [(first * frame_duration, last * frame_duration) for first, last in windows]
+
+
+def _run(command):
+    print(" ".join(command))
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise SpliceError(result.stderr.decode(errors="ignore")[-2000:])
+    return result
+
+
+_encoder_delays = {}
+
+
+def _encoder_delay(info, ffmpeg_path, ffprobe_path, workdir) -> int:
+    """Priming samples the encoder puts before the audio (AAC 1024, AC-3 256, ...), measured once
+    per codec and layout by encoding a moment of silence."""
+    key = (info["codec"], info["sample_rate"], info["channels"])
+    if key not in _encoder_delays:
+        probe = Path(workdir) / "encoder_delay.mka"
+        _run([ffmpeg_path, "-y", "-nostdin", "-loglevel", "error", "-f", "lavfi",
+              "-i", f"anullsrc=r={info['sample_rate']}:cl=mono", "-t", "0.2",
+              "-c:a", info["codec"], "-ac", str(info["channels"]), str(probe)])
+        stream = probe_cache.run_ffprobe(probe, ffprobe_path)["streams"][0]
+        _encoder_delays[key] = int(stream.get("initial_padding") or 0)
+        probe.unlink()
+    return _encoder_delays[key]
+
+
+def _packets(path, ffprobe_path) -> List[Tuple[float, float]]:
+    """(pts, duration) of every audio packet, in seconds."""
+    result = subprocess.run([ffprobe_path, "-v", "error", "-select_streams", "a:0", "-show_entries",
+                             "packet=pts_time,duration_time", "-of", "csv=p=0", str(path)],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise SpliceError(result.stderr.decode(errors="ignore")[-2000:])
+    packets = []
+    for line in result.stdout.decode().split():
+        pts, duration = (line.split(",") + ["N/A"])[:2]
+        packets.append((float(pts), float(duration) if duration != "N/A" else 0.0))
+    return packets
+
+
+def _cut_packets(input_path, output, first, last, frame_duration, offset, ffmpeg_path):
+    """Stream-copy packets first .. last - 1 of the first audio stream into `output`.
+
+    Cut with the segment muxer a quarter frame before each packet (as splice_audio cuts the source),
+    so the cuts land on packets whatever the container's timestamp rounding. `offset` is the
+    time of packet 0.
+    """
+    cuts = [offset + j * frame_duration - frame_duration / 4 for j in (first, last)]
+    pattern = Path(output).with_name(Path(output).stem + "_cut%d.mka")
+    _run([ffmpeg_path, "-y", "-nostdin", "-loglevel", "error", "-i", str(input_path), "-map", "0:a:0",
+          "-c", "copy", "-f", "segment", "-segment_times", ",".join(f"{t:.6f}" for t in cuts if t > 0),
+          "-reset_timestamps", "1", str(pattern)])
+    cut_pieces = [Path(str(pattern) % k) for k in range(3)]
+    os.replace(cut_pieces[1 if cuts[0] > 0 else 0], output)
+    for path in cut_pieces:
+        path.unlink(missing_ok=True)
+
+
+def _encode_window(input_path, output, window, intervals, info, frame_size, ffmpeg_path, ffprobe_path):
+    """Decode one window, mute the intervals inside it and re-encode with the source parameters.
+
+    The encoder delays its output by `delay` priming samples, so packet p of a fresh encode holds
+    input samples [p * frame - delay, (p + 1) * frame - delay). Feeding the input from
+    `lead` packets' worth before the window (including one frame of context, so the first kept
+    frame's overlap is real audio) puts the window's frames exactly in packets lead .. lead + n - 1;
+    the others are dropped. The piece is then exactly the window's frames, at the right place.
+
+    The input is counted in samples, not seeked to: an -ss seek trims by packet timestamps, which
+    Matroska rounds to the millisecond.
+    """
+    start, end = window
+    sample_rate = info["sample_rate"]
+    frame_duration = frame_size / sample_rate
+    frames = round((end - start) / frame_duration)
+    delay = _encoder_delay(info, ffmpeg_path, ffprobe_path, Path(output).parent)
+
+    window_packet = round(start / frame_duration)
+    lead = math.ceil((delay + frame_size) / frame_size)
+    if window_packet * frame_size + delay - lead * frame_size < 0:
+        lead = math.ceil(delay / frame_size)  # window at the very start: no context frame
+    input_sample = window_packet * frame_size + delay - lead * frame_size
+    if input_sample < 0:
+        raise SpliceError(f"Window at {start:.3f}s starts inside the {info['codec']} encoder delay")
+    input_length = (lead + frames + 1) * frame_size - delay
+
+    # Source packets from one before the input (the decoder needs it for the overlap) to one after
+    first_packet = max(0, input_sample // frame_size - 1)
+    skip = input_sample - first_packet * frame_size
+    context = Path(output).with_suffix(".context.mka")
+    _cut_packets(input_path, context, first_packet, window_packet + frames + 2, frame_duration,
+                 info["start_time"], ffmpeg_path)
+
+    # asetpts restarts t at the input start
+    input_start = input_sample / sample_rate
+    terms = "+".join(f"between(t,{max(a, start) - input_start:.6f},{min(b, end) - input_start:.6f})"
+                     for a, b in intervals if b > start and a < end)
+    encoded = Path(output).with_suffix(".encoded.mka")
+    command = [ffmpeg_path, "-y", "-nostdin", "-loglevel", "error", "-i", str(context), "-map", "0:a:0",
+               "-af", f"atrim=start_sample={skip}:end_sample={skip + input_length},asetpts=N/SR/TB,"
+                      f"volume=enable='{terms}':volume=0",
+               "-c:a", info["codec"], "-ar", str(sample_rate), "-ac", str(info["channels"])]
+    if info["bit_rate"]:
+        command += ["-b:a", str(info["bit_rate"])]
+    _run(command + [str(encoded)])
+
+    # Keep packets lead .. lead + frames - 1
+    packets = _packets(encoded, ffprobe_path)
+    if len(packets) <= lead + frames:
+        raise SpliceError(f"Encoder returned {len(packets)} packets for a {lead + frames + 1} packet window")
+    _cut_packets(encoded, output, lead, lead + frames, frame_duration, 0.0, ffmpeg_path)
+    context.unlink()
+    encoded.unlink()
+
+    # Every piece must be exactly its window, or everything after it shifts. Measured from the
+    # packets: the container duration of a short Matroska piece is off by its start offset.
+    packets = _packets(output, ffprobe_path)
+    duration = packets[-1][0] + (packets[-1][1] or frame_duration) - packets[0][0] if packets else None
+    if duration is None or abs(duration - (end - start)) > frame_duration / 2:
+        raise SpliceError(f"Re-encoded window at {start:.3f}s is {duration}s, expected {end - start:.3f}s")
+
+
+def splice_audio(input_path, output_audio, intervals, ffmpeg_path="ffmpeg", ffprobe_path="ffprobe",
+                 margin=WINDOW_MARGIN, workdir=None):
+    """Build the clean audio track, re-encoding only the windows around `intervals`.
+
+    Args:
+        input_path: Source video.
+        output_audio: Clean audio track to write (Matroska audio, .mka).
+        intervals: [(start, end)] seconds to mute (already padded/coalesced).
+        margin: Seconds of audio re-encoded on each side of an interval.
+        workdir: Folder for the intermediate pieces (a temp folder by default).
+
+    Returns:
+        dict: {"windows", "reencoded_seconds", "duration"}
+    """
+    ffmpeg_path = ffmpeg_path.strip()
+    info = audio_stream_info(input_path, ffprobe_path)
+    frame_size = FRAME_SIZES.get(info["codec"])
+    if frame_size is None:
+        raise SpliceError(f"{info['codec']} audio can't be spliced")
+    if not info["duration"]:
+        raise SpliceError("Unknown audio duration")
+    frame_duration = frame_size / info["sample_rate"]
+
+    windows = plan_windows(intervals, frame_duration, info["duration"], margin)
+    if not windows:
+        raise SpliceError("Nothing to mute")
+
+    cleanup = workdir is None
+    workdir = Path(workdir or tempfile.mkdtemp(prefix="cleanvid_splice_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    try:
+        # 1. Cut the source at every window boundary in one stream-copy pass. The segment muxer
+        # starts a new piece at the first packet at or after each time; cutting a quarter frame
+        # early makes the frame that starts exactly on the boundary open the piece.
+        boundaries = sorted({t for window in windows for t in window if 0 < t < info["duration"]})
+        segment_times = ",".join(f"{info['start_time'] + t - frame_duration / 4:.6f}" for t in boundaries)
+        pieces_pattern = workdir / "piece%04d.mka"
+        _run([ffmpeg_path, "-y", "-nostdin", "-loglevel", "error", "-i", str(input_path),
+              "-map", "0:a:0", "-c", "copy", "-f", "segment", "-segment_times", segment_times,
+              "-reset_timestamps", "1", str(pieces_pattern)])
+        pieces = sorted(workdir.glob("piece*.mka"))
+        if len(pieces) != len(boundaries) + 1:
+            raise SpliceError(f"Expected {len(boundaries) + 1} pieces, got {len(pieces)}")
+
+        # 2. Replace the pieces that fall inside a window with re-encoded ones
+        piece_starts = [0.0] + boundaries
+        window_starts = {start: (start, end) for start, end in windows}
+        for i, piece_start in enumerate(piece_starts):
+            window = window_starts.get(piece_start)
+            if window is not None:
+                _encode_window(input_path, pieces[i], window, intervals, info, frame_size, ffmpeg_path,
+                               ffprobe_path)
+
+        # 3. Join. The concat demuxer offsets each piece by the previous one's container duration,
+        # which for Matroska includes the encoder delay once per piece; give it the exact length.
+        concat_list = workdir / "pieces.txt"
+        concat_list.write_text("".join(
+            f"file '{p.as_posix()}'\nduration {len(_packets(p, ffprobe_path)) * frame_duration:.6f}\n"
+            for p in pieces))
+        _run([ffmpeg_path, "-y", "-nostdin", "-loglevel", "error", "-f", "concat", "-safe", "0",
+              "-i", str(concat_list), "-c", "copy", str(output_audio)])
+
+        # A splice that drifted (e.g. a boundary fell mid-frame) would desync the track
+        spliced = probe_cache.get_duration(probe_cache.run_ffprobe(output_audio, ffprobe_path))
+        if spliced is None or abs(spliced - info["duration"]) > SPLICE_TOLERANCE:
+            raise SpliceError(f"Spliced track is {spliced}s, source is {info['duration']}s")
+    finally:
+        if cleanup:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    reencoded = sum(end - start for start, end in windows)
+    print(f"Spliced audio: re-encoded {reencoded:.1f}s of {info['duration']:.1f}s in {len(windows)} windows")
+    return {"windows": windows, "reencoded_seconds": reencoded, "duration": info["duration"]}
+
+
+def mux_clean_audio(input_path, clean_audio, output_path, ffmpeg_path="ffmpeg"):
+    """Mux the clean track as the default audio stream, keeping the original tracks after it
+    (same layout and metadata as the filter render)."""
+    _run([ffmpeg_path.strip(), "-y", "-nostdin", "-loglevel", "error",
+          "-i", str(input_path), "-i", str(clean_audio),
+          "-map", "0:v:0", "-c:v", "copy",
+          "-map", "1:a:0", "-map", "0:a", "-c:a", "copy",
+          "-metadata:s:a:0", "title=Clean", "-metadata:s:a:0", "language=eng",
+          "-metadata:s:a:1", "title=Original",
+          "-disposition:a:0", "default", "-disposition:a:1", "none",
+          "-max_muxing_queue_size", "9999", str(output_path)])
+
+
+def splice_render(input_path, output_path, intervals, ffmpeg_path="ffmpeg", ffprobe_path="ffprobe",
+                  margin=WINDOW_MARGIN):
+    """Create the clean video with a spliced audio track (raises SpliceError if not possible)."""
+    output_path = Path(output_path)
+    with tempfile.TemporaryDirectory(prefix="cleanvid_splice_") as workdir:
+        clean_audio = Path(workdir) / "clean.mka"
+        splice_audio(input_path, clean_audio, intervals, ffmpeg_path, ffprobe_path, margin,
+                     workdir=Path(workdir) / "pieces")
+        mux_clean_audio(input_path, clean_audio, output_path, ffmpeg_path)
+    return output_path
+
+
+class GainEnvelope:
+    """Gain (0..1) over time for a set of mute intervals: 0 inside each interval, linear ramps of
+    `fade` seconds outside it, 1 elsewhere."""
+
+    def __init__(self, intervals, fade=FADE_SECONDS):
+        # Disjoint and sorted, so both bounds can be binary-searched
+        intervals = utils.coalesce_intervals(intervals, padding=0, gap=0)
+        self.fade = fade
+        self.starts = np.array([a for a, _ in intervals], dtype=np.float64)
+        self.ends = np.array([b for _, b in intervals], dtype=np.float64)
+
+    def block_gain(self, first_sample, count, sample_rate) -> Optional[np.ndarray]:
+        """Per-sample gain for samples [first_sample, first_sample + count), or None if the block
+        is untouched."""
+        t0 = first_sample / sample_rate
+        t1 = (first_sample + count) / sample_rate
+        # Intervals whose faded extent overlaps the block
+        lo = np.searchsorted(self.ends, t0 - self.fade, side="left")
+        hi = np.searchsorted(self.starts, t1 + self.fade, side="right")
+        if lo >= hi:
+            return None
+        t = (first_sample + np.arange(count)) / sample_rate
+        gain = np.ones(count, dtype=np.float32)
+        fade = max(self.fade, 1e-9)
+        for a, b in zip(self.starts[lo:hi], self.ends[lo:hi]):
+            np.minimum(gain, np.interp(t, [a - fade, a, b, b + fade], [1.0, 0.0, 0.0, 1.0]), out=gain)
+        return gain
+
+
+def pcm_render(input_path, output_path, intervals, ffmpeg_path="ffmpeg", ffprobe_path="ffprobe",
+               fade=FADE_SECONDS, block_seconds=BLOCK_SECONDS):
+    """Create the clean video, muting decoded PCM in process.
+
+    Args:
+        input_path: Source video.
+        output_path: Clean video to write.
+        intervals: [(start, end)] seconds to mute (already padded/coalesced).
+        fade: Length of the gain ramps around each interval, in seconds.
+        block_seconds: Audio processed per block (memory use is one block).
+
+    Returns:
+        Path: output_path
+    """
+    ffmpeg_path = ffmpeg_path.strip()
+    info = audio_stream_info(input_path, ffprobe_path)
+    sample_rate, channels = info["sample_rate"], info["channels"]
+    envelope = GainEnvelope(intervals, fade)
+
+    decode = [ffmpeg_path, "-nostdin", "-loglevel", "error", "-i", str(input_path),
+              "-map", "0:a:0", "-f", "f32le", "-ar", str(sample_rate), "-ac", str(channels), "pipe:1"]
+    # Input 0: clean PCM from stdin (shifted to where the audio starts); input 1: the source
+    encode = [ffmpeg_path, "-y", "-nostdin", "-loglevel", "error",
+              "-f", "f32le", "-ar", str(sample_rate), "-ac", str(channels),
+              "-itsoffset", f"{info['start_time']:.6f}", "-i", "pipe:0", "-i", str(input_path),
+              "-map", "1:v:0", "-c:v", "copy",
+              "-map", "0:a:0", "-map", "1:a",
+              "-c:a", "copy", "-c:a:0", info["codec"], "-b:a:0", str(info["bit_rate"] or "256k"),
+              "-metadata:s:a:0", "title=Clean", "-metadata:s:a:0", "language=eng",
+              "-metadata:s:a:1", "title=Original",
+              "-disposition:a:0", "default", "-disposition:a:1", "none",
+              "-max_muxing_queue_size", "9999", str(output_path)]
+    print(" ".join(decode))
+    print(" ".join(encode))
+
+    frame_bytes = 4 * channels
+    block_bytes = max(1, int(block_seconds * sample_rate)) * frame_bytes
+    position = 0  # samples written so far
+    muted_samples = 0
+    with tempfile.TemporaryFile() as decode_err, tempfile.TemporaryFile() as encode_err:
+        decoder = subprocess.Popen(decode, stdout=subprocess.PIPE, stderr=decode_err)
+        encoder = subprocess.Popen(encode, stdin=subprocess.PIPE, stderr=encode_err)
+        try:
+            while True:
+                data = decoder.stdout.read(block_bytes)
+                if not data:
+                    break
+                count = len(data) // frame_bytes
+                gain = envelope.block_gain(position, count, sample_rate)
+                if gain is not None:
+                    block = np.frombuffer(data, dtype="<f4", count=count * channels).reshape(count, channels)
+                    data = (block * gain[:, None]).astype("<f4").tobytes()
+                    muted_samples += int(np.count_nonzero(gain < 1.0))
+                encoder.stdin.write(data)
+                position += count
+        except BrokenPipeError:
+            pass  # encoder exited early; reported below
+        finally:
+            decoder.stdout.close()
+            try:
+                encoder.stdin.close()
+            except BrokenPipeError:
+                pass
+            decode_code = decoder.wait()
+            encode_code = encoder.wait()
+
+        if decode_code != 0 or encode_code != 0:
+            decode_err.seek(0)
+            encode_err.seek(0)
+            raise ValueError(f"Could not process {input_path}: "
+                             f"{decode_err.read().decode(errors='ignore')}{encode_err.read().decode(errors='ignore')}")
+
+    print(f"PCM render: {position / sample_rate:.1f}s of audio, {muted_samples / sample_rate:.1f}s attenuated")
+    return Path(output_path)
@@ -0,0 +1,178 @@
+"""
+Catalog of the saved API files (.response / .operation) in a response folder.
+
+Finding the response for a video used to glob the response folder and parse every file name on
+each lookup, so analyzing a library cost O(videos x responses). The catalog lists the folder once
+and keeps the parsed entries in memory, keyed by the video stem and by utils.parse_filename
+identity. Before each lookup it re-lists only the directories whose mtime changed (a file
+added, removed or renamed in a directory changes its mtime), so new responses show up without
+rescanning everything.
+
+File names are "{video stem}_{%Y-%m-%d %H;%M;%S}{ext}" (see google_api); matches are returned
+newest first by that timestamp (file mtime when there is none). The segments of a multi-segment
+transcription are saved as "{video stem}.seg{index:03d}" (segment_stem) and are only found by
+their own name, never as the whole video.
+
+    catalog = response_catalog.get_catalog("./data/google_api")
+    catalog.find(video_path.stem, ".response")         # newest match or None
+    catalog.find_all(video_path.stem, ".operation")    # all matches, newest first
+"""
+
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import utils
+
+API_EXTENSIONS = (".response", ".operation")
+
+_TIMESTAMP = re.compile(r'_(\d{4}-\d{2}-\d{2} \d{2};\d{2};\d{2})')
+_TIMESTAMP_FORMAT = "%Y-%m-%d %H;%M;%S"
+
+# Directories modified this recently are re-listed anyway: a file written in the same mtime tick
+# as the last listing would not change the directory's mtime
+_RACY_SECONDS = 2.0
+
+_SEGMENT = re.compile(r'\.seg\d{3}$')
+
+
+def video_stem(name) -> str:
+    """Video stem of an API file name: "Argo (2012)_2024-01-01 10;00;00.response" -> "Argo (2012)"."""
+    stem = Path(name).stem.replace("_words", "")
+    return re.sub(r'_\d{4}-\d{2}-\d{2}.*', '', stem)
+
+
+def segment_stem(stem, index) -> str:
+    """Name the API files of one transcription segment are saved under: "Show S01E01" -> "Show S01E01.seg000"."""
+    return f"{stem}.seg{index:03d}"
+
+
+def is_segment(stem) -> bool:
+    return bool(_SEGMENT.search(stem))
+
+
+class CatalogEntry:
+    """One .response/.operation file."""
+
+    __slots__ = ("path", "extension", "stem", "parsed", "segment", "timestamp")
+
+    def __init__(self, path: Path, mtime: float):
+        self.path = path
+        self.extension = path.suffix
+        self.stem = video_stem(path.name)
+        self.parsed = utils.parse_filename(self.stem)
+        self.segment = is_segment(self.stem)
+        match = _TIMESTAMP.search(path.stem)
+        try:
+            self.timestamp = datetime.strptime(match.group(1), _TIMESTAMP_FORMAT).timestamp() if match else mtime
+        except ValueError:
+            self.timestamp = mtime
+
+
+class ResponseCatalog:
+    """API files under one response folder (recursively), refreshed by directory mtime.
+
+    Args:
+        folder: The response folder (Global_Config.RESPONSE_FOLDER / api_response_root).
+    """
+
+    def __init__(self, folder):
+        self.folder = Path(folder)
+        self._dirs: Dict[str, Tuple[int, List[str], List[CatalogEntry]]] = {}
+        self._by_stem: Dict[Tuple[str, str], List[CatalogEntry]] = {}
+        self._by_parsed: Dict[Tuple[str, Tuple], List[CatalogEntry]] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Re-list directories whose mtime changed; rebuild the keys if anything did."""
+        with self._lock:
+            changed = False
+            seen = set()
+            stack = [str(self.folder)]
+            now = time.time()
+            while stack:
+                directory = stack.pop()
+                try:
+                    mtime_ns = os.stat(directory).st_mtime_ns
+                except OSError:
+                    continue
+                seen.add(directory)
+                stored = self._dirs.get(directory)
+                if stored is None or stored[0] != mtime_ns or now - mtime_ns / 1e9 < _RACY_SECONDS:
+                    listing = self._list(directory)
+                    if listing is None:
+                        continue
+                    subdirs, entries = listing
+                    if stored is None or stored[0] != mtime_ns or \
+                            [e.path for e in stored[2]] != [e.path for e in entries]:
+                        changed = True
+                    self._dirs[directory] = (mtime_ns, subdirs, entries)
+                stack.extend(self._dirs[directory][1])
+            for directory in [d for d in self._dirs if d not in seen]:
+                del self._dirs[directory]
+                changed = True
+            if changed:
+                self._rebuild()
+
+    @staticmethod
+    def _list(directory):
+        subdirs, entries = [], []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif os.path.splitext(entry.name)[1] in API_EXTENSIONS:
+                            entries.append(CatalogEntry(Path(entry.path), entry.stat().st_mtime))
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"Could not list {directory}: {e}")
+            return None
+        entries.sort(key=lambda e: e.path)
+        return subdirs, entries
+
+    def _rebuild(self):
+        by_stem, by_parsed = {}, {}
+        for _, _, entries in self._dirs.values():
+            for entry in entries:
+                by_stem.setdefault((entry.extension, entry.stem), []).append(entry)
+                by_parsed.setdefault((entry.extension, entry.parsed), []).append(entry)
+        for matches in list(by_stem.values()) + list(by_parsed.values()):
+            matches.sort(key=lambda e: (e.timestamp, str(e.path)), reverse=True)
+        self._by_stem, self._by_parsed = by_stem, by_parsed
+
+    def find_all(self, stem, extension=".response") -> List[Path]:
+        """Files for a video stem, newest first: exact stem matches, then same parsed identity.
+
+        Segment files ("Show S01E01.seg000" parses as the episode) only match their exact stem.
+        """
+        self.refresh()
+        exact_paths = [e.path for e in self._by_stem.get((extension, stem), [])]
+        if is_segment(stem):
+            return exact_paths
+        parsed = self._by_parsed.get((extension, utils.parse_filename(stem)), [])
+        return exact_paths + [e.path for e in parsed if e.stem != stem and not e.segment]
+
+    def find(self, stem, extension=".response") -> Optional[Path]:
+        """Newest file for a video stem (exact stem preferred), or None."""
+        matches = self.find_all(stem, extension)
+        return matches[0] if matches else None
+
+
+_catalogs: Dict[Path, ResponseCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(folder) -> ResponseCatalog:
+    """The shared catalog of a response folder (one per folder per process)."""
+    key = Path(folder).resolve()
+    with _catalogs_lock:
+        if key not in _catalogs:
+            _catalogs[key] = ResponseCatalog(key)
+        return _catalogs[key]
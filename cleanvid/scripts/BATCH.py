@@ -4,6 +4,7 @@ import argparse
 import pickle
 from pathlib import Path
 import os, sys
+from concurrent.futures import ThreadPoolExecutor
 
 # Add root directory to sys.path to allow imports from parent
 current_dir = Path(__file__).resolve().parent
@@ -14,6 +15,10 @@ sys.path.append(str(root_dir))
 
 import MAIN
 import utils
+import probe_cache
+import utilization
+from scripts.pipeline import StepStatus, create_pipeline_for_video
+from scripts.pipeline_executor import PipelineExecutor
 from datetime import datetime
 import logging
 import my_logging
@@ -24,6 +29,10 @@ from other_tools import cleanup_bucket
 
 
 video_extensions = ["*.mp4","*.avi", "*.mkv", "*.m4v"]
+VIDEO_SUFFIXES = {x.replace("*","") for x in video_extensions}
+MIN_LENGTH = 1200 # seconds
+# Config settings the staged pipeline can't honor; a config that sets one runs through MAIN
+STAGED_UNSUPPORTED = ("mute_list_path", "pickle_path")
 UTILIZATION = {}
 MAX_UTILIZATION = 60*1000
 UTILIZATION_EXCEEDED = False
@@ -40,7 +49,8 @@ def check_month_utilization():
 
 MONTH = get_month()
 
-def process_batch_list(batch_list, config, video_path, no_video=False):
+def process_batch_list(batch_list, config, video_path, no_video=False, sequential=False,
+                       transcribe_workers=3, prefetch=2, cpu_workers=None):
     cleanup_bucket.cleanup_bucket()
     global UTILIZATION, MONTH
     if video_path:
@@ -52,56 +62,112 @@ def process_batch_list(batch_list, config, video_path, no_video=False):
             batch_list = f.read().strip().replace("'","").replace('"',"").split("\n")
     print(f"Batch {batch_list}")
     UTILIZATION = load_utilization()
-    
-    # ... (existing code for utilization check) ...
-    # Wait, I need to keep the context.
-    # I'll just replace the relevant parts.
-    
     print(f"Utilization for {MONTH}: {UTILIZATION[MONTH]}")
     #UTILIZATION[MONTH] = 480*60
 
-    # load list
-    for item in batch_list:
-		# Skip commented ones
-        line = item.strip()
-        if not line:
-            continue
-        elif line[0] =="#":
-            print(f"skipping {item}")
-            continue
+    # Find every video up front (batch entries are walked concurrently) and print the plan
+    found = find_batch_videos(batch_list)
+    first_video = next((v for _, full_items in found for v in full_items), None)
+    if first_video is None:
+        print("No videos found")
+        return
+    first_config = utils.process_config(config, video_path=first_video)[0]
+    ffprobe_path = utils.config_tool_paths(first_config)[1]
+    lengths = print_plan(found, ffprobe_path)
 
-        check_month_utilization()
+    unsupported = [key for key in STAGED_UNSUPPORTED if first_config.get(key)]
+    if unsupported and not sequential:
+        warnings.warn(f"{config} sets {', '.join(unsupported)}, which only MAIN handles; running sequentially")
+        sequential = True
+    if sequential:
+        process_sequentially(found, lengths, config, ffprobe_path, no_video=no_video)
+        print("New Utilization", MONTH, UTILIZATION[MONTH])
+        save_utilization(UTILIZATION)
+    else:
+        process_staged(found, lengths, config, ffprobe_path, no_video=no_video, transcribe_workers=transcribe_workers,
+                       prefetch=prefetch, cpu_workers=cpu_workers)
 
-        print(f"Checking if {item} exists...")
-        full_items = list(search_folder_for_video(item))
+def process_sequentially(found, lengths, config, ffprobe_path, no_video=False):
+    """ One video at a time through MAIN.manager (the original batch flow).
+    """
+    for item, full_items in found:
+        if not full_items:
+            print(item, "not found")
         for full_item in full_items:
-            if full_item:
-                print("Working on ", Path(full_item).name)
-                mute_list = search_for_mute_list(full_item)
-                config, _config_parser = utils.process_config(opts.config, video_path=full_item, mute_list=mute_list)
-                total_length = utils.get_length(full_item, Path(config.ffmpeg_path).parent/"ffprobe")
-                total_length = round(total_length+7.49,15)
-                check_month_utilization()
-                config["google_api_request_allowed"] = not UTILIZATION_EXCEEDED
-                if total_length > 1200: # should be longer than 20 minutes
-                    success = process_item(config, _config_parser, no_video=no_video)
-                    if success:
-                        print("SUCCESS")
-                    if config.google_api_request_made:
-                        print(f"Adding to utilization {total_length}")
-                        UTILIZATION[MONTH] += total_length
-                        UTILIZATION[f"{MONTH} dict"][Path(full_item).name] = total_length
-                        save_utilization(UTILIZATION)
-                        print(f"Total Utilization {MONTH}: {UTILIZATION[MONTH]}")
-                    else:
-                        print("NOT SUCCESS")
+            print("Working on ", Path(full_item).name)
+            mute_list = search_for_mute_list(full_item)
+            item_config, _config_parser = utils.process_config(config, video_path=full_item, mute_list=mute_list)
+            total_length = lengths.get(full_item)
+            if total_length is None:
+                total_length = utils.get_length(full_item, ffprobe_path)
+            total_length = round(total_length+7.49,15)
+            check_month_utilization()
+            item_config["google_api_request_allowed"] = not UTILIZATION_EXCEEDED
+            if total_length > MIN_LENGTH: # should be longer than 20 minutes
+                success = process_item(item_config, _config_parser, no_video=no_video)
+                if success:
+                    print("SUCCESS")
+                if item_config.google_api_request_made:
+                    print(f"Adding to utilization {total_length}")
+                    UTILIZATION[MONTH] += total_length
+                    UTILIZATION[f"{MONTH} dict"][Path(full_item).name] = total_length
+                    save_utilization(UTILIZATION)
+                    print(f"Total Utilization {MONTH}: {UTILIZATION[MONTH]}")
                 else:
-                    print(full_item, "less than 1000 seconds, skipping", total_length)
+                    print("NOT SUCCESS")
             else:
-                print(item, "not found")
+                print(full_item, "less than 1000 seconds, skipping", total_length)
+
+def process_staged(found, lengths, config, ffprobe_path, no_video=False, transcribe_workers=3, prefetch=2,
+                   cpu_workers=None):
+    """ Overlap the batch instead of waiting on each video in turn: up to transcribe_workers videos
+        sit in Google's queue while the next `prefetch` are extracted and uploaded and finished ones
+        render. Runs the pipeline steps (scripts/pipeline.py) through PipelineExecutor; each video's
+        minutes are reserved against Global_Config.MAX_MONTHLY_MINUTES before it starts.
+        The config is processed per video and gives the pipeline its ffmpeg/ffprobe paths,
+        response folder and any operation/response to resume (see create_pipeline_for_video).
+    """
+    videos = []
+    for item, full_items in found:
+        if not full_items:
+            print(item, "not found")
+        for full_item in full_items:
+            total_length = lengths.get(full_item)
+            if total_length is None:
+                total_length = utils.get_length(full_item, ffprobe_path)
+            if total_length + 7.49 > MIN_LENGTH:
+                videos.append(Path(full_item))
+            else:
+                print(full_item, "less than 1000 seconds, skipping", total_length)
+
+    pipelines = []
+    for full_item in dict.fromkeys(videos): # a video listed twice would collide in ./temp
+        item_config, _config_parser = utils.process_config(config, video_path=str(full_item))
+        pipeline = create_pipeline_for_video(full_item, config=item_config)
+        if no_video:
+            pipeline.apply_stop_after(5)
+        pipelines.append(pipeline)
+    print(f"Running {len(pipelines)} videos: {transcribe_workers} transcribing at once, {prefetch} prefetched")
+    print(utilization.get_usage_summary())
+
+    def callback(step):
+        if step.status == StepStatus.RUNNING:
+            print(f"  [{step.video_path.name}] Step {step.number}: {step.name}...")
+        elif step.status == StepStatus.DONE:
+            print(f"  [{step.video_path.name}] Step {step.number}: Done")
+        elif step.status == StepStatus.ERROR:
+            print(f"  [{step.video_path.name}] Step {step.number}: ERROR - {step.error_message}")
 
-    print("New Utilization", MONTH, UTILIZATION[MONTH])
-    save_utilization(UTILIZATION)
+    executor = PipelineExecutor(pipelines,
+                                cpu_workers=cpu_workers,
+                                cloud_workers=transcribe_workers,
+                                max_active=transcribe_workers + prefetch,
+                                budget=utilization.TranscriptionBudget())
+    results = executor.run(callback=callback)
+    for video, ok in results.items():
+        print("SUCCESS" if ok else "NOT SUCCESS", video.name)
+    print(utilization.get_usage_summary())
+    return results
 
 def search_for_mute_list(full_item):
     full_item = Path(full_item)
@@ -112,19 +178,88 @@ def search_for_mute_list(full_item):
         return ""
 
 def search_folder_for_video(folder):
-    if Path(folder).suffix in [x.replace("*","") for x in video_extensions]:
+    if Path(folder).suffix.lower() in VIDEO_SUFFIXES:
         print(f"{folder} is video path")
         if clean_exists(folder):
-            return False
-        yield folder
+            return
+        yield Path(folder)
     else:
-        for ext in video_extensions:
-            for i in Path(str(folder).lower()).rglob(ext):
-                if clean_exists(i):
-                    #)print("Clean version detected for:", i.name)
-                    yield False
-                elif "sample" not in i.name:
-                    yield i
+        yield from walk_for_videos(folder)
+
+
+def walk_for_videos(folder):
+    """ Videos under folder in one os.scandir pass (all extensions at once, case-insensitive).
+        Videos with a "_clean" sibling in the same listing, "_clean" outputs and samples are skipped.
+    """
+    stack = [str(folder)]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError as e:
+            print(f"Could not list {directory}: {e}")
+            continue
+        names = {entry.name.lower() for entry in entries}
+        for entry in sorted(entries, key=lambda e: e.name):
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+            except OSError:
+                continue
+            stem, suffix = os.path.splitext(entry.name)
+            lower = entry.name.lower()
+            if suffix.lower() not in VIDEO_SUFFIXES or "_clean" in lower:
+                continue
+            if (stem + "_clean" + suffix).lower() in names:
+                print("Clean version detected for:", entry.name)
+            elif "sample" not in lower:
+                yield Path(entry.path)
+
+
+def find_batch_videos(batch_list, max_workers=8):
+    """ [(batch entry, [videos])] for the non-comment entries, in order; entries are walked concurrently.
+    """
+    items = []
+    for item in batch_list:
+        line = item.strip()
+        if not line:
+            continue
+        elif line[0] == "#":
+            print(f"skipping {item}")
+            continue
+        items.append(line)
+    print(f"Searching {len(items)} batch entries...")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        found = list(executor.map(lambda item: list(search_folder_for_video(item)), items))
+    return list(zip(items, found))
+
+
+def print_plan(found, ffprobe_path, max_workers=8):
+    """ Probe every video (probe_cache, in parallel) and print what the batch will process.
+        Returns {video: length in seconds}.
+    """
+    videos = [video for _, full_items in found for video in full_items]
+    probed = probe_cache.bulk_probe(videos, ffprobe_path=ffprobe_path, max_workers=max_workers)
+    lengths = {}
+    for video, ffprobe_json in probed.items():
+        duration = probe_cache.get_duration(ffprobe_json)
+        if duration is not None:
+            lengths[video] = duration
+
+    to_process = [v for v in videos if lengths.get(v, 0) + 7.49 > MIN_LENGTH]
+    total_minutes = sum(lengths[v] for v in to_process) / 60
+    to_process_set = set(to_process)
+    print(f"\nPlan: {len(to_process)} of {len(videos)} videos, {total_minutes:.0f} minutes")
+    for item, full_items in found:
+        print(f"  {item}: {len(full_items)} videos, "
+              f"{sum(lengths.get(v, 0) for v in full_items if v in to_process_set) / 60:.0f} minutes")
+    unknown = [v for v in videos if v not in lengths]
+    if unknown:
+        print(f"  {len(unknown)} videos could not be probed")
+    print(f"  Utilization {MONTH}: {UTILIZATION.get(MONTH, 0) / 60:.0f} of {MAX_UTILIZATION / 60:.0f} minutes used\n")
+    return lengths
 
 
 def clean_exists(i):
@@ -179,6 +314,10 @@ if __name__=='__main__':
     
     parser.set_defaults(no_video=no_video_default)
     parser.add_argument('--no-video', action='store_true', help='Skip video creation')
+    parser.add_argument('--sequential', action='store_true', help='One video at a time through MAIN (original flow)')
+    parser.add_argument('--transcribe_workers', type=int, default=3, help='Videos in transcription at once')
+    parser.add_argument('--prefetch', type=int, default=2, help='Videos extracted/uploaded ahead of transcription')
+    parser.add_argument('--cpu_workers', type=int, default=None, help='Concurrent ffmpeg jobs (default: cores / 2)')
 
     opts = parser.parse_args()
 
@@ -190,4 +329,6 @@ if __name__=='__main__':
     if not opts.config:
         opts.config = "configs/default_config"
 
-    process_batch_list(batch_list=opts.batch_file, config=opts.config, video_path=opts.video, no_video=opts.no_video)
+    process_batch_list(batch_list=opts.batch_file, config=opts.config, video_path=opts.video, no_video=opts.no_video,
+                       sequential=opts.sequential, transcribe_workers=opts.transcribe_workers,
+                       prefetch=opts.prefetch, cpu_workers=opts.cpu_workers)
@@ -23,10 +23,8 @@ import partial_completion_functions
 import google_api
 import Global_Config
 import utils
+import response_catalog
 
-BLOB_SIZE = 1 # 5 has worked previously
-storage.blob._MAX_MULTIPART_SIZE = BLOB_SIZE * 1024* 1024 # 5 MB
-storage.blob._DEFAULT_CHUNKSIZE = BLOB_SIZE * 1024* 1024 # 5 MB
 
 # Ensure ROOT points to project root, not scripts/
 ROOT = root_dir
@@ -74,27 +72,24 @@ class CleanProfanity:
         # GO HERE: https://console.cloud.google.com/apis/credentials/serviceaccountkey
         # Choose project, select "owner" account
 
-        storage_client = storage.Client()
-        try:
-            bucket = storage_client.create_bucket(Global_Config.BUCKET_NAME)
-        except:
-            pass
+        storage_client = google_api.get_storage_client()
 
         # Browse Bucket: https://console.cloud.google.com/storage/browser/remove_profanity_from_movie_project?forceOnBucketsSortingFiltering=false&project=speech-to-text-1590881833772
-        bucket = storage_client.get_bucket(Global_Config.BUCKET_NAME)
-        destination = re.sub("[#\[\]*?]", "_", destination)
+        bucket = google_api.get_bucket(storage_client)
 
-        # hash destination
-        hash = hashlib.md5(destination.encode()).hexdigest()[:10]
-        destination = f"{destination[:9]} + {hash}"
+        # Content-addressed: identical audio maps to the same object whatever it's called
+        digest = utils.file_digest(source)
+        original_name = destination
+        destination = utils.generate_gcs_uri(source, digest=digest).replace(f"gs://{Global_Config.BUCKET_NAME}/", "")
 
         file_already_uploaded=False
         if (not storage.Blob(bucket=bucket, name=destination).exists(storage_client)) or overwrite:
             print(f"Uploading {destination}...")
             blob = bucket.blob(f'{destination}')
-            blob.chunk_size = BLOB_SIZE * 1024 * 1024 # Set 5 MB (or less) blob size so slower networks don't timeout
-            if False:
-                blob.upload_from_filename(str(source))
+            blob.chunk_size = google_api.chunk_size_bytes() # Global_Config.UPLOAD_CHUNK_MB; smaller for slow networks
+            blob.metadata = {"cleanvid-digest": digest, "cleanvid-source": str(original_name)}
+            if os.path.getsize(source) >= Global_Config.COMPOSITE_UPLOAD_THRESHOLD_MB * 1024 * 1024:
+                google_api.composite_upload(source, destination, metadata=blob.metadata)
             else:
                 # Has TQDM progress
                 while True:
@@ -223,7 +218,7 @@ class CleanProfanity:
             if operation is None:
                 # Check for existing operations
                 response_folder = self.speech_api.response_output_folder
-                possible_operations = sorted(list(response_folder.glob(f"{name}*.operation")))
+                possible_operations = response_catalog.get_catalog(response_folder).find_all(name, ".operation")
                 
                 if possible_operations:
                     print(f"\nFound existing operations for {name}:")
@@ -1,5 +1,7 @@
 import re
 import csv
+import bisect
+import functools
 import logging
 import sys
 import os
@@ -11,7 +13,10 @@ current_dir = Path(__file__).resolve().parent
 root_dir = current_dir.parent
 sys.path.append(str(root_dir))
 
+import numpy as np
+
 import utils
+import lexicon
 
 # Setup logging
 if __name__ == "__main__":
@@ -77,238 +82,302 @@ def find_profanity_in_subs(subs, swear_list):
             
     return profane_intervals
 
-import statistics
+# Below this confidence the estimated offset is ignored (subtitles assumed in sync)
+MIN_OFFSET_CONFIDENCE = 0.1
+
+
+def _gaussian_kernel(sigma_bins):
+    radius = max(1, int(3 * sigma_bins))
+    x = np.arange(-radius, radius + 1)
+    kernel = np.exp(-0.5 * (x / max(sigma_bins, 1e-6)) ** 2)
+    return kernel / kernel.sum()
+
+
+def _onset_correlation(word_starts, word_ends, cue_starts, bin_size, max_lag, kernel, pause=0.3):
+    """Cross-correlate binned speech-onset and cue-onset signals for lags in [-max_lag, max_lag] bins.
+
+    A speech onset is a transcribed word that follows a pause; those are the words that line up
+    with subtitle cue starts.
+    """
+    order = np.argsort(word_starts)
+    starts = word_starts[order]
+    ends = word_ends[order]
+    onset_mask = np.concatenate(([True], starts[1:] - ends[:-1] > pause))
+    onsets = starts[onset_mask]
+
+    n_bins = int(max(starts.max(), cue_starts.max()) / bin_size) + 1
+    word_signal = np.bincount(np.clip(onsets / bin_size, 0, None).astype(int), minlength=n_bins)[:n_bins]
+    cue_signal = np.bincount(np.clip(cue_starts / bin_size, 0, None).astype(int), minlength=n_bins)[:n_bins]
+    word_signal = np.convolve(word_signal.astype(float), kernel, mode="same")
+    cue_signal = np.convolve(cue_signal.astype(float), kernel, mode="same")
+
+    # Circular cross-correlation via FFT, zero-padded so lags up to max_lag do not wrap
+    size = 1 << int(np.ceil(np.log2(n_bins + max_lag + 1)))
+    spectrum = np.fft.rfft(cue_signal, size) * np.conj(np.fft.rfft(word_signal, size))
+    full = np.fft.irfft(spectrum, size)
+    lags = np.arange(-max_lag, max_lag + 1)
+    corr = full[lags % size]
+    norm = np.linalg.norm(word_signal) * np.linalg.norm(cue_signal)
+    return corr / norm if norm > 0 else corr
+
+
+def _token_vote_histogram(words, subs, bin_size, max_lag, kernel, max_occurrences=25):
+    """Histogram of (subtitle time - word time) over transcribed words that also appear in a cue.
+
+    Each cue token's onset is interpolated by its position in the line. Only tokens that are rare in
+    the transcription vote, weighted so every token contributes about the same total.
+    """
+    vocab = {}
+    word_tokens = np.array([vocab.setdefault(lexicon.normalize(w['word']), len(vocab)) for w in words])
+    word_times = np.array([w['start'] for w in words], dtype=float)
+    counts = np.bincount(word_tokens, minlength=len(vocab))
+
+    cue_tokens = []
+    cue_times = []
+    for sub in subs:
+        tokens = [vocab.get(t) for t in _subtitle_tokens(sub['text'])]
+        n = len(tokens)
+        for k, token in enumerate(tokens):
+            if token is None or counts[token] > max_occurrences:
+                continue
+            cue_tokens.append(token)
+            # The token's onset, comparable with the word start it is paired with
+            cue_times.append(sub['start'] + k / n * (sub['end'] - sub['start']))
+    if not cue_tokens:
+        return None
+    cue_tokens = np.array(cue_tokens)
+    cue_times = np.array(cue_times)
+
+    # Every (cue token, transcribed word) pair with the same token, built without Python loops
+    order = np.argsort(word_tokens, kind="stable")
+    sorted_tokens = word_tokens[order]
+    sorted_times = word_times[order]
+    lo = np.searchsorted(sorted_tokens, cue_tokens, side="left")
+    hi = np.searchsorted(sorted_tokens, cue_tokens, side="right")
+    n_pairs = hi - lo
+    cue_index = np.repeat(np.arange(len(cue_tokens)), n_pairs)
+    within = np.arange(n_pairs.sum()) - np.repeat(np.cumsum(n_pairs) - n_pairs, n_pairs)
+    diffs = cue_times[cue_index] - sorted_times[lo[cue_index] + within]
+
+    cue_counts = np.bincount(cue_tokens, minlength=len(vocab))
+    weights = 1.0 / (counts[cue_tokens[cue_index]] * cue_counts[cue_tokens[cue_index]])
+    lag_bins = np.round(diffs / bin_size).astype(int) + max_lag
+    valid = (lag_bins >= 0) & (lag_bins <= 2 * max_lag)
+    hist = np.bincount(lag_bins[valid], weights=weights[valid], minlength=2 * max_lag + 1)
+    return np.convolve(hist, kernel, mode="same")
+
+
+def estimate_offset(words, subs, bin_size=0.05, max_offset=60.0, use_tokens=True, smoothing=0.15):
+    """
+    Estimates the global time offset between SRT and Transcription.
+    Offset = SRT_Time - Transcription_Time
+
+    Binned word-onset and cue-onset signals are cross-correlated with an FFT; optionally, votes
+    from tokens shared by the transcription and the subtitle text are added to sharpen the peak.
+
+    Args:
+        words: Transcribed word dicts ('word', 'start', 'end').
+        subs: Subtitle dicts from parse_srt ('start', 'end', 'text').
+        bin_size: Signal resolution in seconds.
+        max_offset: Largest offset (seconds, either direction) that is searched.
+        use_tokens: Add token-match votes to the onset correlation.
+        smoothing: Gaussian smoothing (seconds) applied to the signals to tolerate jitter.
+
+    Returns:
+        tuple: (offset_seconds, confidence) where confidence in [0, 1] measures how far the best
+            peak stands out from the next best candidate.
+    """
+    if not words or not subs:
+        return 0.0, 0.0
+
+    max_lag = int(max_offset / bin_size)
+    kernel = _gaussian_kernel(smoothing / bin_size)
+
+    word_starts = np.array([w['start'] for w in words], dtype=float)
+    word_ends = np.array([w['end'] for w in words], dtype=float)
+    cue_starts = np.array([s['start'] for s in subs], dtype=float)
+
+    score = _onset_correlation(word_starts, word_ends, cue_starts, bin_size, max_lag, kernel)
+    if score.max() > 0:
+        score = score / score.max()
+    if use_tokens:
+        votes = _token_vote_histogram(words, subs, bin_size, max_lag, kernel)
+        if votes is not None and votes.max() > 0:
+            score = score + votes / votes.max()
+
+    peak = int(np.argmax(score))
+    # Sub-bin refinement with a parabola through the peak and its neighbours
+    delta = 0.0
+    if 0 < peak < len(score) - 1:
+        y0, y1, y2 = score[peak - 1:peak + 2]
+        denom = y0 - 2 * y1 + y2
+        if denom != 0:
+            delta = 0.5 * (y0 - y2) / denom
+    offset = (peak - max_lag + delta) * bin_size
+
+    # Confidence: prominence of the peak over the best competitor more than a second away
+    baseline = float(np.median(score))
+    guard = int(1.0 / bin_size)
+    competitors = score.copy()
+    competitors[max(0, peak - guard):peak + guard + 1] = baseline
+    top = score[peak] - baseline
+    confidence = float(np.clip((score[peak] - competitors.max()) / top, 0.0, 1.0)) if top > 0 else 0.0
+    return float(offset), confidence
+
 
 def calculate_offset(words, subs):
     """
     Calculates the time offset between SRT and Transcription.
     Offset = SRT_Time - Transcription_Time
     """
-    # Find potential anchors: distinct words with high confidence (>0.9) and length > 4
-    anchors = []
-    
-    # Create word map for fast lookup? Or just iterate?
-    # Transcription can be large.
-    # Let's filter transcription for good candidates first.
-    trans_candidates = [w for w in words if len(w['word']) > 4 and w.get('confidence', 0) > 0.9]
-    
-    if not trans_candidates:
-        return 0.0
+    offset, _confidence = estimate_offset(words, subs)
+    return offset
 
-    # Limit to a subset to avoid O(N*M)
-    # Pick 20 candidates distributed evenly
-    step = max(1, len(trans_candidates) // 20)
-    selected_trans = trans_candidates[::step]
-    
-    offsets = []
-    
-    for t_word in selected_trans:
-        t_text = re.sub(r"[^\w\s']", '', t_word['word']).lower()
-        t_start = t_word['start']
-        
-        # Search in subs
-        # We need a sub that contains this word roughly near t_start
-        # Search window +/- 5 seconds?
-        for sub in subs:
-            # Quick check on time
-            # Assume offset isn't massive (e.g. < 60s)
-            if abs(sub['start'] - t_start) > 60:
-                continue
-                
-            s_text_clean = re.sub(r"[^\w\s']", '', sub['text']).lower()
-            if t_text in s_text_clean.split():
-                 # Found a match
-                 # Calculate offset
-                 # But subtitle start is for the whole line.
-                 # This is tricky. A line might be "Hello world". "world" starts later than line start.
-                 # But if we assume linear offset, we might just use the line start vs word start?
-                 # Or better: median of diffs might handle the "word position in line" variance?
-                 # "Word" start in transcription is precise.
-                 # "Line" start in SRT is early.
-                 # So SRT_start <= Word_Start (theoretically, if synched).
-                 # Offset = SRT_Start - Word_Start. This will be negative usually (- (position in line)).
-                 # This approach is flawed for "exact" offset.
-                 
-                 # Alternative: If a sub is ONLY one word?
-                 if len(s_text_clean.split()) == 1:
-                     diff = sub['start'] - t_start
-                     offsets.append(diff)
-                 else:
-                     # Use the diff, knowing it includes "position in line" error.
-                     # But if we take median, and lines vary in length, it might be messy.
-                     # User suggested: "finding a bunch of sections that line up really well".
-                     pass
-    
-    # If no single-word lines found, fall back to matching starts of lines?
-    if not offsets:
-         # new strategy: Find words that start lines?
-         # If transcription word is "Hello" and Subtitle starts with "Hello".
-         for sub in subs:
-             if abs(sub['start'] - selected_trans[0]['start']) > 300: # optimization
-                 continue
-                 
-             s_text_clean = re.sub(r"[^\w\s']", '', sub['text']).lower().split()
-             if not s_text_clean: continue
-             
-             first_word = s_text_clean[0]
-             
-             # Find matching word in transcription near this sub start
-             # (This is reverse of above loop)
-             pass
-    
-    # Let's try a simpler approach for now:
-    # Just take median of (Sub_Start - Word_Start) for matches.
-    # It will slighty bias towards "earlier" (subtitle start), which is safer for muting (start mute earlier).
-    # And since we assign FULL subtitle duration to the mute, this bias is acceptable.
-    
-    if not offsets:
-         for t_word in selected_trans:
-            t_text = re.sub(r"[^\w\s']", '', t_word['word']).lower()
-            for sub in subs:
-                if abs(sub['start'] - t_word['start']) > 10: continue
-                s_words = re.sub(r"[^\w\s']", '', sub['text']).lower().split()
-                if t_text in s_words:
-                    offsets.append(sub['start'] - t_word['start'])
-                    break 
-
-    if offsets:
-        return statistics.median(offsets)
-    return 0.0
-
-def inject_subtitles_into_words(csv_path, srt_path, output_path=None):
+class WordIndex:
+    """Transcribed words sorted by start time, with text normalized once.
+
+    Window queries use bisect on the start times; because words can overlap the window start,
+    the lower bound is widened by the longest word duration.
+    """
+
+    def __init__(self, words):
+        self.words = sorted(words, key=lambda x: x['start'])
+        self.starts = [w['start'] for w in self.words]
+        self.texts = [lexicon.normalize(w['word']) for w in self.words]
+        self.max_duration = max((w['end'] - w['start'] for w in self.words), default=0.0)
+
+    def window(self, window_start, window_end):
+        """Indices of words overlapping [window_start, window_end]."""
+        lo = bisect.bisect_left(self.starts, window_start - self.max_duration)
+        hi = bisect.bisect_right(self.starts, window_end)
+        return [i for i in range(lo, hi) if self.words[i]['end'] >= window_start]
+
+
+@functools.lru_cache(maxsize=None)
+def _swear_pattern(swear):
+    return re.compile(rf"\b{re.escape(swear)}\b")
+
+
+def _is_covered(swear, w_text):
+    """Does a transcribed (normalized) word account for a subtitle swear?"""
+    # strict check to avoid 'pass' matching 'ass',
+    # but let longer swears match inside compounds (e.g. 'bullshit' covers 'shit')
+    if w_text == swear:
+        return True
+    if len(swear) > 3 and swear in w_text:
+        return True
+    return _swear_pattern(swear).search(w_text) is not None
+
+
+def _subtitle_tokens(text, compounds=frozenset()):
+    """Normalized tokens of a subtitle line.
+
+    Dialogue dashes ("-Shit!", "- Damn it") are dropped, other hyphenated words are split
+    ("damn-it") unless they are in `compounds` (lexicon words such as "ass-hole"), and the
+    possessive 's is dropped so "hell's" still hits "hell".
+    """
+    tokens = []
+    for token in text.split():
+        token = lexicon.normalize(token).strip("-")
+        parts = [token] if token in compounds else token.split("-")
+        for part in parts:
+            if part.endswith("'s"):
+                part = part[:-2]
+            if part:
+                tokens.append(part)
+    return tokens
+
+
+def inject_subtitles_into_words(csv_path, srt_path, output_path=None, offset=None, words=None):
     """
-    1. Load words from CSV.
+    1. Load words from CSV (unless already loaded, e.g. from the word cache; csv_path still
+       names the output).
     2. Load words from SRT.
-    3. Calculate Offset.
+    3. Calculate Offset (unless given; offset = SRT - Trans).
     4. Find profanity in SRT.
     5. Check if that profanity exists in CSV words near that time (using offset).
     6. If not, insert it (using FULL subtitle duration).
     """
+    swear_lexicon = lexicon.load_lexicon()
     
-    swears = utils.parse_swears()
-    clean_swears = [s.strip().lower() for s in swears if s.strip()]
-    
-    # Load subtitle exceptions — these words should NOT be injected from subtitles
-    subtitle_exceptions = utils.parse_subtitle_exceptions()
+    # Subtitle exceptions — these words should NOT be injected from subtitles
+    subtitle_exceptions = swear_lexicon.exceptions
     
     # Load CSV
-    words = []
-    with open(csv_path, 'r', newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-             words.append({
-                 "word": row["word"],
-                 "start": float(row["start"]),
-                 "end": float(row["end"]),
-                 "confidence": float(row.get("confidence", 0.0))
-             })
+    if words is None:
+        words = []
+        with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                 words.append({
+                     "word": row["word"],
+                     "start": float(row["start"]),
+                     "end": float(row["end"]),
+                     "confidence": float(row.get("confidence", 0.0))
+                 })
              
     # Parse SRT
     subs = parse_srt(srt_path)
     
     # Calculate Offset
-    offset = calculate_offset(words, subs)
-    print(f"Calculated offset (SRT - Trans): {offset:.3f}s")
+    if offset is None:
+        offset, confidence = estimate_offset(words, subs)
+        print(f"Calculated offset (SRT - Trans): {offset:.3f}s (confidence {confidence:.2f})")
+        if confidence < MIN_OFFSET_CONFIDENCE:
+            print("Offset estimate is unreliable, assuming subtitles are in sync.")
+            offset = 0.0
     
-    # Sort words by start time
-    words.sort(key=lambda x: x['start'])
+    # Sorted, pre-normalized index of the transcription
+    index = WordIndex(words)
+    words = index.words
     
     print(f"Checking {len(subs)} subtitle lines against {len(words)} transcribed words.")
 
-    inserted_count = 0
-    unmatched_count = 0
+    inserted = []
+    buffer = 1.0
     
     for sub in subs:
-        sub_text = sub['text']
+        # 1. Identify swears in this subtitle block (one lexicon pass over the line)
+        present_swears = swear_lexicon.find_all(_subtitle_tokens(sub['text'], swear_lexicon.words)) - subtitle_exceptions
+        if not present_swears:
+            continue
+        
         sub_start = sub['start'] # Original SRT time
         sub_end = sub['end']
         
         # Adjusted time for comparison with transcription
         adj_start = sub_start - offset
         adj_end = sub_end - offset
+            
+        # 2. Check coverage in transcription words within Adjusted Sub Time +/- buffer
+        window = index.window(adj_start - buffer, adj_end + buffer)
+        # Words injected for earlier (overlapping or duplicated) cues count as transcribed
+        window_inserted = [w['word'] for w in inserted
+                           if w['end'] >= adj_start - buffer and w['start'] <= adj_end + buffer]
         
-        # 1. Identify swears in this subtitle block
-        present_swears = []
-        clean_sub_text = re.sub(r"[^\w\s']", '', sub_text).lower()
-        
-        for swear in clean_swears:
-            # Skip exception words — these are allowed if they appear in subtitles
-            if swear in subtitle_exceptions:
+        window_text = " ".join(index.texts[i] for i in window)
+        for swear in sorted(present_swears):
+            if any(_is_covered(swear, index.texts[i]) for i in window):
                 continue
-            # Match whole words/phrases
-            if re.search(rf"\b{re.escape(swear)}\b", clean_sub_text):
-                present_swears.append(swear)
-        
-        if not present_swears:
-            continue
+            if any(_is_covered(swear, w) for w in window_inserted):
+                continue
+            if " " in swear and _swear_pattern(swear).search(window_text):
+                continue  # phrase spoken as separate transcribed words
             
-        # 2. Check coverage in transcription
-        # Time window: Adjusted Sub Time +/- buffer
-        buffer = 1.0 
-        window_start = adj_start - buffer
-        window_end = adj_end + buffer
-        
-        # Get transcription words in this window
-        window_words = [w for w in words if w['end'] >= window_start and w['start'] <= window_end]
-        
-        for swear in present_swears:
-            covered = False
-            for w in window_words:
-                w_text = re.sub(r"[^\w\s']", '', w['word']).lower()
-                # strict check to avoid 'pass' matching 'ass'
-                # but allow 'asshole' matching 'ass' if desired? 
-                # Actually, if subtitle has 'ass', we want 'ass' or 'jackass' in transcription.
-                # But NOT 'pass'.
-                if re.search(rf"\b{re.escape(swear)}\b", w_text) or (len(swear) > 3 and swear in w_text):
-                     covered = True
-                     break
-                
-                # Fallback: if they are identical
-                if w_text == swear:
-                    covered = True
-                    break
+            print(f"MISSING PROFANITY: '{swear}' in subtitle '{sub['text']}' at {sub_start}-{sub_end} (Adj: {adj_start:.2f})")
             
-            if not covered:
-                print(f"MISSING PROFANITY: '{swear}' in subtitle '{sub_text}' at {sub_start}-{sub_end} (Adj: {adj_start:.2f})")
-                
-                # INJECT with FULL SUBTITLE DURATION (Original SRT times)
-                # Apply the offset back? No, mute list generation relies on "Word" times being relative to VIDEO.
-                # SRT times are relative to VIDEO (usually). 
-                # Transcription times are relative to VIDEO.
-                # Only if they disagree (offset != 0) do we need to check coverage using offset.
-                # But when we inject, we want the time to match the VIDEO.
-                # If SRT matches Video, use SRT time.
-                # If Transcription matches Video, and SRT is offset, we should probably correct SRT time?
-                # Usually SRT is "True" for text content, but simple offset might handle sync issues.
-                # User says: "finding a bunch of sections that line up really well".
-                # If we assume SRT is correct for the audio it represents:
-                # We should inject at SRT time?
-                # But if offset is -2s (SRT is early), and we inject at SRT time, we mute early.
-                # Correct.
-                # Wait, if `offset = SRT - Trans`. `Trans = SRT - offset`.
-                # If Trans is "True" (aligned to video by Google), then `SRT = Trans + offset`.
-                # If `offset` is non-zero, it means SRT is shifted relative to google output.
-                # If we rely on Google timestamps for existing words, we should rely on SRT time MINUS offset for injected words?
-                # so that they align with the Google timeline (which aligns with video)?
-                # Or does SRT align with video and Google is wrong? 
-                # Usually Google is very accurate to audio. SRT might be from a different release (offset).
-                # So we should Shift Injected Word to match Google's Timeline.
-                # Adjusted Time = SRT_Time - offset.
-                
-                final_start = sub_start - offset
-                final_end = sub_end - offset
-                
-                new_word = {
-                    "word": swear,
-                    "start": final_start,
-                    "end": final_end,
-                    "confidence": 1.0
-                }
-                words.append(new_word)
-                inserted_count += 1
+            # INJECT with FULL SUBTITLE DURATION, shifted onto the transcription timeline.
+            # Google timestamps are accurate to the audio; an SRT from a different release may be
+            # offset (offset = SRT - Trans), so the injected word uses SRT_Time - offset.
+            inserted.append({
+                "word": swear,
+                "start": adj_start,
+                "end": adj_end,
+                "confidence": 1.0
+            })
                 
-    if inserted_count > 0:
-        words.sort(key=lambda x: x['start'])
+    if inserted:
+        words = sorted(words + inserted, key=lambda x: x['start'])
         if output_path is None:
             p = Path(csv_path)
             output_path = p.parent / (p.stem + "_aligned.csv")
@@ -320,7 +389,7 @@ def inject_subtitles_into_words(csv_path, srt_path, output_path=None):
             for w in words:
                 row = {k: w.get(k, "") for k in fieldnames}
                 writer.writerow(row)
-        print(f"Injected {inserted_count} words. Saved to {output_path}")
+        print(f"Injected {len(inserted)} words. Saved to {output_path}")
         return output_path
     else:
         print("No missing profanity found via subtitle alignment.")
@@ -333,14 +402,21 @@ if __name__ == "__main__":
     parser.add_argument("srt", help="Path to subtitle file (e.g. video_name.srt)")
     parser.add_argument("--output", "-o", help="Optional output path for aligned CSV")
     parser.add_argument("--encoding", default="utf-8", help="Encoding for SRT file (default: utf-8)")
+    parser.add_argument("--response", help="Read words from this .response file (via the word cache) instead of the CSV")
     
     args = parser.parse_args()
     
-    if not Path(args.csv).exists():
+    words = None
+    if args.response:
+        import google_api
+        import Global_Config
+        api = google_api.google_speech_api(credential_path=Global_Config.GCS_CREDENTIALS_PATH, api="video")
+        words = api.load_words_from_response_file(args.response)
+    elif not Path(args.csv).exists():
         logger.error(f"CSV file not found: {args.csv}")
         exit(1)
     if not Path(args.srt).exists():
         logger.error(f"SRT file not found: {args.srt}")
         exit(1)
         
-    inject_subtitles_into_words(args.csv, args.srt, output_path=args.output)
+    inject_subtitles_into_words(args.csv, args.srt, output_path=args.output, words=words)
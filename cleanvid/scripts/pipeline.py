@@ -14,7 +14,6 @@ from pathlib import Path
 from dataclasses import dataclass, field
 from typing import Optional, List, Dict, Callable
 from enum import Enum
-import difflib
 from concurrent.futures import ThreadPoolExecutor
 
 # Add root directory to sys.path
@@ -26,6 +25,10 @@ import utils
 import google_api
 import Global_Config
 import utilization
+import voice_activity
+import tracing
+import response_catalog
+import subtitle_match
 
 
 class StepStatus(Enum):
@@ -50,6 +53,7 @@ class PipelineStep:
     opt_in: bool = False  # If True, skipped by default (must explicitly enable)
     output_path: Optional[Path] = None
     error_message: Optional[str] = None
+    video_path: Optional[Path] = None  # Which video this step belongs to (multi-video runs)
 
 
 @dataclass
@@ -62,6 +66,7 @@ class PipelineContext:
     gcs_uri: Optional[str] = None
     operation_path: Optional[Path] = None  # Outstanding transcription operation
     response_path: Optional[Path] = None
+    segment_response_paths: List[Path] = field(default_factory=list)  # Multi-segment transcription, in order
     subtitle_path: Optional[Path] = None
     csv_path: Optional[Path] = None
     mute_list_path: Optional[Path] = None
@@ -77,11 +82,30 @@ class PipelineContext:
     
     # Subtitle merge info
     subtitle_match_confidence: float = 0.0
+    subtitle_offset: float = 0.0  # SRT time - transcription time (seconds)
+    subtitle_offset_confidence: float = 0.0
     merge_coverage_score: float = 0.0
     unmatched_profanities: List[str] = field(default_factory=list)
     
     # Video info (for utilization tracking)
     video_duration_seconds: float = 0.0
+    
+    # Pipe ffmpeg output straight into the GCS upload (Step 2); Step 1 writes nothing locally
+    stream_upload: bool = False
+    
+    # Extraction profile (utils.AUDIO_PROFILES); None uses Global_Config.AUDIO_PROFILE
+    audio_profile: Optional[str] = None
+    
+    # Cut non-speech from the extracted audio before upload (voice_activity); None uses
+    # Global_Config.TRIM_NON_SPEECH. Not available with stream_upload.
+    trim_non_speech: Optional[bool] = None
+    
+    # Step 6 render engine ("filter", "splice" or "pcm"); None uses Global_Config.RENDER_ENGINE
+    render_engine: Optional[str] = None
+    
+    # Executables (a config's ffmpeg_path, see utils.config_tool_paths)
+    ffmpeg_path: str = "ffmpeg"
+    ffprobe_path: str = "ffprobe"
 
 
 class Pipeline:
@@ -100,6 +124,7 @@ class Pipeline:
         self.context = context
         self.steps: List[PipelineStep] = []
         self.speech_api = None
+        self.tracer = tracing.Tracer(context.video_path, Global_Config.TRACE_FOLDER)
         self._init_steps()
         
     def _init_steps(self):
@@ -150,6 +175,8 @@ class Pipeline:
                 execute=self._execute_apply_mute_list,
             ),
         ]
+        for step in self.steps:
+            step.video_path = self.context.video_path
         
     def _get_speech_api(self):
         if not self.speech_api:
@@ -202,7 +229,7 @@ class Pipeline:
         # Get video duration for utilization tracking
         try:
             self.context.video_duration_seconds = utils.get_length(
-                self.context.video_path, "ffprobe"
+                self.context.video_path, self.context.ffprobe_path
             )
         except:
             self.context.video_duration_seconds = 0
@@ -216,49 +243,15 @@ class Pipeline:
         return self._find_api_file(".operation")
     
     def _find_api_file(self, extension: str) -> Optional[Path]:
-        """Find matching file by extension (.response or .operation) in response_folder."""
-        from scripts.regenerate_mute_lists import parse_filename
-        
-        target_stem = self.context.video_path.stem
-        target_parsed = parse_filename(target_stem)
-        
-        p = self.context.response_folder
-        if not p.exists():
+        """Newest matching file by extension (.response or .operation) in response_folder."""
+        if not self.context.response_folder.exists():
             return None
-            
-        import re
-        for f in p.glob(f"*{extension}"):
-            stem = f.stem
-            safe_stem = re.sub(r'_\d{4}-\d{2}-\d{2}.*', '', stem.replace(extension, "").replace("_words", ""))
-            
-            if safe_stem == target_stem:
-                return f
-            if parse_filename(safe_stem) == target_parsed:
-                return f
-        return None
+        catalog = response_catalog.get_catalog(self.context.response_folder)
+        return catalog.find(self.context.video_path.stem, extension)
         
     def _find_subtitle_file(self) -> tuple[Optional[Path], float]:
-        """Find matching subtitle file near video."""
-        v = self.context.video_path
-        
-        # Strict check
-        for ext in [".srt.bak", ".srt"]:
-            check = v.with_suffix(ext)
-            if check.exists():
-                return check, 1.0
-        
-        # Loose check
-        candidates = list(v.parent.glob("*.bak")) + list(v.parent.glob("*.srt"))
-        best_score = 0.0
-        best_cand = None
-        
-        for c in candidates:
-            ratio = difflib.SequenceMatcher(None, v.stem, c.stem).ratio()
-            if ratio > best_score:
-                best_score = ratio
-                best_cand = c
-                
-        return best_cand, best_score
+        """Find matching subtitle file near video (best ranked candidate and its confidence)."""
+        return subtitle_match.best_match(self.context.video_path)
         
     def _find_latest_csv(self, base_path: Path) -> Path:
         """Find the latest version of the CSV file."""
@@ -301,7 +294,7 @@ class Pipeline:
     def _analyze_audio_tracks(self):
         """Check audio tracks for safety."""
         try:
-            ffprobe_json = utils.get_ffprobe_json(self.context.video_path)
+            ffprobe_json = utils.get_ffprobe_json(self.context.video_path, self.context.ffprobe_path)
             streams = ffprobe_json.get("streams", [])
             audio_streams = [s for s in streams if s.get("codec_type") == "audio"]
             
@@ -330,15 +323,51 @@ class Pipeline:
     
     # --- Status Checks ---
     
+    @property
+    def audio_profile(self) -> Optional[str]:
+        return self.context.audio_profile or Global_Config.AUDIO_PROFILE
+    
+    @property
+    def trim_non_speech(self) -> bool:
+        if self.context.trim_non_speech is None:
+            return Global_Config.TRIM_NON_SPEECH
+        return self.context.trim_non_speech
+    
+    def _segment_remaps(self) -> List[Optional[voice_activity.Remap]]:
+        """Remap of each extracted segment (None where it was not trimmed), in segment order."""
+        if self.context.stream_upload or not self.context.audio_path or not self.context.audio_path.exists():
+            return []
+        return [voice_activity.Remap.load(voice_activity.remap_path(seg))
+                for seg in sorted(self.context.audio_path.glob("*.flac"))]
+    
     def _check_audio_exists(self) -> bool:
+        if self.context.stream_upload:
+            return True  # audio is extracted during the upload
         if not self.context.audio_path or not self.context.audio_path.exists():
             return False
         return any(self.context.audio_path.glob("*.flac"))
         
     def _check_uploaded(self) -> bool:
-        # Check if file exists in GCS bucket
-        # For now, we check if response exists (implies upload happened)
-        return self._check_transcribed()  # Simplified
+        if self._check_transcribed():
+            return True  # no need to ask the bucket
+        # Objects are content-addressed, so the expected names are known without uploading
+        uris = self.context.gcs_uri
+        try:
+            if not uris and self.context.stream_upload:
+                uris = [uri for uri, _, _ in utils.stream_segment_uris(self.context.video_path,
+                                                                        ffprobe_path=self.context.ffprobe_path,
+                                                                        profile=self.audio_profile)]
+            if not uris:
+                return False
+            uris = uris if isinstance(uris, list) else [uris]
+            storage_client = google_api.get_storage_client()
+            if not all(google_api.blob_exists(uri, storage_client) for uri in uris):
+                return False
+        except Exception as e:
+            print(f"  Could not check bucket for {self.context.video_path.name}: {e}")
+            return False
+        self.context.gcs_uri = uris[0] if len(uris) == 1 else uris
+        return True
         
     def _check_transcribed(self) -> bool:
         return self.context.response_path and self.context.response_path.exists()
@@ -355,17 +384,51 @@ class Pipeline:
     # --- Execution ---
     
     def _execute_extract_audio(self):
-        print(f"  Extracting audio from {self.context.video_path.name}...")
-        utils.split_audio(
-            self.context.video_path,
-            codec="flac",
-            normalize_audio=False,
-            name=self.context.video_path.stem
-        )
+        if self.context.stream_upload:
+            print("  Streaming mode: audio is extracted during upload (Step 2)")
+            return
+        print(f"  Extracting audio from {self.context.video_path.name} ({self.audio_profile})...")
+        if self.context.audio_path and self.context.audio_path.exists():
+            # Remaps describe the previous extraction's segments
+            for stale in self.context.audio_path.glob("*.remap.json"):
+                stale.unlink()
+        try:
+            utils.split_audio_parallel(
+                self.context.video_path,
+                codec="flac",
+                normalize_audio=False,
+                name=self.context.video_path.stem,
+                ffmpeg_path=self.context.ffmpeg_path,
+                ffprobe_path=self.context.ffprobe_path,
+                profile=self.audio_profile
+            )
+        except ValueError as e:
+            # e.g. unreadable over the network; split_audio retries from a local copy
+            print(f"  Parallel extraction failed ({e}); falling back to single-pass extraction")
+            utils.split_audio(
+                self.context.video_path,
+                codec="flac",
+                normalize_audio=False,
+                name=self.context.video_path.stem,
+                ffmpeg_path=self.context.ffmpeg_path,
+                profile=self.audio_profile
+            )
+        if self.trim_non_speech:
+            print("  Trimming non-speech audio...")
+            voice_activity.trim_segments(sorted(self.context.audio_path.glob("*.flac")))
         # Move from temp to expected location if needed
         
     def _execute_upload(self):
         api = self._get_speech_api()
+        if self.context.stream_upload:
+            print(f"  Streaming audio from {self.context.video_path.name} to GCS...")
+            with tracing.api_wait("stream upload"):
+                uris = api.stream_upload_audio(self.context.video_path, name=self.context.video_path.stem,
+                                               ffmpeg_path=self.context.ffmpeg_path,
+                                               ffprobe_path=self.context.ffprobe_path, profile=self.audio_profile)
+            self.context.gcs_uri = uris[0] if len(uris) == 1 else uris
+            return
+        
         audio_dir = self.context.audio_path
         segments = sorted(audio_dir.glob("*.flac"))
         if not segments:
@@ -374,18 +437,21 @@ class Pipeline:
         if len(segments) == 1:
             # Single segment — no threading needed
             print(f"  Uploading {segments[0].name} to GCS...")
-            uri = api.upload_file(str(segments[0]))
+            with tracing.api_wait("upload"):
+                uri = api.upload_file(str(segments[0]))
             self.context.gcs_uri = uri
             return
         
         # Multiple segments — upload in parallel
         print(f"  Uploading {len(segments)} segments in parallel...")
+        trace = tracing.current()
         
         def upload_one(seg):
             print(f"  Uploading {seg.name} to GCS...")
-            return api.upload_file(str(seg))
+            with tracing.attach(trace):  # upload_file counts the bytes it sends
+                return api.upload_file(str(seg))
         
-        with ThreadPoolExecutor(max_workers=len(segments)) as executor:
+        with tracing.api_wait("upload"), ThreadPoolExecutor(max_workers=len(segments)) as executor:
             gcs_uris = list(executor.map(upload_one, segments))
         
         self.context.gcs_uri = gcs_uris
@@ -399,7 +465,10 @@ class Pipeline:
         3. Neither exists -> submit new transcription (costs credits)
         
         For multiple segments, all operations are submitted first, then polled
-        concurrently. Results are merged into a single combined words CSV.
+        concurrently. Results are merged into a single combined words CSV. Segment files are
+        named "{title}.seg{index:03d}" (response_catalog.segment_stem); segments with a saved
+        response or operation are not resubmitted, so an interrupted multi-segment run resumes
+        where it stopped.
         """
         api = self._get_speech_api()
         name = self.context.video_path.stem
@@ -408,7 +477,8 @@ class Pipeline:
         if self.context.operation_path and self.context.operation_path.exists():
             print(f"  Resuming outstanding operation: {self.context.operation_path.name}")
             operation = api.restore_operation(self.context.operation_path)
-            response = api.get_response(operation=operation, name=name)
+            remaps = self._segment_remaps()
+            response = api.get_response(operation=operation, name=name, remap=remaps[0] if remaps else None)
             # Update context with new response path
             self.context.response_path = self._find_response_file()
             if not self.context.response_path:
@@ -416,38 +486,54 @@ class Pipeline:
             print(f"  Transcription resumed successfully: {self.context.response_path.name}")
             return
         
-        # Scenario 3: New transcription request
-        print(f"  Submitting new transcription request...")
-        
-        # Check utilization limit BEFORE submitting
-        if utilization.is_over_limit():
-            raise RuntimeError(
-                f"Monthly credit limit exceeded! {utilization.get_usage_summary()}"
-            )
-        
+        # Scenario 3: New transcription request (per segment for multi-segment runs)
         # Verify we have audio uploaded (GCS URI)
         if not self.context.gcs_uri:
             raise RuntimeError("No GCS URI found. Upload step may have failed.")
         
         gcs_uri = self.context.gcs_uri
+        # Segments are uploaded (and listed in gcs_uri) in sorted order
+        remaps = self._segment_remaps()
         
         if isinstance(gcs_uri, list) and len(gcs_uri) > 1:
-            # Multiple segments — submit all, then poll all concurrently
-            print(f"  Submitting {len(gcs_uri)} segments in parallel...")
-            operations = []
-            for uri in gcs_uri:
-                seg_name = Path(uri).stem  # Use segment filename to avoid collisions
-                print(f"    Submitting {seg_name}...")
-                op, op_name = api.submit_operation(storage_uri=uri, name=seg_name)
-                operations.append((op, op_name))
+            # Multiple segments. The objects are named by content digest; locally each segment is
+            # "{title}.seg{index}", so an interrupted run picks up its saved responses and operations.
+            seg_names = [response_catalog.segment_stem(name, i) for i in range(len(gcs_uri))]
+            catalog = response_catalog.get_catalog(api.response_output_folder)
+            responses, operations, submit = {}, [], []
+            for uri, seg_name in zip(gcs_uri, seg_names):
+                saved_response = catalog.find(seg_name, ".response")
+                saved_operation = catalog.find(seg_name, ".operation")
+                if saved_response:
+                    print(f"    {seg_name}: using saved response {saved_response.name}")
+                    responses[seg_name] = api.load_response(saved_response)
+                elif saved_operation:
+                    print(f"    {seg_name}: resuming operation {saved_operation.name}")
+                    operations.append((api.restore_operation(saved_operation), seg_name))
+                else:
+                    submit.append((uri, seg_name))
+            
+            if submit:
+                # Check utilization limit BEFORE submitting
+                if utilization.is_over_limit():
+                    raise RuntimeError(
+                        f"Monthly credit limit exceeded! {utilization.get_usage_summary()}"
+                    )
+                print(f"  Submitting {len(submit)} of {len(gcs_uri)} segments in parallel...")
+                for uri, seg_name in submit:
+                    print(f"    Submitting {seg_name}...")
+                    operations.append(api.submit_operation(storage_uri=uri, name=seg_name))
             
-            print(f"  All {len(operations)} operations submitted. Polling concurrently...")
-            results = api.poll_all_operations(operations)
+            seg_remaps = dict(zip(seg_names, remaps))
+            if operations:
+                print(f"  Polling {len(operations)} operations concurrently...")
+                for response, seg_name in api.poll_all_operations(operations, remaps=seg_remaps):
+                    responses[seg_name] = response
             
             # Merge words from all segments into one combined list
             all_words = []
-            for response, seg_name in results:
-                words = api.get_words_from_response(response)
+            for seg_name in seg_names:
+                words = api.get_words_from_response(responses[seg_name], remap=seg_remaps.get(seg_name))
                 all_words.extend(words)
                 # Save per-segment CSV too
                 seg_csv = api.response_output_folder / f"{seg_name}_words.csv"
@@ -462,19 +548,34 @@ class Pipeline:
             api.save_words_to_csv(all_words, combined_csv)
             print(f"  Exported combined words to {combined_csv}")
             
-            # Use the last segment's response file for downstream compatibility
-            self.context.response_path = self._find_response_file()
+            # Later steps read the words of every segment (_load_transcribed_words); response_path
+            # only marks the step as done
+            self.context.segment_response_paths = [catalog.find(seg_name, ".response") for seg_name in seg_names]
+            self.context.response_path = self.context.segment_response_paths[-1]
+            submitted = {seg_name for _, seg_name in submit}
+            billed = [i for i, seg_name in enumerate(seg_names) if seg_name in submitted]
         else:
+            # Check utilization limit BEFORE submitting
+            if utilization.is_over_limit():
+                raise RuntimeError(
+                    f"Monthly credit limit exceeded! {utilization.get_usage_summary()}"
+                )
             # Single segment — use existing process_speech (blocking but simple)
+            print(f"  Submitting new transcription request...")
             uri = gcs_uri[0] if isinstance(gcs_uri, list) else gcs_uri
-            api.process_speech(storage_uri=uri, name=name)
+            api.process_speech(storage_uri=uri, name=name, remap=remaps[0] if remaps else None)
             self.context.response_path = self._find_response_file()
-        
-        # Track utilization ONLY after successful submission
-        if self.context.video_duration_seconds > 0:
+            billed = [0]
+        
+        # Track utilization ONLY for segments submitted in this run; trimmed audio bills only what was kept
+        segment_count = len(gcs_uri) if isinstance(gcs_uri, list) else 1
+        billed_seconds = self.context.video_duration_seconds * len(billed) / segment_count
+        if remaps and all(remaps):
+            billed_seconds = sum(remaps[i].compact_duration for i in billed if i < len(remaps))
+        if billed_seconds > 0:
             utilization.add_usage(
                 self.context.video_path.name,
-                self.context.video_duration_seconds
+                billed_seconds
             )
         
         if not self.context.response_path:
@@ -491,18 +592,30 @@ class Pipeline:
         api = self._get_speech_api()
         if not self.context.response_path:
              raise ValueError("No response file found. Transcribe step may have failed or was skipped.")
-        response_obj = api.load_response(self.context.response_path)
-        words = api.get_words_from_response(response_obj)
+        words = self._load_transcribed_words(api)
         
         # Save base CSV
         base_csv = self.context.response_folder / f"{self.context.video_path.stem}_words_base.csv"
         api.save_words_to_csv(words, base_csv)
         
+        # Estimate global SRT/transcription offset
+        subs = align_subtitles.parse_srt(self.context.subtitle_path)
+        offset, confidence = align_subtitles.estimate_offset(words, subs)
+        self.context.subtitle_offset_confidence = confidence
+        if confidence < align_subtitles.MIN_OFFSET_CONFIDENCE:
+            print(f"  Offset estimate {offset:.3f}s is unreliable (confidence {confidence:.2f}); assuming in sync.")
+            offset = 0.0
+        else:
+            print(f"  Subtitle offset: {offset:.3f}s (confidence {confidence:.2f})")
+        self.context.subtitle_offset = offset
+        
         # Align
         # align_subtitles opens base_csv and writes to aligned_csv
         aligned_csv = align_subtitles.inject_subtitles_into_words(
             str(base_csv),
-            str(self.context.subtitle_path)
+            str(self.context.subtitle_path),
+            offset=offset,
+            words=words
         )
         
         if aligned_csv:
@@ -555,8 +668,7 @@ class Pipeline:
         else:
             if not self.context.response_path:
                 raise ValueError("No response file or CSV found. Cannot generate mute list.")
-            response_obj = api.load_response(self.context.response_path)
-            words = api.get_words_from_response(response_obj)
+            words = self._load_transcribed_words(api)
             
         mute_list, _, mute_details = api.create_mute_list_from_words(words)
         final_mute_list = utils.create_mute_list(mute_list)
@@ -566,6 +678,14 @@ class Pipeline:
         report_path = self.context.video_path.parent / f"{self.context.video_path.stem}_clean_REPORT.txt"
         self._save_mute_report(mute_details, report_path)
         
+    def _load_transcribed_words(self, api) -> List[Dict]:
+        """Words of the whole transcription: every segment's response in a multi-segment run."""
+        paths = self.context.segment_response_paths or [self.context.response_path]
+        words = [w for path in paths for w in api.load_words_from_response_file(path)]
+        if len(paths) > 1:
+            words.sort(key=lambda w: w["start"])
+        return words
+        
     @staticmethod
     def _save_mute_report(mute_details, report_path):
         """Save human-readable mute report with timestamps and censored words."""
@@ -585,7 +705,10 @@ class Pipeline:
         utils.create_clean_video(
             str(self.context.video_path),
             str(self.context.clean_video_path),
-            mute_list_file=self.context.mute_list_path
+            mute_list_file=self.context.mute_list_path,
+            ffmpeg_path=self.context.ffmpeg_path,
+            ffprobe_path=self.context.ffprobe_path,
+            engine=self.context.render_engine
         )
     
     # --- Orchestration ---
@@ -659,43 +782,92 @@ class Pipeline:
             "warnings": [self.context.audio_track_warning] if self.context.audio_track_warning else [],
         }
         
+    def _segments(self) -> List[Path]:
+        if not self.context.audio_path or not self.context.audio_path.exists():
+            return []
+        return sorted(self.context.audio_path.glob("*.flac"))
+    
+    def _step_files(self, number: int):
+        """(files read, callable returning files written) of a step, for tracing."""
+        ctx = self.context
+        words_source = ctx.csv_path if ctx.csv_path and ctx.csv_path.exists() else ctx.response_path
+        return {
+            1: ([ctx.video_path], self._segments),
+            2: ([ctx.video_path] if ctx.stream_upload else self._segments(), lambda: []),
+            3: ([], lambda: [self._find_response_file()]),
+            4: ([ctx.response_path, ctx.subtitle_path], lambda: [ctx.csv_path]),
+            5: ([words_source], lambda: [ctx.mute_list_path]),
+            6: ([ctx.video_path], lambda: [ctx.clean_video_path]),
+        }.get(number, ([], lambda: []))
+        
+    def run_step(self, step: PipelineStep, callback=None) -> bool:
+        """Execute a single step, reporting RUNNING and then DONE/ERROR through the callback.
+
+        The execution is traced (wall/CPU time, bytes, API wait; see tracing).
+        """
+        step.status = StepStatus.RUNNING
+        if callback:
+            callback(step)
+            
+        try:
+            inputs, outputs = self._step_files(step.number)
+            with self.tracer.step(step, inputs, outputs):
+                step.execute()
+            step.status = StepStatus.DONE
+        except Exception as e:
+            step.status = StepStatus.ERROR
+            step.error_message = str(e)
+            print(f"  ERROR in Step {step.number}: {e}")
+            if callback:
+                callback(step)
+            return False
+            
+        if callback:
+            callback(step)
+        return True
+        
+    @staticmethod
+    def skip_remaining(remaining_steps: List[PipelineStep], failed_step: PipelineStep, callback=None):
+        """Mark steps after a failed step as skipped."""
+        for remaining in remaining_steps:
+            remaining.status = StepStatus.SKIPPED
+            remaining.error_message = f"Skipped due to error in Step {failed_step.number}"
+            if callback:
+                callback(remaining)
+        
     def run(self, callback=None):
         """Execute the pipeline."""
         steps_to_run = self.get_steps_to_run()
         
         for idx, step in enumerate(steps_to_run):
-            step.status = StepStatus.RUNNING
-            if callback:
-                callback(step)
-                
-            try:
-                step.execute()
-                step.status = StepStatus.DONE
-            except Exception as e:
-                step.status = StepStatus.ERROR
-                step.error_message = str(e)
-                print(f"  ERROR in Step {step.number}: {e}")
-                if callback:
-                    callback(step)
+            if not self.run_step(step, callback):
                 # Mark remaining steps as skipped due to error
-                for remaining in steps_to_run[idx + 1:]:
-                    remaining.status = StepStatus.SKIPPED
-                    remaining.error_message = f"Skipped due to error in Step {step.number}"
-                    if callback:
-                        callback(remaining)
+                self.skip_remaining(steps_to_run[idx + 1:], step, callback)
                 break
-                
-            if callback:
-                callback(step)
 
 
-def create_pipeline_for_video(video_path: Path, response_folder: Path = None) -> Pipeline:
-    """Factory function to create a pipeline for a video."""
+def create_pipeline_for_video(video_path: Path, response_folder: Path = None, config=None) -> Pipeline:
+    """Factory function to create a pipeline for a video.
+    
+    Args:
+        config: Processed config for this video (utils.process_config). Supplies the ffmpeg/ffprobe
+            paths, the response folder (api_response_root) and a saved operation or response to
+            resume from (load_operation_path / load_response_path).
+    """
+    config = config or {}
+    if response_folder is None and config.get("api_response_root"):
+        response_folder = Path(config["api_response_root"])
     ctx = PipelineContext(
         video_path=video_path,
         response_folder=response_folder or Path("./data/google_api")
     )
+    if config:
+        ctx.ffmpeg_path, ctx.ffprobe_path = utils.config_tool_paths(config)
     pipeline = Pipeline(ctx)
     pipeline.discover_paths()
+    if config.get("load_operation_path"):
+        ctx.operation_path = Path(config["load_operation_path"])
+    if config.get("load_response_path"):
+        ctx.response_path = Path(config["load_response_path"])
     pipeline.detect_status()
     return pipeline
@@ -0,0 +1,206 @@
+"""
+CleanVid Multi-Video Executor
+
+Runs many pipelines at once. Each step type goes to its own bounded pool so that the
+different kinds of work overlap across videos:
+- cpu:    local ffmpeg work (extract audio, merge, mute list, render)
+- upload: I/O-bound upload to Google Cloud Storage
+- cloud:  waiting on the transcription long-running operation
+
+While one film sits in the cloud queue, others can be extracting, uploading or rendering.
+Steps of a single video still run strictly in order. With max_active, only that many videos are
+started ahead of/in transcription at a time, so a long batch prefetches the next few videos
+instead of extracting everything first.
+"""
+
+import os
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add root directory to sys.path
+current_dir = Path(__file__).resolve().parent
+root_dir = current_dir.parent
+sys.path.append(str(root_dir))
+
+import utilization
+from scripts.pipeline import Pipeline, PipelineContext, PipelineStep, StepStatus, create_pipeline_for_video
+
+# Step number -> pool name
+STEP_POOLS = {
+    1: "cpu",     # Extract Audio
+    2: "upload",  # Upload Audio
+    3: "cloud",   # Transcribe
+    4: "cpu",     # Merge Subtitles
+    5: "cpu",     # Generate Mute List
+    6: "cpu",     # Apply Mute List
+}
+
+
+def default_cpu_workers() -> int:
+    """ffmpeg is itself multi-threaded, so run about one job per two cores."""
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+class PipelineExecutor:
+    """Runs the steps of many pipelines concurrently through per-step-type pools."""
+
+    def __init__(self,
+                 pipelines: List[Pipeline],
+                 cpu_workers: Optional[int] = None,
+                 upload_workers: int = 2,
+                 cloud_workers: int = 8,
+                 max_active: Optional[int] = None,
+                 budget: Optional[utilization.TranscriptionBudget] = None):
+        """
+        Args:
+            max_active: Most pipelines started but not yet through transcription (the ones in the
+                cloud plus those extracting/uploading ahead of it). Pipelines start in order as
+                slots free up; ones that do not need transcription start right away. None starts
+                every pipeline at once.
+            budget: Reserve each video's duration against the monthly limit when it is started
+                (held until its transcription ends); videos that would exceed it are not started.
+        """
+        self.pipelines = pipelines
+        self.pool_sizes = {
+            "cpu": cpu_workers or default_cpu_workers(),
+            "upload": upload_workers,
+            "cloud": cloud_workers,
+        }
+        self.max_active = None if max_active is None else max(1, max_active)
+        self.budget = budget
+        self._callback_lock = threading.Lock()
+
+    @classmethod
+    def from_contexts(cls, contexts: List[PipelineContext], **kwargs) -> "PipelineExecutor":
+        """Create pipelines (with path discovery and status detection) for each context."""
+        pipelines = []
+        for ctx in contexts:
+            pipeline = Pipeline(ctx)
+            pipeline.discover_paths()
+            pipeline.detect_status()
+            pipelines.append(pipeline)
+        return cls(pipelines, **kwargs)
+
+    @classmethod
+    def from_videos(cls, video_paths: List[Path], response_folder: Path = None, **kwargs) -> "PipelineExecutor":
+        return cls([create_pipeline_for_video(Path(v), response_folder) for v in video_paths], **kwargs)
+
+    def _serialized(self, callback):
+        """Callbacks arrive from worker threads; serialize them so callers need no locking."""
+        if callback is None:
+            return None
+
+        def wrapper(step: PipelineStep):
+            with self._callback_lock:
+                callback(step)
+        return wrapper
+
+    def run(self, callback=None) -> Dict[Path, bool]:
+        """Run every pipeline to completion.
+
+        Args:
+            callback: Called as callback(step) on every status change, exactly as with
+                Pipeline.run. step.video_path identifies the video.
+
+        Returns:
+            dict: {video_path: True if every scheduled step finished without error}
+        """
+        callback = self._serialized(callback)
+        waiting = deque((p, p.get_steps_to_run()) for p in self.pipelines)
+        results = {p.context.video_path: True for p in self.pipelines}
+
+        pools = {name: ThreadPoolExecutor(max_workers=size, thread_name_prefix=f"cleanvid-{name}")
+                 for name, size in self.pool_sizes.items()}
+        in_flight = {}
+        active = set()  # pipelines holding a max_active slot
+
+        def needs_cloud(steps):
+            return any(STEP_POOLS.get(s.number) == "cloud" for s in steps)
+
+        def start_waiting():
+            for item in list(waiting):
+                if item not in waiting:  # started by a nested call
+                    continue
+                pipeline, steps = item
+                if needs_cloud(steps):
+                    if self.max_active is not None and len(active) >= self.max_active:
+                        continue
+                    waiting.remove(item)
+                    if not self._reserve(pipeline):
+                        refuse(pipeline, steps)
+                        continue
+                    active.add(id(pipeline))
+                else:
+                    waiting.remove(item)
+                advance(pipeline, steps, 0)
+
+        def leave(pipeline):
+            if id(pipeline) in active:
+                active.discard(id(pipeline))
+                if self.budget is not None:
+                    self.budget.release(pipeline.context.video_path.name)
+                start_waiting()
+
+        def fail(pipeline, steps, idx):
+            results[pipeline.context.video_path] = False
+            Pipeline.skip_remaining(steps[idx + 1:], steps[idx], callback)
+            leave(pipeline)
+
+        def refuse(pipeline, steps):
+            # Over the monthly limit: nothing is extracted or uploaded for a video that cannot be transcribed
+            idx = next(i for i, s in enumerate(steps) if STEP_POOLS.get(s.number) == "cloud")
+            steps[idx].status = StepStatus.ERROR
+            steps[idx].error_message = f"Monthly credit limit would be exceeded! {utilization.get_usage_summary()}"
+            if callback:
+                callback(steps[idx])
+            results[pipeline.context.video_path] = False
+            Pipeline.skip_remaining(steps[:idx] + steps[idx + 1:], steps[idx], callback)
+
+        def advance(pipeline, steps, idx):
+            if idx >= len(steps):
+                leave(pipeline)
+                return
+            step = steps[idx]
+            pool = STEP_POOLS.get(step.number, "cpu")
+            future = pools[pool].submit(pipeline.run_step, step, callback)
+            in_flight[future] = (pipeline, steps, idx, pool)
+
+        try:
+            start_waiting()
+
+            while in_flight:
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                for future in done:
+                    pipeline, steps, idx, pool = in_flight.pop(future)
+                    try:
+                        ok = future.result()
+                    except Exception as e:  # run_step catches step errors; this is a callback failure
+                        steps[idx].status = StepStatus.ERROR
+                        steps[idx].error_message = str(e)
+                        ok = False
+                    if pool == "cloud":
+                        leave(pipeline)
+                    if ok:
+                        advance(pipeline, steps, idx + 1)
+                    else:
+                        fail(pipeline, steps, idx)
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+
+        return results
+
+    def _reserve(self, pipeline: Pipeline) -> bool:
+        """Reserve a video's minutes for its transcription (resumed operations were already billed)."""
+        ctx = pipeline.context
+        if self.budget is None or (ctx.operation_path and ctx.operation_path.exists()):
+            return True
+        return self.budget.reserve(ctx.video_path.name, ctx.video_duration_seconds or 0)
+
+    def get_state(self) -> Dict[Path, Dict[int, StepStatus]]:
+        """Current per-video step status: {video_path: {step_number: status}}."""
+        return {p.context.video_path: {s.number: s.status for s in p.steps} for p in self.pipelines}
@@ -2,9 +2,14 @@ import sys
 import os
 from pathlib import Path
 import argparse
+import contextlib
 import glob
+import io
+import json
 import re
-import difflib
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
 
 # Add root directory to sys.path
 current_dir = Path(__file__).resolve().parent
@@ -14,183 +19,224 @@ sys.path.append(str(root_dir))
 import utils
 import google_api
 import Global_Config
+import video_index
+import subtitle_match
 from scripts import align_subtitles
-
-def parse_filename(name):
-    """
-    Extracts (title_slug, season, episode) from filename.
-    Returns (cleaned_title, s, e) or (cleaned_title, None, None).
-    """
-    # Normalize: lower, replace dots/underscores with spaces
-    name = name.lower()
-    
-    # Check for SxxExx pattern
-    match = re.search(r'(.+?)[ ._-]+s(\d+)[ ._-]*e(\d+)', name)
-    if match:
-        title = match.group(1)
-        s = int(match.group(2))
-        e = int(match.group(3))
-        # Clean title
-        title = re.sub(r'[^\w]', '', title)
-        return (title, s, e)
-    
-    # Fallback: just clean stem
-    # Remove year if present (e.g. 1999)
-    # Be careful not to remove "2001" from "2001 A Space Odyssey" if it's the title?
-    # Usually matches are safe if we strip parens and years.
-    clean = re.sub(r'[^\w]', '', name)
-    return (clean, None, None)
+from utils import parse_filename  # re-exported; used to live here
 
 def build_video_index(root_paths):
     """
-    Scans root paths for video files and returns a dict: {key: full_path}
+    Returns a dict of the videos under root_paths: {key: full_path}
     Keys can be:
       - (title, s, e) tuple
       - simple_stem string
+    The persistent index (video_index) is refreshed first; unchanged folders are not re-listed.
     """
-    video_extensions = {".mp4", ".mkv", ".avi", ".m4v", ".mov"}
-    index = {}
     print("Building video index...")
-    for root in root_paths:
-        p = Path(root)
-        if not p.exists():
-            print(f"Warning: path {root} does not exist")
-            continue
-            
-        for f in p.rglob("*"):
-            if f.is_file() and f.suffix.lower() in video_extensions:
-                # 1. Store by exact stem (backup)
-                index[f.stem] = f
-                
-                # 2. Store by parsed info
-                parsed = parse_filename(f.stem)
-                if parsed not in index:
-                    index[parsed] = f
-                else:
-                    # Duplicate handling?
-                    # Verify if duplicate is same file?
-                    pass
-                    
-    print(f"Indexed {len(index)} keys.")
-    return index
-
-def process_responses(response_folder, video_index):
+    index = video_index.VideoIndex()
+    index.refresh(root_paths)
+    keys = index.as_dict(root_paths)
+    print(f"Indexed {len(keys)} keys.")
+    return keys
+
+STATE_FILE_NAME = "regenerate_state.json"
+
+
+def match_video(response_path, video_index):
+    """Video for a response file ("Video.Name_2023-01-01 ...response"), or None."""
+    # Clean stem from timestamp
+    safe_stem = re.sub(r'_\d{4}-\d{2}-\d{2}.*', '', Path(response_path).stem)
+
+    # 1. Try exact stem match in index (if index has simple string keys)
+    if safe_stem in video_index:
+        return video_index[safe_stem]
+    # 2. Try parsed match
+    return video_index.get(parse_filename(safe_stem))
+
+
+def find_srt(video_path):
+    """Subtitle next to a video: exact name (.srt.bak, .srt) first, then the most similar name."""
+    srt_path, _ = subtitle_match.best_match(video_path, min_confidence=0.5)
+    return srt_path
+
+
+def input_hashes(response_path, srt_path):
+    """Digests of everything a regenerated mute list depends on."""
+    def digest(path):
+        return utils.file_digest(path, full=True) if path and Path(path).exists() else None
+
+    return {
+        "response": digest(response_path),
+        "srt": digest(srt_path),
+        "swears": digest(utils.ROOT / "swears.txt"),
+        "subtitle_exceptions": digest(utils.ROOT / "subtitle_exceptions.txt"),
+    }
+
+
+def load_state(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state, path):
+    tmp = Path(path).with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, path)
+
+
+_speech_api = None
+
+
+def _get_speech_api():
+    # One per (worker) process
+    global _speech_api
+    if _speech_api is None:
+        _speech_api = google_api.google_speech_api(credential_path=Global_Config.GCS_CREDENTIALS_PATH)
+    return _speech_api
+
+
+def regenerate_title(response_path, video_path, srt_path, response_folder):
+    """Regenerate one title's mute list: response -> CSV -> (subtitle alignment) -> mute list.
+
+    Runs in a worker process; everything it prints is captured and returned with the result so
+    titles never interleave in the output.
+
+    Returns:
+        dict: response, video, status ("regenerated", "empty" or "failed"), mutes, error, log.
+    """
+    result = {"response": str(response_path), "video": str(video_path), "status": "failed",
+              "mutes": 0, "error": None}
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        try:
+            print(f"\nProcessing: {video_path.name}")
+            speech_api = _get_speech_api()
+            safe_stem = re.sub(r'_\d{4}-\d{2}-\d{2}.*', '', Path(response_path).stem)
+
+            words = speech_api.load_words_from_response_file(response_path)
+            if not words:
+                print("No words extracted.")
+                result["status"] = "empty"
+            else:
+                # Save base CSV to RESPONSE FOLDER (standardize location)
+                csv_path = Path(response_folder) / (safe_stem + "_words.csv")
+                speech_api.save_words_to_csv(words, csv_path)
+
+                aligned_csv = None
+                if srt_path:
+                    print(f"Found SRT: {srt_path.name}")
+                    aligned_csv = align_subtitles.inject_subtitles_into_words(str(csv_path), str(srt_path), words=words)
+
+                if aligned_csv:
+                    # Reload words from aligned CSV for mute list generation
+                    words = speech_api.load_words_from_csv(aligned_csv)
+
+                # Generate Mute List
+                print("Generating Mute List...")
+                mute_list, transcript, _ = speech_api.create_mute_list_from_words(words)
+
+                # Save Mute List
+                final_mute_list = utils.create_mute_list(mute_list)
+                mute_list_path = video_path.parent / (video_path.stem + "_clean_MUTE.txt")
+                utils.format_mute_list(final_mute_list, mute_list_path)
+                print(f"Saved: {mute_list_path}")
+                result.update(status="regenerated", mutes=len(mute_list))
+        except Exception as e:
+            result["error"] = str(e)
+            traceback.print_exc(file=log)
+    result["log"] = log.getvalue()
+    return result
+
+
+def process_responses(response_folder, video_index, workers=1, changed_only=False):
     """
     Iterates response files, finds matching video, checks for SRT, aligns, regenerates mute list.
+
+    Titles are independent, so with workers > 1 they are regenerated in a process pool. Each
+    title's output is printed as one block, in response order, followed by a summary.
+
+    Args:
+        response_folder: Folder with the .response files.
+        video_index: {stem or parse_filename key: video path} (see build_video_index).
+        workers: Worker processes (1 = in this process).
+        changed_only: Skip titles whose response, SRT, swears.txt and subtitle_exceptions.txt
+            are unchanged since the last successful regeneration (STATE_FILE_NAME).
     """
     p = Path(response_folder)
-    
-    # We prioritize response files (raw API output)
-    files = list(p.glob("*.response"))
-    # Also check pickle if no response found? 
-    # For now iterate responses as primary source.
-    
-    credential_path = Global_Config.GCS_CREDENTIALS_PATH
-    speech_api = google_api.google_speech_api(credential_path=credential_path)
-    
-    for f in files:
-        stem = f.stem
-        # Clean stem from timestamp
-        # e.g. "Video.Name_2023-01-01..."
-        safe_stem = re.sub(r'_\d{4}-\d{2}-\d{2}.*', '', stem)
-        
-        # Try to find video
-        video_path = None
-        
-        # 1. Try exact stem match in index (if index has simple string keys)
-        if safe_stem in video_index:
-            video_path = video_index[safe_stem]
-            
-        # 2. Try parsed match
-        if not video_path:
-            parsed = parse_filename(safe_stem)
-            if parsed in video_index:
-                video_path = video_index[parsed]
-                
+    state_path = p / STATE_FILE_NAME
+    state = load_state(state_path)
+
+    # One job per title: the newest response wins when a title was transcribed more than once
+    jobs = {}
+    unmatched = 0
+    for f in sorted(p.glob("*.response"), key=lambda f: f.stat().st_mtime):
+        video_path = match_video(f, video_index)
         if not video_path:
-            # print(f"Skipping {f.name}: Video not found in index.")
-            # Be less noisy?
+            unmatched += 1
             continue
+        jobs[video_path] = f
 
-        print(f"\nProcessing: {video_path.name}")
-            
-        # Check for SRT
-        srt_path = None
-        # Logic to find SRT near video
-        # Priority: .srt.bak, .srt
-        # Logic: exact match or "contains stem" match?
-        
-        # Strict check first
-        for ext in [".srt.bak", ".srt"]:
-            check = video_path.with_suffix(ext)
-            if check.exists():
-                srt_path = check
-                break
-                
-        # Loose check in folder
-        if not srt_path:
-            # e.g. "Video.Name.1.en.bak"
-            # Find files starting with relevant part of stem?
-            # Or just any .srt/.bak in folder? 
-            # If multiple, careful.
-            candidates = list(video_path.parent.glob("*.bak")) + list(video_path.parent.glob("*.srt"))
-            # Filter by stem overlap?
-            # If 'The Right Stuff' is in filename?
-            
-            best_score = 0
-            best_cand = None
-            
-            for c in candidates:
-                # simple similarity
-                ratio = difflib.SequenceMatcher(None, video_path.stem, c.stem).ratio()
-                if ratio > 0.5 and ratio > best_score:
-                    best_score = ratio
-                    best_cand = c
-            
-            if best_cand:
-                srt_path = best_cand
-        
-        words = []
-        try:
-            response_obj = speech_api.load_response(f)
-            words = speech_api.get_words_from_response(response_obj)
-        except Exception as e:
-            print(f"Failed to load words from {f}: {e}")
+    tasks = []
+    unchanged = 0
+    for video_path, response_path in jobs.items():
+        srt_path = find_srt(video_path)
+        hashes = input_hashes(response_path, srt_path)
+        mute_list_path = video_path.parent / (video_path.stem + "_clean_MUTE.txt")
+        if changed_only and state.get(str(video_path), {}).get("inputs") == hashes and mute_list_path.exists():
+            unchanged += 1
             continue
+        tasks.append((response_path, video_path, srt_path, hashes))
 
-        if not words:
-            print("No words extracted.")
-            continue
+    print(f"{len(tasks)} titles to regenerate ({unchanged} unchanged, {unmatched} responses without a video)")
+    counts = {"regenerated": 0, "empty": 0, "failed": 0}
+    started = time.monotonic()
+
+    def record(task, result):
+        print(result["log"], end="")
+        counts[result["status"]] += 1
+        if result["status"] == "failed":
+            print(f"FAILED: {task[1].name}: {result['error']}")
+        else:
+            state[str(task[1])] = {"response": str(task[0]), "inputs": task[3]}
+
+    try:
+        if workers <= 1:
+            for task in tasks:
+                record(task, regenerate_title(task[0], task[1], task[2], p))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(regenerate_title, task[0], task[1], task[2], p) for task in tasks]
+                # Print in submission order as soon as each result (and all before it) is ready
+                for task, future in zip(tasks, futures):
+                    try:
+                        result = future.result()
+                    except Exception as e:  # worker crashed
+                        result = {"status": "failed", "error": str(e), "log": ""}
+                    record(task, result)
+    finally:
+        save_state(state, state_path)
+
+    print(f"\nSummary: {counts['regenerated']} regenerated, {counts['empty']} without words, "
+          f"{counts['failed']} failed, {unchanged} unchanged, {unmatched} unmatched "
+          f"in {time.monotonic() - started:.1f}s")
+    return counts
 
-        # Save base CSV to RESPONSE FOLDER (standardize location)
-        csv_path = p / (safe_stem + "_words.csv")
-        speech_api.save_words_to_csv(words, csv_path)
-            
-        aligned_csv = None
-        if srt_path:
-            print(f"Found SRT: {srt_path.name}")
-            aligned_csv = align_subtitles.inject_subtitles_into_words(str(csv_path), str(srt_path))
-        
-        if aligned_csv:
-             # Reload words from aligned CSV for mute list generation
-             words = speech_api.load_words_from_csv(aligned_csv)
-        
-        # Generate Mute List
-        print("Generating Mute List...")
-        mute_list, transcript, _ = speech_api.create_mute_list_from_words(words)
-        
-        # Save Mute List
-        final_mute_list = utils.create_mute_list(mute_list)
-        mute_list_path = video_path.parent / (video_path.stem + "_clean_MUTE.txt")
-        utils.format_mute_list(final_mute_list, mute_list_path)
-        print(f"Saved: {mute_list_path}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Batch regenerate mute lists using local SRTs.")
     parser.add_argument("--roots", nargs="+", help="Root directories to scan for videos", required=True)
     parser.add_argument("--responses", help="Folder containing response files", default="./data/google_api")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: one per core; 1 = sequential)")
+    parser.add_argument("--changed_only", action="store_true",
+                        help="Only titles whose response, SRT, swears.txt or subtitle_exceptions.txt changed "
+                             "since the last run")
     
     args = parser.parse_args()
     
     index = build_video_index(args.roots)
-    process_responses(args.responses, index)
+    process_responses(args.responses, index, workers=args.workers, changed_only=args.changed_only)
@@ -13,7 +13,9 @@ current_dir = Path(__file__).resolve().parent
 root_dir = current_dir.parent
 sys.path.append(str(root_dir))
 
+import utils
 from scripts.pipeline import create_pipeline_for_video, StepStatus
+from scripts.pipeline_executor import PipelineExecutor
 
 
 def main():
@@ -36,11 +38,14 @@ Examples:
   
   # Run only up to Step 5 (generate mute list, don't create video)
   python run_pipeline.py --video_file "movie.mp4" --stop_after 5
+  
+  # Run several videos concurrently (steps overlap across videos)
+  python run_pipeline.py --video_file "a.mp4" "b.mkv" "c.mp4" --cloud_workers 8
 """
     )
     
     # Input
-    parser.add_argument("--video_file", required=True, help="Path to video file")
+    parser.add_argument("--video_file", required=True, nargs="+", help="Path to video file(s)")
     parser.add_argument("--responses", default="./data/google_api", help="Response folder")
     
     # Overrides
@@ -60,18 +65,92 @@ Examples:
     # Mode
     parser.add_argument("--analyze", action="store_true",
                         help="Analyze only, don't execute")
+    parser.add_argument("--stream_upload", action="store_true",
+                        help="Pipe extracted audio straight into the GCS upload (no local temp files)")
+    parser.add_argument("--audio_profile", choices=list(utils.AUDIO_PROFILES),
+                        help="Audio extracted for transcription (default: Global_Config.AUDIO_PROFILE)")
+    parser.add_argument("--trim_silence", action="store_true",
+                        help="Cut music and silence from the extracted audio before upload (fewer billed minutes)")
+    parser.add_argument("--render_engine", choices=["filter", "splice", "pcm"],
+                        help="Step 6: re-encode the whole audio track through a filter (filter), only around "
+                             "mutes (splice), or mute decoded PCM in process with fades (pcm)")
+    
+    # Concurrency (multiple videos)
+    parser.add_argument("--cpu_workers", type=int, default=None,
+                        help="Concurrent ffmpeg jobs (extract/render), default: half the cores")
+    parser.add_argument("--upload_workers", type=int, default=2, help="Concurrent uploads")
+    parser.add_argument("--cloud_workers", type=int, default=8, help="Concurrent transcriptions awaited")
     
     args = parser.parse_args()
     
-    # Create pipeline
-    video_path = Path(args.video_file)
-    if not video_path.exists():
-        print(f"Error: Video file not found: {video_path}")
+    video_paths = [Path(v) for v in args.video_file]
+    for video_path in video_paths:
+        if not video_path.exists():
+            print(f"Error: Video file not found: {video_path}")
+            sys.exit(1)
+    if len(video_paths) > 1 and (args.subtitle_file or args.response_file):
+        print("Error: --subtitle_file/--response_file can only be used with a single video")
         sys.exit(1)
         
-    print(f"Creating pipeline for: {video_path.name}")
-    pipeline = create_pipeline_for_video(video_path, Path(args.responses))
+    pipelines = []
+    for video_path in video_paths:
+        print(f"Creating pipeline for: {video_path.name}")
+        pipeline = create_pipeline_for_video(video_path, Path(args.responses))
+        configure_pipeline(pipeline, args)
+        pipelines.append(pipeline)
+        
+    for pipeline in pipelines:
+        print_analysis(pipeline)
+        
+    if args.analyze:
+        print("\n[Analyze mode - no execution]")
+        return
+        
+    # Confirm and run
+    print()
+    response = input("Proceed? [y/N]: ")
+    if response.lower() != 'y':
+        print("Aborted.")
+        return
+        
+    print("\n=== Running Pipeline ===")
     
+    def callback(step):
+        prefix = f"[{step.video_path.name}] " if len(pipelines) > 1 else ""
+        if step.status == StepStatus.RUNNING:
+            print(f"  {prefix}⟳ Step {step.number}: {step.name}...")
+        elif step.status == StepStatus.DONE:
+            print(f"  {prefix}✓ Step {step.number}: Done")
+        elif step.status == StepStatus.ERROR:
+            print(f"  {prefix}✗ Step {step.number}: ERROR - {step.error_message}")
+            
+    if len(pipelines) == 1:
+        pipelines[0].run(callback=callback)
+    else:
+        executor = PipelineExecutor(pipelines,
+                                    cpu_workers=args.cpu_workers,
+                                    upload_workers=args.upload_workers,
+                                    cloud_workers=args.cloud_workers)
+        results = executor.run(callback=callback)
+        print("\n=== Summary ===")
+        for video_path, ok in results.items():
+            print(f"  {'✓' if ok else '✗'} {video_path.name}")
+    
+    print("\n=== Complete ===")
+
+
+def configure_pipeline(pipeline, args):
+    """Apply command-line overrides and step control to a pipeline."""
+    if args.audio_profile:
+        pipeline.context.audio_profile = args.audio_profile
+    if args.trim_silence:
+        pipeline.context.trim_non_speech = True
+    if args.render_engine:
+        pipeline.context.render_engine = args.render_engine
+    if args.stream_upload:
+        pipeline.context.stream_upload = True
+        pipeline.detect_status()
+        
     # Apply overrides
     if args.subtitle_file:
         pipeline.context.subtitle_path = Path(args.subtitle_file)
@@ -91,9 +170,12 @@ Examples:
     # Apply stop
     if args.stop_after:
         pipeline.apply_stop_after(args.stop_after)
-    
-    # Show summary
+
+
+def print_analysis(pipeline):
+    """Show step status and what will execute for one pipeline."""
     summary = pipeline.get_summary()
+    video_path = pipeline.context.video_path
     
     print("\n=== Pipeline Analysis ===")
     print(f"Video: {video_path.name}")
@@ -116,31 +198,6 @@ Examples:
             print(f"  → Step {num}: {name}")
     else:
         print("Nothing to execute (all done or skipped).")
-        
-    if args.analyze:
-        print("\n[Analyze mode - no execution]")
-        return
-        
-    # Confirm and run
-    print()
-    response = input("Proceed? [y/N]: ")
-    if response.lower() != 'y':
-        print("Aborted.")
-        return
-        
-    print("\n=== Running Pipeline ===")
-    
-    def callback(step):
-        if step.status == StepStatus.RUNNING:
-            print(f"  ⟳ Step {step.number}: {step.name}...")
-        elif step.status == StepStatus.DONE:
-            print(f"  ✓ Step {step.number}: Done")
-        elif step.status == StepStatus.ERROR:
-            print(f"  ✗ Step {step.number}: ERROR - {step.error_message}")
-            
-    pipeline.run(callback=callback)
-    
-    print("\n=== Complete ===")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,193 @@
+"""
+Subtitle discovery for a video: ranks the .srt/.bak files in the video's folder.
+
+Scoring every subtitle in a season folder with difflib against the video stem is slow when the
+folder holds hundreds of them, and mostly wasted: a subtitle for another episode or another
+year's film can be ruled out from its name alone. Names are normalized first:
+
+- lower case, split on anything that is not a letter or digit
+- trailing language/track tags removed ("Movie.en.srt", "Movie.2.eng.forced.srt")
+- the episode key (S03E24, 3x24) and the year pulled out
+
+Candidates with a different episode key or year are dropped; the rest are scored with
+SequenceMatcher on the normalized names, using quick_ratio as an upper bound so only candidates
+that can still make the top ranks get a full ratio. A matching episode key is strong evidence, so
+those candidates score at least EPISODE_MATCH_CONFIDENCE.
+
+Listings and results are cached per directory and dropped when the directory's mtime changes.
+A directory modified within the last _RACY_SECONDS is listed again anyway, since a file added in
+the same mtime tick as the cached listing (2 s on FAT/SMB shares) does not change the mtime.
+
+    subtitle_match.rank(video_path)        # [(path, confidence), ...] best first
+    subtitle_match.best_match(video_path)  # (path, confidence) or (None, 0.0)
+"""
+
+import difflib
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SUBTITLE_EXTENSIONS = (".srt", ".bak")
+
+# Checked first, in this order, with confidence 1.0 (".srt.bak" is the original before a merge)
+EXACT_SUFFIXES = (".srt.bak", ".srt")
+
+# Directories modified this recently are re-listed (see response_catalog)
+_RACY_SECONDS = 2.0
+
+LANGUAGE_TAGS = {
+    "en", "eng", "english", "es", "spa", "spanish", "fr", "fre", "fra", "french", "de", "ger", "deu",
+    "german", "it", "ita", "pt", "por", "nl", "dut", "sv", "swe", "da", "dan", "no", "nor", "fi", "fin",
+    "forced", "sdh", "hi", "cc", "full", "default",
+}
+
+EPISODE_MATCH_CONFIDENCE = 0.75
+
+_EPISODE = re.compile(r'(?:^| )(?:s(\d{1,2}) ?e(\d{1,3})|(\d{1,2})x(\d{2,3}))(?: |$)')
+_YEAR = re.compile(r'(?:^| )((?:19|20)\d{2})(?: |$)')
+
+
+class SubtitleName:
+    """Normalized form of a video or subtitle name."""
+
+    __slots__ = ("text", "episode", "year")
+
+    def __init__(self, name):
+        tokens = re.split(r'[^a-z0-9]+', name.lower())
+        tokens = [t for t in tokens if t]
+        saw_tag = False
+        while tokens:
+            tail = tokens[-1]
+            if tail in LANGUAGE_TAGS:
+                saw_tag = True
+            elif not (tail.isdigit() and len(tail) <= 2 and (saw_tag or (len(tokens) > 1 and tokens[-2] in LANGUAGE_TAGS))):
+                break
+            tokens.pop()
+        self.text = " ".join(tokens)
+        match = _EPISODE.search(self.text)
+        self.episode = None
+        if match:
+            season, episode = (match.group(1), match.group(2)) if match.group(1) else (match.group(3), match.group(4))
+            self.episode = (int(season), int(episode))
+        match = _YEAR.search(self.text)
+        self.year = match.group(1) if match else None
+
+    def excludes(self, other: "SubtitleName") -> bool:
+        """True if the names cannot refer to the same video (different episode or year)."""
+        if self.episode and other.episode and self.episode != other.episode:
+            return True
+        return bool(self.year and other.year and self.year != other.year)
+
+
+def _subtitle_stem(name) -> str:
+    """'Movie.en.srt.bak' -> 'Movie.en'"""
+    for ext in (".bak", ".srt"):
+        if name.lower().endswith(ext):
+            name = name[:-len(ext)]
+    return name
+
+
+class _Snapshot:
+    def __init__(self, mtime_ns, candidates):
+        self.mtime_ns = mtime_ns
+        self.candidates: List[Tuple[Path, SubtitleName]] = candidates
+        self.results: Dict[Tuple[str, int], List[Tuple[Path, float]]] = {}
+
+
+_snapshots: Dict[str, _Snapshot] = {}
+_lock = threading.Lock()
+
+
+def _snapshot(directory: Path) -> Optional[_Snapshot]:
+    key = str(directory)
+    try:
+        mtime_ns = os.stat(key).st_mtime_ns
+    except OSError:
+        return None
+    with _lock:
+        snapshot = _snapshots.get(key)
+        if snapshot is not None and snapshot.mtime_ns == mtime_ns and time.time() - mtime_ns / 1e9 >= _RACY_SECONDS:
+            return snapshot
+    candidates = []
+    try:
+        with os.scandir(key) as entries:
+            for entry in entries:
+                if os.path.splitext(entry.name)[1].lower() in SUBTITLE_EXTENSIONS and entry.is_file():
+                    candidates.append((Path(entry.path), SubtitleName(_subtitle_stem(entry.name))))
+    except OSError:
+        return None
+    candidates.sort(key=lambda c: c[0])
+    with _lock:
+        snapshot = _snapshots.get(key)
+        if snapshot is not None and snapshot.mtime_ns == mtime_ns and \
+                [c[0] for c in snapshot.candidates] == [c[0] for c in candidates]:
+            return snapshot  # same listing: keep the cached results
+        snapshot = _Snapshot(mtime_ns, candidates)
+        _snapshots[key] = snapshot
+    return snapshot
+
+
+def rank(video_path, limit=5) -> List[Tuple[Path, float]]:
+    """Ranked subtitle candidates for a video.
+
+    Args:
+        video_path: The video.
+        limit: Number of candidates to return.
+
+    Returns:
+        list: [(subtitle path, confidence 0-1)], best first.
+    """
+    video_path = Path(video_path)
+    snapshot = _snapshot(video_path.parent)
+    if snapshot is None:
+        return []
+    cache_key = (video_path.stem, limit)
+    cached = snapshot.results.get(cache_key)
+    if cached is not None:
+        return cached
+
+    ranked = []
+    listed = {os.path.normcase(str(c[0])): c[0] for c in snapshot.candidates}
+    for ext in EXACT_SUFFIXES:
+        path = listed.get(os.path.normcase(str(video_path.with_suffix(ext))))
+        if path is not None:
+            ranked.append((path, 1.0))
+    exact = {path for path, _ in ranked}
+
+    target = SubtitleName(video_path.stem)
+    matcher = difflib.SequenceMatcher(autojunk=False)
+    matcher.set_seq2(target.text)
+    bounded = []
+    for path, name in snapshot.candidates:
+        if path in exact or target.excludes(name):
+            continue
+        matcher.set_seq1(name.text)
+        floor = EPISODE_MATCH_CONFIDENCE if target.episode and target.episode == name.episode else 0.0
+        bound = matcher.quick_ratio()
+        bounded.append((floor + (1 - floor) * bound, floor, path, name))
+    bounded.sort(key=lambda b: (-b[0], b[2]))
+
+    scored = []
+    for bound, floor, path, name in bounded:
+        if len(scored) >= limit and bound <= scored[limit - 1][1]:
+            break
+        matcher.set_seq1(name.text)
+        ratio = matcher.ratio()
+        if floor:
+            ratio = floor + (1 - floor) * ratio
+        scored.append((path, ratio))
+        scored.sort(key=lambda s: (-s[1], s[0]))
+    ranked = (ranked + scored)[:limit]
+    snapshot.results[cache_key] = ranked
+    return ranked
+
+
+def best_match(video_path, min_confidence=0.0) -> Tuple[Optional[Path], float]:
+    """Best subtitle for a video and its confidence, or (None, 0.0) if none reaches min_confidence."""
+    ranked = rank(video_path, limit=1)
+    if ranked and ranked[0][1] > min_confidence:
+        return ranked[0]
+    return None, 0.0
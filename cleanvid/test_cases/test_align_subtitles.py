@@ -0,0 +1,70 @@
+""" Subtitle offset estimation on generated transcripts and profanity injection from subtitles
+"""
+import csv
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from scripts import align_subtitles
+
+
+def _transcript(offset, cues=300, seed=3):
+    """Subtitle cues and the words a transcription would return for them, `offset` seconds earlier
+    (offset = subtitle time - transcription time). Words are spread evenly over their cue."""
+    rng = random.Random(seed)
+    vocabulary = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 9)))
+                  for _ in range(400)]
+    subs, words = [], []
+    t = 5.0
+    for _ in range(cues):
+        line = [rng.choice(vocabulary) for _ in range(rng.randint(3, 8))]
+        duration = 0.35 * len(line)
+        subs.append({"start": t, "end": t + duration, "text": " ".join(line)})
+        step = duration / len(line)
+        for k, word in enumerate(line):
+            start = t + k * step - offset
+            words.append({"word": word, "start": start, "end": start + 0.8 * step})
+        t += duration + rng.uniform(0.5, 3.0)
+    return words, subs
+
+
+@pytest.mark.parametrize("use_tokens", [False, True])
+@pytest.mark.parametrize("true_offset", [0.0, 3.4, -7.25])
+def test_estimate_offset_is_unbiased(true_offset, use_tokens):
+    # Token votes pair cue token onsets with word starts; aligned input must give 0, not a bias
+    words, subs = _transcript(true_offset)
+    offset, confidence = align_subtitles.estimate_offset(words, subs, use_tokens=use_tokens)
+    assert offset == pytest.approx(true_offset, abs=0.02)
+    assert confidence > 0.5
+
+
+def _inject(tmp_path, srt, words=()):
+    (tmp_path / "movie.srt").write_text(srt)
+    output = align_subtitles.inject_subtitles_into_words(tmp_path / "movie_words.csv", tmp_path / "movie.srt",
+                                                         offset=0.0, words=list(words))
+    if output is None:
+        return []
+    with open(output, newline="", encoding="utf-8") as f:
+        return [(row["word"], float(row["start"])) for row in csv.DictReader(f)]
+
+
+def test_dialogue_dashes_and_hyphens():
+    assert align_subtitles._subtitle_tokens("-Shit! - Damn-it, hell's") == ["shit", "damn", "it", "hell"]
+    assert align_subtitles._subtitle_tokens("You ass-hole", compounds={"ass-hole"}) == ["you", "ass-hole"]
+
+
+def test_dash_prefixed_cues_are_injected(tmp_path):
+    srt = ("1\n00:00:01,000 --> 00:00:02,000\n-Shit!\n- Who's there?\n\n"
+           "2\n00:00:05,000 --> 00:00:06,000\n- Fuck-off.\n\n")
+    assert _inject(tmp_path, srt) == [("shit", 1.0), ("fuck", 5.0)]
+
+
+def test_overlapping_cues_inject_once(tmp_path):
+    srt = ("1\n00:00:01,000 --> 00:00:03,000\nShit.\n\n"
+           "2\n00:00:01,000 --> 00:00:03,000\nShit.\n\n"
+           "3\n00:00:02,500 --> 00:00:04,000\nOh shit, bastard.\n\n")
+    spoken = [{"word": "bastard", "start": 3.5, "end": 3.8, "confidence": 0.9}]
+    assert _inject(tmp_path, srt, spoken) == [("shit", 1.0), ("bastard", 3.5)]
@@ -0,0 +1,137 @@
+""" Uploads against the local GCS stand-in (google_emulator)
+"""
+import hashlib
+import io
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import Global_Config
+import google_api
+import google_emulator
+import tracing
+import utils
+
+
+@pytest.fixture
+def bucket(tmp_path, monkeypatch):
+    from google.cloud import storage
+    monkeypatch.setattr(google_emulator, "_config", google_emulator.EmulatorConfig(root=tmp_path / "emulator"))
+    monkeypatch.setattr(storage, "Client", google_emulator.FakeStorageClient)
+    monkeypatch.setattr(storage, "Blob", google_emulator.FakeBlob)
+    monkeypatch.delenv("STORAGE_EMULATOR_HOST", raising=False)
+    return google_api.get_bucket()
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "audio.flac"
+    path.write_bytes(bytes(range(256)) * 4000 + b"tail")  # ~1 MB: four 256 KB slices
+    return path
+
+
+def _names(bucket):
+    return [blob.name for blob in bucket.list_blobs()]
+
+
+def test_composite_upload(bucket, source):
+    uri = google_api.composite_upload(source, "movie.flac", parallelism=8, chunk_mb=0.25,
+                                      metadata={"cleanvid-source": "movie"})
+    assert uri == f"gs://{Global_Config.BUCKET_NAME}/movie.flac"
+    assert _names(bucket) == ["movie.flac"]  # the slices are gone
+    blob = bucket.get_blob("movie.flac")
+    assert blob.download_as_bytes() == source.read_bytes()
+    assert blob.metadata == {"cleanvid-source": "movie"}
+
+
+def test_slices_are_deleted_when_an_upload_fails(bucket, source, monkeypatch):
+    upload = google_emulator.FakeBlob.upload_from_file
+
+    def flaky(self, file_obj, size=None, **kwargs):
+        if self.name.endswith(".part02"):
+            raise ConnectionError("connection reset")
+        upload(self, file_obj, size=size, **kwargs)
+
+    monkeypatch.setattr(google_emulator.FakeBlob, "upload_from_file", flaky)
+    with pytest.raises(ConnectionError):
+        google_api.composite_upload(source, "movie.flac", parallelism=4, chunk_mb=0.25)
+    assert _names(bucket) == []
+
+
+def test_slices_are_deleted_when_the_compose_fails(bucket, source, monkeypatch):
+    def compose(self, sources, **kwargs):
+        raise RuntimeError("compose failed")
+
+    monkeypatch.setattr(google_emulator.FakeBlob, "compose", compose)
+    with pytest.raises(RuntimeError):
+        google_api.composite_upload(source, "movie.flac", parallelism=4, chunk_mb=0.25)
+    assert _names(bucket) == []
+
+
+def test_hashing_stream_replays_after_a_rewind():
+    data = bytes(range(256)) * 40
+    stream = google_api.HashingStream(io.BytesIO(data))
+    assert stream.read(1000) == data[:1000]
+    chunk = stream.read(1000)
+    # A partial commit: the upload rewinds into the last chunk and reads on from there
+    stream.seek(1500)
+    assert stream.tell() == 1500
+    assert stream.read(800) == data[1500:2300]
+    assert stream.read(-1) == data[2300:]
+    assert chunk == data[1000:2000]
+    assert stream.bytes_read == len(data)
+    assert stream.hexdigest() == hashlib.md5(data).hexdigest()  # replayed bytes are hashed once
+    with pytest.raises(io.UnsupportedOperation):
+        stream.seek(0)
+
+
+def _stream_command(video_path, start, segment_length, ffmpeg_path="ffmpeg", codec="flac", profile=None):
+    """Stand-in for the ffmpeg extraction: 300 KB of bytes derived from the segment start."""
+    return [sys.executable, "-c", f"import sys; sys.stdout.buffer.write(bytes([{start} % 256, 7]) * 150000)"]
+
+
+def test_stream_upload_audio(bucket, tmp_path, monkeypatch):
+    monkeypatch.setenv("GOOGLE_APPLICATION_CREDENTIALS", "")
+    api = google_api.google_speech_api(credential_path=tmp_path / "credentials.json", api="storage")
+    segments = [(f"gs://{Global_Config.BUCKET_NAME}/{name}.flac", start, 3600)
+                for name, start in (("v0", 0), ("v1", 3600), ("v2", 7200))]
+    monkeypatch.setattr(utils, "stream_segment_uris", lambda *args, **kwargs: segments)
+    monkeypatch.setattr(utils, "stream_audio_command", _stream_command)
+    bucket.blob("v1.flac").upload_from_file(io.BytesIO(b"uploaded before"))
+
+    assert api.stream_upload_audio(tmp_path / "movie.mkv", chunk_mb=0.25) == [uri for uri, _, _ in segments]
+    assert bucket.get_blob("v1.flac").download_as_bytes() == b"uploaded before"  # skipped
+    for name, start in (("v0", 0), ("v2", 7200)):
+        expected = bytes([start % 256, 7]) * 150000
+        blob = bucket.get_blob(f"{name}.flac")
+        assert blob.download_as_bytes() == expected
+        assert blob.metadata["cleanvid-md5"] == hashlib.md5(expected).hexdigest()
+        assert blob.metadata["cleanvid-bytes"] == str(len(expected))
+
+
+def test_failed_stream_leaves_no_object(bucket, tmp_path, monkeypatch):
+    monkeypatch.setenv("GOOGLE_APPLICATION_CREDENTIALS", "")
+    api = google_api.google_speech_api(credential_path=tmp_path / "credentials.json", api="storage")
+    monkeypatch.setattr(utils, "stream_segment_uris",
+                        lambda *args, **kwargs: [(f"gs://{Global_Config.BUCKET_NAME}/v0.flac", 0, 3600)])
+    monkeypatch.setattr(utils, "stream_audio_command", lambda *args, **kwargs: [
+        sys.executable, "-c", "import sys; sys.stdout.buffer.write(b'partial'); sys.exit('decode error')"])
+    with pytest.raises(ValueError, match="decode error"):
+        api.stream_upload_audio(tmp_path / "movie.mkv")
+    assert _names(bucket) == []
+
+
+def test_upload_file_counts_only_sent_bytes(bucket, source, tmp_path, monkeypatch):
+    monkeypatch.setenv("GOOGLE_APPLICATION_CREDENTIALS", "")
+    api = google_api.google_speech_api(credential_path=tmp_path / "credentials.json", api="storage")
+    composite = tmp_path / "other.flac"
+    composite.write_bytes(source.read_bytes()[::-1])
+    tracer = tracing.Tracer(source)
+    for path, parallel in ((source, False), (composite, True)):
+        with tracer.step(SimpleNamespace(number=2, name="Upload Audio")) as trace:
+            api.upload_file(path, parallel=parallel)
+            api.upload_file(path, parallel=parallel)  # already in the bucket: nothing sent
+        assert trace.counters["bytes_uploaded"] == path.stat().st_size
@@ -0,0 +1,81 @@
+""" Compiled swear lexicon: phrase matching, subtitle exceptions and the mute list format
+"""
+import re
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import lexicon
+
+SWEARS = ["damn", "hell", "shit", "god damn", "son of a bitch", "bitch", "jesus christ"]
+EXCEPTIONS = ["hell", "jesus christ"]
+
+
+def _words(text, start=1.0, step=0.5):
+    return [{"word": w, "start": start + i * step, "end": start + i * step + 0.4} for i, w in enumerate(text.split())]
+
+
+def _legacy_mute_list(swears, subtitle_exceptions, words, subtitle_confirmed_words=None):
+    """google_speech_api.create_mute_list_from_words before the lexicon (two-word phrases only)."""
+    mute_list = []
+    mute_details = []
+    phrase_buffer = []
+    strip_punctuation = re.compile('[^-a-zA-Z \']+')
+    previous_word = ""
+    previous_start_time = 0.0
+    subtitle_confirmed_words = subtitle_confirmed_words or set()
+    for word_obj in words:
+        word_text, start, end = word_obj["word"], word_obj["start"], word_obj["end"]
+        phrase_buffer.append(word_text)
+        _word = strip_punctuation.sub("", word_text).lower()
+        compound_phrase = f"{previous_word} {_word}".strip()
+        is_exception = _word in subtitle_exceptions and _word in subtitle_confirmed_words
+        if compound_phrase in swears and previous_start_time:
+            if not (compound_phrase in subtitle_exceptions and compound_phrase in subtitle_confirmed_words):
+                mute_list.append((previous_start_time, end))
+                mute_details.append((previous_start_time, end, compound_phrase[0] + '*' * (len(compound_phrase) - 1)))
+        elif _word in swears:
+            if not is_exception:
+                mute_list.append((start, end))
+                mute_details.append((start, end, word_text[0] + "*" * (len(_word) - 1)))
+        previous_word = _word
+        previous_start_time = start
+    return mute_list, [" ".join(phrase_buffer)], mute_details
+
+
+def test_longest_phrase_wins():
+    lex = lexicon.Lexicon(["son", "son of a bitch", "bitch", "god damn", "damn"])
+    tokens = [lexicon.normalize(w) for w in "you son of a bitch, god damn it".split()]
+    assert lex.scan(tokens) == [(1, 5, "son of a bitch"), (5, 7, "god damn")]
+
+
+def test_single_words_inside_a_phrase_are_not_reported_twice():
+    lex = lexicon.Lexicon(["god damn", "damn"])
+    assert lex.scan(["god", "damn", "it", "damn"]) == [(0, 2, "god damn"), (3, 4, "damn")]
+    assert lex.find_all(["god", "damn"]) == {"god damn", "damn"}
+
+
+def test_subtitle_exceptions_need_confirmation():
+    lex = lexicon.Lexicon(SWEARS, EXCEPTIONS)
+    words = _words("what the hell, jesus christ")
+
+    muted, _, _ = lex.create_mute_list(words)
+    assert muted == [(2.0, 2.4), (2.5, 3.4)]
+
+    # Confirmed by the subtitles: allowed (case and punctuation don't matter)
+    muted, _, _ = lex.create_mute_list(words, subtitle_confirmed_words={"Hell", "Jesus Christ"})
+    assert muted == []
+
+    # Only exceptions can be confirmed
+    words = _words("damn it")
+    muted, _, _ = lex.create_mute_list(words, subtitle_confirmed_words={"damn"})
+    assert muted == [(1.0, 1.4)]
+
+
+def test_matches_legacy_mute_list():
+    words = _words("Oh, shit. Well God damn, what the Hell is this bitch doing? Shit! damn-it hell's fine")
+    confirmed = {"hell"}
+    lex = lexicon.Lexicon(SWEARS, EXCEPTIONS)
+    swears = {" ".join(s.split()) for s in SWEARS}
+    assert lex.create_mute_list(words) == _legacy_mute_list(swears, set(EXCEPTIONS), words)
+    assert lex.create_mute_list(words, confirmed) == _legacy_mute_list(swears, set(EXCEPTIONS), words, confirmed)
@@ -0,0 +1,40 @@
+""" Mute interval coalescing and the single-filter mute list
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import utils
+
+
+def _flat(intervals):
+    return [t for pair in intervals for t in pair]
+
+
+def test_coalesce_sorts_pads_and_merges():
+    intervals = [(10.0, 10.5), (1.0, 1.2), (1.3, 1.6), (5.0, 5.2)]
+    assert _flat(utils.coalesce_intervals(intervals, padding=0.1, gap=0.25)) == \
+        pytest.approx(_flat([(0.9, 1.7), (4.9, 5.3), (9.9, 10.6)]))
+
+
+def test_coalesce_gap_boundary():
+    # 0.25 apart after padding: merged; just over: kept apart
+    assert utils.coalesce_intervals([(0.0, 1.0), (1.25, 2.0)], padding=0.0, gap=0.25) == [(0.0, 2.0)]
+    assert utils.coalesce_intervals([(0.0, 1.0), (1.26, 2.0)], padding=0.0, gap=0.25) == [(0.0, 1.0), (1.26, 2.0)]
+
+
+def test_coalesce_keeps_the_outer_end_and_clamps_at_zero():
+    assert _flat(utils.coalesce_intervals([(0.05, 3.0), (1.0, 1.5)], padding=0.1, gap=0.0)) == \
+        pytest.approx([0.0, 3.1])
+    assert utils.coalesce_intervals([]) == []
+
+
+def test_mute_list_round_trip():
+    words = [(12.0, 12.4), (3.0, 3.3), (3.4, 3.8), (40.25, 40.5)]
+    filters = utils.create_mute_list(words)
+    assert len(filters) == 1 and filters[0].startswith("volume=enable=")
+    assert _flat(utils.parse_mute_filters(filters)) == \
+        pytest.approx(_flat(utils.coalesce_intervals(words)), abs=1e-3)
+    assert utils.create_mute_list([]) == ["anull"]
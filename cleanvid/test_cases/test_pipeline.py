@@ -0,0 +1,106 @@
+""" Pipeline steps on a multi-segment transcription (saved segment responses, no API calls)
+"""
+import csv
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import lexicon
+import response_catalog
+import utils
+from scripts import pipeline
+
+NAME = "Show S01E01"
+# Two hour-long segments; the swears are in the first one
+SEGMENTS = [
+    [("well", 10.0), ("damn", 10.5), ("it", 11.0), ("said", 600.0), ("shit", 600.4)],
+    [("fine", 3700.0), ("thanks", 3700.5)],
+]
+SRT = """1
+00:00:10,000 --> 00:00:11,500
+Well, damn it.
+
+2
+00:10:00,000 --> 00:10:01,000
+Said shit.
+
+3
+01:01:40,000 --> 01:01:41,000
+Fine, thanks.
+"""
+
+
+class FakeSpeechApi:
+    """The google_speech_api methods the steps use; a .response here is a JSON list of words."""
+
+    def __init__(self, folder):
+        self.response_output_folder = folder
+        self.lexicon = lexicon.load_lexicon()
+
+    def load_response(self, path):
+        return json.loads(Path(path).read_text())
+
+    def get_words_from_response(self, response, remap=None):
+        return [dict(w) for w in response]
+
+    def load_words_from_response_file(self, path):
+        return self.get_words_from_response(self.load_response(path))
+
+    def save_words_to_csv(self, words, path):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["start", "end", "word", "confidence"])
+            writer.writeheader()
+            writer.writerows(words)
+
+    def load_words_from_csv(self, path):
+        with open(path, newline="", encoding="utf-8") as f:
+            return [{"word": r["word"], "start": float(r["start"]), "end": float(r["end"]),
+                     "confidence": float(r["confidence"] or 0)} for r in csv.DictReader(f)]
+
+    def create_mute_list_from_words(self, words, subtitle_confirmed_words=None):
+        return self.lexicon.create_mute_list(words, subtitle_confirmed_words)
+
+    def submit_operation(self, storage_uri, name=None):
+        raise AssertionError(f"{name} has a saved response and must not be resubmitted")
+
+
+def _pipeline(tmp_path):
+    folder = tmp_path / "responses"
+    folder.mkdir()
+    for i, words in enumerate(SEGMENTS):
+        response = [{"word": w, "start": t, "end": t + 0.4, "confidence": 0.9} for w, t in words]
+        path = folder / f"{response_catalog.segment_stem(NAME, i)}_2024-01-01 10;00;0{i}.response"
+        path.write_text(json.dumps(response))
+    video = tmp_path / f"{NAME}.mkv"
+    (tmp_path / f"{NAME}.srt").write_text(SRT)
+    ctx = pipeline.PipelineContext(video_path=video, response_folder=folder)
+    ctx.gcs_uri = ["gs://bucket/a.flac", "gs://bucket/b.flac"]
+    ctx.subtitle_path = tmp_path / f"{NAME}.srt"
+    ctx.csv_path = folder / f"{NAME}_words.csv"
+    ctx.mute_list_path = tmp_path / f"{NAME}_clean_MUTE.txt"
+    p = pipeline.Pipeline(ctx)
+    p.speech_api = FakeSpeechApi(folder)
+    return p
+
+
+def test_segments_are_not_found_as_the_whole_episode(tmp_path):
+    p = _pipeline(tmp_path)
+    assert p._find_response_file() is None
+    catalog = response_catalog.get_catalog(p.context.response_folder)
+    assert catalog.find(response_catalog.segment_stem(NAME, 1)).name.startswith(f"{NAME}.seg001_")
+
+
+def test_merge_and_mute_list_cover_every_segment(tmp_path):
+    p = _pipeline(tmp_path)
+    p._execute_transcribe()
+    assert [path.name[:len(NAME) + 7] for path in p.context.segment_response_paths] == \
+        [f"{NAME}.seg000", f"{NAME}.seg001"]
+
+    p._execute_merge()
+    merged = [w["word"] for w in p.speech_api.load_words_from_csv(p.context.csv_path)]
+    assert merged[:2] == ["well", "damn"] and merged[-1] == "thanks"
+
+    p._execute_generate_mute_list()
+    muted = utils.parse_mute_list_file(p.context.mute_list_path)
+    assert [round(start) for start, _ in muted] == [10, 600]
@@ -0,0 +1,119 @@
+""" Splice render on short generated clips (needs ffmpeg and ffprobe on the PATH) and the PCM
+render's gain envelope
+"""
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import Global_Config
+import render
+
+FFMPEG = shutil.which("ffmpeg")
+FFPROBE = shutil.which("ffprobe")
+requires_ffmpeg = pytest.mark.skipif(not (FFMPEG and FFPROBE), reason="ffmpeg/ffprobe not installed")
+
+SAMPLE_RATE = 48000
+# Noise substitution makes the AAC decoder's output depend on its random state, not just the packets
+CODEC_OPTIONS = {"aac": ["-aac_pns", "0"]}
+INTERVALS = [(1.3, 1.9), (4.05, 4.2), (7.5, 8.6), (11.0, 11.4), (14.2, 15.0), (18.7, 19.1), (22.4, 23.9)]
+
+
+def _make_clip(path, codec="aac", seconds=30):
+    subprocess.run([FFMPEG, "-y", "-nostdin", "-loglevel", "error", "-f", "lavfi",
+                    "-i", f"anoisesrc=color=pink:sample_rate={SAMPLE_RATE}:seed=7:duration={seconds}",
+                    "-ac", "2", "-c:a", codec, "-b:a", "192k"] + CODEC_OPTIONS.get(codec, []) + [str(path)], check=True)
+
+
+def _decode(path):
+    result = subprocess.run([FFMPEG, "-nostdin", "-loglevel", "error", "-i", str(path), "-map", "0:a:0",
+                             "-f", "f32le", "-ac", "1", "pipe:1"], stdout=subprocess.PIPE, check=True)
+    return np.frombuffer(result.stdout, dtype="<f4")
+
+
+@pytest.fixture(autouse=True)
+def _probe_cache(tmp_path, monkeypatch):
+    # splice_audio probes through the persistent cache; keep the test clips out of ./data
+    monkeypatch.setattr(Global_Config, "PROBE_CACHE_FILE", tmp_path / "probe_cache.sqlite")
+
+
+@requires_ffmpeg
+@pytest.mark.parametrize("codec", ["aac", "ac3"])
+def test_splice_is_seamless(tmp_path, codec):
+    source = tmp_path / f"source.{codec}.mka"
+    spliced = tmp_path / "clean.mka"
+    _make_clip(source, codec)
+    result = render.splice_audio(source, spliced, INTERVALS, ffmpeg_path=FFMPEG, ffprobe_path=FFPROBE,
+                                 workdir=tmp_path / "pieces")
+
+    original, clean = _decode(source), _decode(spliced)
+    frame = render.FRAME_SIZES[codec]
+    assert abs(len(clean) - len(original)) <= frame
+
+    # Copied stretches decode to the source samples at the same positions (no drift after windows);
+    # the frame after each window is skipped (its overlap comes from the re-encoded frame). A shift
+    # on noise is an error of the order of the signal; the AC-3 decoder's dither adds about 1%.
+    edges = [0.0] + [t for window in result["windows"] for t in window] + [len(original) / SAMPLE_RATE]
+    for copy_start, copy_end in zip(edges[::2], edges[1::2]):
+        a = int(copy_start * SAMPLE_RATE) + 2 * frame
+        b = int(copy_end * SAMPLE_RATE) - frame
+        if b - a < frame:
+            continue
+        error = np.abs(clean[a:b] - original[a:b]).mean()
+        assert error < 0.05 * np.abs(original[a:b]).mean(), f"copied audio at {copy_start:.2f}s is shifted"
+
+    # Re-encoded margins line up with the source too, and the intervals are silent
+    for start, end in INTERVALS:
+        # (the codec spreads the mute edge over up to a frame: AC-3 dithers zeroed blocks that share
+        # exponents with loud ones)
+        edge = frame / SAMPLE_RATE + 0.01
+        muted = clean[int((start + edge) * SAMPLE_RATE):int((end - edge) * SAMPLE_RATE)]
+        assert np.abs(muted).max() < 1e-3
+        margin = slice(int((end + 0.1) * SAMPLE_RATE), int((end + 0.4) * SAMPLE_RATE))
+        error = np.abs(clean[margin] - original[margin]).mean()
+        assert error < 0.2 * np.abs(original[margin]).mean(), f"re-encoded window at {start}s is shifted"
+
+
+def _envelope(intervals, fade, count, sample_rate=1000, block=None):
+    """Gain of samples [0, count), computed in blocks of `block` samples (untouched blocks are 1)."""
+    envelope = render.GainEnvelope(intervals, fade)
+    block = block or count
+    gains = []
+    for first in range(0, count, block):
+        n = min(block, count - first)
+        gain = envelope.block_gain(first, n, sample_rate)
+        gains.append(np.ones(n, dtype=np.float32) if gain is None else gain)
+    return np.concatenate(gains)
+
+
+def test_gain_envelope_mutes_the_interval_with_ramps_outside():
+    gain = _envelope([(1.0, 1.5)], fade=0.01, count=3000)
+    assert np.all(gain[1000:1501] == 0)
+    # 10-sample linear ramps just outside the interval
+    np.testing.assert_allclose(gain[990:1001], np.linspace(1, 0, 11), atol=1e-6)
+    np.testing.assert_allclose(gain[1500:1511], np.linspace(0, 1, 11), atol=1e-6)
+    assert np.all(gain[:990] == 1) and np.all(gain[1510:] == 1)
+
+
+def test_gain_envelope_blocks():
+    envelope = render.GainEnvelope([(1.0, 1.5), (2.0, 2.1)], fade=0.01)
+    assert envelope.block_gain(0, 985, 1000) is None
+    assert envelope.block_gain(1515, 470, 1000) is None
+    assert envelope.block_gain(1500, 20, 1000)[0] == 0  # a block starting inside the fade-out
+    # Block edges that cut through mutes and ramps give the same gain as one block
+    whole = _envelope([(1.0, 1.5), (2.0, 2.1)], fade=0.01, count=3000)
+    for block in (7, 64, 995):
+        np.testing.assert_array_equal(_envelope([(1.0, 1.5), (2.0, 2.1)], 0.01, 3000, block=block), whole)
+
+
+def test_gain_envelope_overlaps_and_hard_edges():
+    gain = _envelope([(1.1, 1.4), (1.0, 1.2)], fade=0.0, count=2000)
+    assert np.all(gain[1000:1401] == 0)
+    assert np.all(gain[:1000] == 1) and np.all(gain[1401:] == 1)
+    # Ramps of neighbouring intervals overlap: the lower gain wins
+    gain = _envelope([(1.0, 1.01), (1.03, 1.04)], fade=0.02, count=2000)
+    assert gain[1020] == pytest.approx(0.5, abs=1e-6)
@@ -0,0 +1,69 @@
+""" Subtitle discovery: name normalization, ranking and the per-directory cache
+"""
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import subtitle_match
+
+
+def _touch(folder, *names):
+    for name in names:
+        (folder / name).write_text("1\n00:00:01,000 --> 00:00:02,000\nhi\n")
+
+
+def test_name_normalization():
+    name = subtitle_match.SubtitleName("The.Office.S03E24.720p.en.forced")
+    assert name.text == "the office s03e24 720p"
+    assert name.episode == (3, 24)
+    name = subtitle_match.SubtitleName("Heat (1995).2.eng")
+    assert (name.text, name.year, name.episode) == ("heat 1995", "1995", None)
+    assert subtitle_match.SubtitleName("Show 3x07").episode == (3, 7)
+
+
+def test_exact_match_first(tmp_path):
+    video = tmp_path / "Heat (1995).mkv"
+    _touch(tmp_path, "Heat (1995).srt", "Heat (1995).srt.bak", "Heat (1995).en.srt")
+    ranked = subtitle_match.rank(video)
+    assert [p.name for p, _ in ranked[:2]] == ["Heat (1995).srt.bak", "Heat (1995).srt"]
+    assert ranked[0][1] == 1.0
+    assert ranked[2][0].name == "Heat (1995).en.srt"
+
+
+def test_other_episodes_and_years_are_excluded(tmp_path):
+    video = tmp_path / "The.Office.S03E24.mkv"
+    _touch(tmp_path, "The.Office.S03E23.en.srt", "The.Office.S03E25.en.srt", "the office s03e24 WEB.en.srt")
+    path, confidence = subtitle_match.best_match(video)
+    assert path.name == "the office s03e24 WEB.en.srt"
+    assert confidence >= subtitle_match.EPISODE_MATCH_CONFIDENCE
+    assert len(subtitle_match.rank(video)) == 1
+
+    video = tmp_path / "King Kong (2005).mkv"
+    _touch(tmp_path, "King Kong (1933).srt")
+    assert all("1933" not in p.name for p, _ in subtitle_match.rank(video))
+
+
+def test_no_match(tmp_path):
+    assert subtitle_match.best_match(tmp_path / "Alien (1979).mkv") == (None, 0.0)
+    assert subtitle_match.rank(tmp_path / "missing" / "Alien (1979).mkv") == []
+
+
+def test_cache_follows_directory_changes(tmp_path):
+    video = tmp_path / "Alien (1979).mkv"
+    _touch(tmp_path, "Aliens (1986).srt")
+    assert subtitle_match.best_match(video, min_confidence=0.9) == (None, 0.0)
+
+    _touch(tmp_path, "Alien (1979).srt")
+    assert subtitle_match.best_match(video) == (tmp_path / "Alien (1979).srt", 1.0)
+
+
+def test_file_added_in_the_same_mtime_tick(tmp_path):
+    # On a share with coarse mtimes the directory mtime doesn't move; a recent directory is re-listed
+    video = tmp_path / "Alien (1979).mkv"
+    _touch(tmp_path, "Aliens (1986).srt")
+    mtime_ns = os.stat(tmp_path).st_mtime_ns
+    assert subtitle_match.best_match(video, min_confidence=0.9) == (None, 0.0)
+    _touch(tmp_path, "Alien (1979).srt")
+    os.utime(tmp_path, ns=(mtime_ns, mtime_ns))
+    assert subtitle_match.best_match(video) == (tmp_path / "Alien (1979).srt", 1.0)
@@ -0,0 +1,77 @@
+""" Step tracing: records, counters across threads and the Chrome trace export
+"""
+import json
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import tracing
+
+STEP = SimpleNamespace(number=2, name="Upload Audio")
+
+
+def test_step_record(tmp_path):
+    source = tmp_path / "movie.mkv"
+    source.write_bytes(b"x" * 1000)
+    output = tmp_path / "audio.flac"
+    tracer = tracing.Tracer(source, tmp_path / "traces")
+    with tracer.step(STEP, inputs=[source, None], outputs=lambda: [output]):
+        tracing.add("bytes_uploaded", 250)
+        tracing.add("bytes_uploaded", 50)
+        output.write_bytes(b"y" * 400)
+
+    record = tracer.traces[0].to_dict()
+    assert (record["video"], record["step"], record["name"], record["status"]) == (str(source), 2, "Upload Audio", "done")
+    assert (record["bytes_read"], record["bytes_written"]) == (1000, 400)
+    assert record["counters"] == {"bytes_uploaded": 300}
+    assert record["wall_seconds"] >= 0 and record["api_wait_seconds"] == 0
+    assert tracing.load([tmp_path / "traces" / "movie.trace.jsonl"]) == [json.loads(json.dumps(record))]
+
+
+def test_failed_step_is_recorded(tmp_path):
+    tracer = tracing.Tracer(tmp_path / "movie.mkv")
+    with pytest.raises(ValueError):
+        with tracer.step(STEP):
+            raise ValueError("no segments")
+    record = tracer.traces[0].to_dict()
+    assert (record["status"], record["error"]) == ("error", "no segments")
+    assert tracing.current() is None
+
+
+def test_counters_outside_a_step_and_from_workers(tmp_path):
+    tracing.add("bytes_uploaded", 10)  # no step: ignored
+    tracer = tracing.Tracer(tmp_path / "movie.mkv")
+    with tracer.step(STEP) as trace:
+        def work():
+            tracing.add("bytes_uploaded", 1)  # a plain worker thread has no step
+            with tracing.attach(trace):
+                for _ in range(1000):
+                    tracing.add("bytes_uploaded", 1)
+
+        workers = [threading.Thread(target=work) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    assert trace.counters["bytes_uploaded"] == 4000
+
+
+def test_chrome_trace():
+    records = [
+        {"run": "r1", "video": "/media/a.mkv", "step": 2, "name": "Upload Audio", "status": "done", "thread": "w1",
+         "start": 100.0, "wall_seconds": 2.5, "bytes_read": 10, "counters": {"bytes_uploaded": 7},
+         "waits": [["upload", 100.5, 1.0]]},
+        {"run": "r1", "video": "/media/b.mkv", "step": 3, "name": "Transcribe", "status": "error", "thread": "w1",
+         "start": 101.0, "wall_seconds": 0.5, "waits": []},
+    ]
+    events = tracing.to_chrome_trace(records)["traceEvents"]
+    step, wait, other, name_a, name_b = events
+    assert (step["name"], step["ts"], step["dur"], step["pid"]) == ("2. Upload Audio", 100e6, 2.5e6, 1)
+    assert step["args"] == {"run": "r1", "status": "done", "bytes_read": 10, "bytes_uploaded": 7}
+    assert (wait["name"], wait["cat"], wait["ts"], wait["dur"], wait["tid"]) == ("upload", "api", 100.5e6, 1e6, step["tid"])
+    assert (other["pid"], other["tid"]) == (2, 2)  # one process per video, one thread row per (video, worker)
+    assert [e["args"]["name"] for e in (name_a, name_b)] == ["a.mkv", "b.mkv"]
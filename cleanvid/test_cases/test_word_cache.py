@@ -0,0 +1,74 @@
+""" Columnar word cache: round trip and invalidation
+"""
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import voice_activity
+import word_cache
+
+WORDS = [
+    {"word": "well", "start": 1.0, "end": 1.3, "confidence": 0.91},
+    {"word": "damn", "start": 1.4, "end": 1.8, "confidence": 0.702},
+    {"word": "well", "start": 2.5, "end": 2.9, "confidence": 0.0},
+]
+
+
+def _loader(words):
+    calls = []
+
+    def parse(path):
+        calls.append(path)
+        return words
+    return parse, calls
+
+
+def _touch(path, text, mtime_ns):
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_round_trip(tmp_path):
+    response = tmp_path / "movie_2024-01-01 10;00;00.response"
+    _touch(response, "{}", 1_000_000_000)
+    parse, calls = _loader(WORDS)
+    assert word_cache.load_words(response, parse) == WORDS
+    assert word_cache.load_words(response, parse) == WORDS
+    assert len(calls) == 1
+    table = word_cache.load(response)
+    assert table.vocab == ["well", "damn"] and table.tokens.tolist() == [0, 1, 0]
+
+
+def test_rebuilt_when_response_changes(tmp_path):
+    response = tmp_path / "movie.response"
+    _touch(response, "{}", 1_000_000_000)
+    parse, calls = _loader(WORDS)
+    word_cache.load_words(response, parse)
+    _touch(response, '{"results": []}', 2_000_000_000)
+    assert word_cache.load(response) is None
+    word_cache.load_words(response, parse)
+    assert len(calls) == 2
+
+
+def test_rebuilt_when_remap_appears_changes_or_goes(tmp_path):
+    # Cached words are in source-video time, so they depend on the remap next to the response
+    response = tmp_path / "movie.response"
+    remap = voice_activity.remap_path(response)
+    _touch(response, "{}", 1_000_000_000)
+    parse, calls = _loader(WORDS)
+    word_cache.load_words(response, parse)
+
+    _touch(remap, '{"segments": [[0, 10, 0]]}', 3_000_000_000)
+    assert word_cache.load(response) is None
+    word_cache.load_words(response, parse)
+    assert word_cache.load(response) is not None
+
+    _touch(remap, '{"segments": [[0, 10, 5]]}', 4_000_000_000)
+    assert word_cache.load(response) is None
+    word_cache.load_words(response, parse)
+
+    remap.unlink()
+    assert word_cache.load(response) is None
+    word_cache.load_words(response, parse)
+    assert len(calls) == 4
@@ -0,0 +1,264 @@
+"""
+Per-step tracing for pipeline runs.
+
+Every executed PipelineStep is recorded with its wall time, the CPU time of its own thread and of
+the child processes (ffmpeg/ffprobe) that finished while it ran, the bytes it read and wrote, and
+the time spent waiting on Google (uploads, operation polling). Records are appended to one JSONL
+file per video:
+
+    data/traces/{video stem}.trace.jsonl
+
+and can be merged into a Chrome trace (chrome://tracing or https://ui.perfetto.dev) or summarized:
+
+    python tracing.py data/traces/*.jsonl --chrome trace.json
+
+Code running inside a step reports extra figures through the module-level helpers, which are
+no-ops outside a traced step:
+
+    tracing.add("bytes_uploaded", n)
+    with tracing.api_wait("transcription"):
+        ...
+
+Work handed to a thread pool is charged to the step by running it under tracing.attach(trace).
+
+Child CPU comes from os.times(), which is process-wide: when several steps run at once (see
+PipelineExecutor) a step is charged for every child that finished during it.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+_local = threading.local()
+_counters_lock = threading.Lock()
+
+
+class StepTrace:
+    """Measurements of one step execution."""
+
+    def __init__(self, video, number, name, run_id):
+        self.video = str(video)
+        self.number = number
+        self.name = name
+        self.run_id = run_id
+        self.status = "running"
+        self.error = None
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.waits: List[list] = []  # [label, start (epoch), seconds]
+        self.thread = threading.current_thread().name
+
+    def start(self):
+        self.start_time = time.time()
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        times = os.times()
+        self._child_cpu = times.children_user + times.children_system
+
+    def stop(self):
+        times = os.times()
+        self.wall_seconds = time.perf_counter() - self._wall
+        self.cpu_seconds = time.thread_time() - self._cpu
+        self.child_cpu_seconds = times.children_user + times.children_system - self._child_cpu
+
+    def to_dict(self) -> Dict:
+        counters = dict(self.counters)
+        return {
+            "run": self.run_id,
+            "video": self.video,
+            "step": self.number,
+            "name": self.name,
+            "status": self.status,
+            "error": self.error,
+            "thread": self.thread,
+            "start": self.start_time,
+            "wall_seconds": round(self.wall_seconds, 6),
+            "cpu_seconds": round(self.cpu_seconds, 6),
+            "child_cpu_seconds": round(self.child_cpu_seconds, 6),
+            "bytes_read": int(counters.pop("bytes_read", 0)),
+            "bytes_written": int(counters.pop("bytes_written", 0)),
+            "api_wait_seconds": round(counters.pop("api_wait_seconds", 0.0), 6),
+            "counters": counters,
+            "waits": self.waits,
+        }
+
+
+def current() -> Optional[StepTrace]:
+    """The step being traced on this thread, if any."""
+    return getattr(_local, "trace", None)
+
+
+def add(counter, amount):
+    """Add to a counter of the current step (bytes_read, bytes_written or any custom name)."""
+    trace = current()
+    if trace is not None:
+        with _counters_lock:
+            trace.counters[counter] += amount
+
+
+@contextlib.contextmanager
+def attach(trace: Optional[StepTrace]):
+    """Charge what runs inside to `trace` (the current() of the thread that handed out the work)."""
+    previous = current()
+    _local.trace = trace
+    try:
+        yield
+    finally:
+        _local.trace = previous
+
+
+def _size(path) -> int:
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return 0
+
+
+def add_files(counter, paths: Iterable):
+    """Add the sizes of existing files to a counter of the current step."""
+    add(counter, sum(_size(p) for p in paths if p))
+
+
+@contextlib.contextmanager
+def api_wait(label):
+    """Time a blocking wait on a remote service and charge it to the current step."""
+    trace = current()
+    started, wall = time.time(), time.perf_counter()
+    try:
+        yield
+    finally:
+        if trace is not None:
+            seconds = time.perf_counter() - wall
+            trace.counters["api_wait_seconds"] += seconds
+            trace.waits.append([label, started, round(seconds, 6)])
+
+
+class Tracer:
+    """Records the steps of one video's pipeline runs to {folder}/{video stem}.trace.jsonl.
+
+    Args:
+        video_path: The video being processed.
+        folder: Output folder; None measures without writing.
+    """
+
+    def __init__(self, video_path, folder=None):
+        self.video_path = Path(video_path)
+        self.path = Path(folder) / f"{self.video_path.stem}.trace.jsonl" if folder else None
+        self.run_id = datetime.now().strftime("%Y-%m-%d %H;%M;%S")
+        self.traces: List[StepTrace] = []
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def step(self, step, inputs: Iterable = (), outputs: Optional[callable] = None):
+        """Trace one step execution.
+
+        Args:
+            step: The PipelineStep being executed.
+            inputs: Files the step reads (their sizes count as bytes_read).
+            outputs: Callable returning the files the step wrote, evaluated when it finishes.
+        """
+        trace = StepTrace(self.video_path, step.number, step.name, self.run_id)
+        previous = current()
+        _local.trace = trace
+        trace.start()
+        add_files("bytes_read", inputs)
+        try:
+            yield trace
+            trace.status = "done"
+        except Exception as e:
+            trace.status = "error"
+            trace.error = str(e)
+            raise
+        finally:
+            trace.stop()
+            try:
+                if outputs is not None:
+                    add_files("bytes_written", outputs())
+            except Exception:
+                pass
+            _local.trace = previous
+            self._record(trace)
+
+    def _record(self, trace: StepTrace):
+        with self._lock:
+            self.traces.append(trace)
+            if self.path is None:
+                return
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(trace.to_dict()) + "\n")
+            except OSError as e:
+                print(f"Could not write trace {self.path}: {e}")
+
+
+def load(paths: Iterable) -> List[Dict]:
+    """Step records from trace JSONL files."""
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    return records
+
+
+def to_chrome_trace(records: List[Dict]) -> Dict:
+    """Chrome trace-event JSON: one process per video, one thread per worker, API waits nested."""
+    events = []
+    pids, tids = {}, {}
+    for record in records:
+        pid = pids.setdefault(record["video"], len(pids) + 1)
+        tid = tids.setdefault((pid, record.get("thread")), len(tids) + 1)
+        args = {k: record[k] for k in ("run", "status", "error", "cpu_seconds", "child_cpu_seconds",
+                                       "bytes_read", "bytes_written", "api_wait_seconds") if k in record}
+        args.update(record.get("counters", {}))
+        events.append({"name": f"{record['step']}. {record['name']}", "cat": "step", "ph": "X",
+                       "ts": record["start"] * 1e6, "dur": record["wall_seconds"] * 1e6,
+                       "pid": pid, "tid": tid, "args": args})
+        for label, start, seconds in record.get("waits", []):
+            events.append({"name": label, "cat": "api", "ph": "X", "ts": start * 1e6, "dur": seconds * 1e6,
+                           "pid": pid, "tid": tid})
+    for video, pid in pids.items():
+        events.append({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": Path(video).name}})
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def summarize(records: List[Dict]):
+    """Print totals per step across the given records."""
+    totals = defaultdict(lambda: defaultdict(float))
+    for record in records:
+        row = totals[(record["step"], record["name"])]
+        row["count"] += 1
+        row["errors"] += record["status"] == "error"
+        for key in ("wall_seconds", "cpu_seconds", "child_cpu_seconds", "api_wait_seconds",
+                    "bytes_read", "bytes_written"):
+            row[key] += record.get(key, 0)
+
+    print(f"{'step':<22} {'runs':>5} {'wall':>9} {'cpu':>8} {'child cpu':>10} {'api wait':>9} "
+          f"{'read MB':>9} {'written MB':>11}")
+    for (number, name), row in sorted(totals.items()):
+        print(f"{number}. {name:<19} {int(row['count']):>5} {row['wall_seconds']:>8.1f}s {row['cpu_seconds']:>7.1f}s "
+              f"{row['child_cpu_seconds']:>9.1f}s {row['api_wait_seconds']:>8.1f}s "
+              f"{row['bytes_read'] / 1e6:>9.1f} {row['bytes_written'] / 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="Summarize pipeline traces or export them to Chrome trace format.")
+    parser.add_argument("traces", nargs="+", help="Trace JSONL files (globs allowed)")
+    parser.add_argument("--chrome", type=Path, default=None, help="Write a Chrome trace JSON here")
+    parser.add_argument("--run", default=None, help="Only records from this run id")
+    args = parser.parse_args()
+
+    paths = [p for pattern in args.traces for p in (glob.glob(pattern) or [pattern])]
+    records = [r for r in load(paths) if args.run is None or r["run"] == args.run]
+    summarize(records)
+    if args.chrome:
+        args.chrome.write_text(json.dumps(to_chrome_trace(records)))
+        print(f"Chrome trace written to {args.chrome}")
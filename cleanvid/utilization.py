@@ -6,11 +6,15 @@ Usage is stored persistently in a pickle file and updated when requests are subm
 """
 
 import pickle
+import threading
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Optional
 import Global_Config
 
+# Pipelines for several videos may record usage from different threads
+_LOCK = threading.Lock()
+
 
 def get_current_month() -> str:
     """Get current month as 'YYYY Month' string."""
@@ -78,18 +82,45 @@ def add_usage(video_name: str, duration_seconds: float) -> None:
     Add usage for a transcription request.
     Call this WHEN the request is successfully submitted, not when it completes.
     """
-    data = load_utilization()
-    month = get_current_month()
-    
-    data[month] = data.get(month, 0) + duration_seconds
-    data[f"{month} dict"][video_name] = duration_seconds
-    
-    save_utilization(data)
+    with _LOCK:
+        data = load_utilization()
+        month = get_current_month()
+        
+        data[month] = data.get(month, 0) + duration_seconds
+        data[f"{month} dict"][video_name] = duration_seconds
+        
+        save_utilization(data)
     
     usage_min = data[month] / 60
     print(f"📊 Added {duration_seconds/60:.1f} min. Monthly total: {usage_min:.1f} / {get_monthly_limit()} min")
 
 
+class TranscriptionBudget:
+    """
+    Monthly minutes shared by transcriptions running at the same time.
+
+    Usage is only recorded once a request has been submitted, so several videos entering
+    transcription together could each pass is_over_limit() and overshoot the limit.
+    Reserve a video's duration before it starts and release it when its transcription ends.
+    """
+
+    def __init__(self):
+        self._reserved: Dict[str, float] = {}
+
+    def reserve(self, video_name: str, duration_seconds: float) -> bool:
+        """Reserve minutes for a video; False if recorded usage plus reservations would exceed the limit."""
+        with _LOCK:
+            used = get_monthly_usage() * 60 + sum(self._reserved.values())
+            if used + duration_seconds > get_monthly_limit() * 60:
+                return False
+            self._reserved[video_name] = duration_seconds
+            return True
+
+    def release(self, video_name: str) -> None:
+        with _LOCK:
+            self._reserved.pop(video_name, None)
+
+
 def get_usage_summary() -> str:
     """Get a human-readable usage summary."""
     data = load_utilization()
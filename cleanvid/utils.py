@@ -7,6 +7,7 @@ import traceback
 from pathlib import Path
 from easydict import EasyDict as edict
 import google_api
+import probe_cache
 import re
 import warnings
 import shutil
@@ -15,6 +16,37 @@ import uuid
 FFMPEG = "ffmpeg "
 VALID_FLOAT_REGEX = re.compile(r"^\d+\.?\d*")
 AUDIO_CHANNEL_ARG = "" #-ac 1
+# split_audio_parallel never cuts an upload segment into extraction slices shorter than this
+MIN_EXTRACT_SLICE_SECONDS = 60
+
+# Extraction profiles for the audio sent to transcription. Speech recognition needs neither
+# surround channels, 48 kHz nor 24 bits, and upload size scales with all three (ffmpeg's FLAC
+# encoder writes 24-bit samples from float decoders such as AAC, AC-3 and MP3 unless restricted to s16).
+# bytes_per_minute: FLAC output per audio minute measured with measure_audio_profile on
+# test_cases/test_output/copypasta_processed_AUDIO.mp3 (87 s of speech, mono 44.1 kHz, ffmpeg 6.0);
+# None where it depends on the source layout.
+AUDIO_PROFILES = {
+    "source": {
+        "description": "Source channel layout and sample rate (previous behaviour)",
+        "args": [],
+        "bytes_per_minute": None,  # 4.06 MB/min for the mono reference clip; a 5.1 film is several times that
+    },
+    "dialogue-mono-16k": {
+        "description": "All channels downmixed to mono, resampled to 16 kHz, 16-bit",
+        "args": ["-ac", "1", "-ar", "16000", "-af", "aformat=sample_fmts=s16|s16p"],
+        "bytes_per_minute": 1_100_000,  # 2_060_000 as 24-bit
+    },
+    "center-channel-only": {
+        "description": "Center (dialogue) channel only, 16 kHz, 16-bit; downmix when there is no center channel",
+        "args": ["-af", "pan=mono|c0=FC", "-ar", "16000", "-af", "aformat=sample_fmts=s16|s16p"],
+        "fallback": "dialogue-mono-16k",
+        "bytes_per_minute": 1_100_000,  # same as dialogue-mono-16k on the mono clip
+    },
+}
+
+# ffmpeg channel layouts that include a front-center channel
+_CENTER_LAYOUTS = ("mono", "3.0", "3.1", "4.0", "4.1", "5.0", "5.1", "6.0", "6.1", "7.0", "7.1",
+                   "hexagonal", "octagonal")
 ROOT = Path(__file__).parent.absolute()
 while True:
     if ROOT.name != "cleanvid" and ROOT:
@@ -136,8 +168,65 @@ def process_audio(input, output, ffmpeg_path="ffmpeg ",
     return ffmpegResult, output
 
 
+def audio_profile_args(profile=None, path=None, ffprobe_path="ffprobe"):
+    """ ffmpeg arguments for an extraction profile (see AUDIO_PROFILES)
+
+    Args:
+        profile: profile name; None keeps AUDIO_CHANNEL_ARG
+        path: source file, probed when the profile depends on the channel layout
+
+    Returns:
+        list: arguments to place after the codec arguments
+    """
+    if profile is None:
+        return AUDIO_CHANNEL_ARG.split()
+    if profile not in AUDIO_PROFILES:
+        raise ValueError(f"Unknown audio profile {profile}; choose from {', '.join(AUDIO_PROFILES)}")
+    settings = AUDIO_PROFILES[profile]
+    if profile == "center-channel-only" and path is not None:
+        streams = [s for s in get_ffprobe_json(path, ffprobe_path).get("streams", []) if s.get("codec_type") == "audio"]
+        layout = (streams[0].get("channel_layout") or "") if streams else ""
+        if not layout.startswith(_CENTER_LAYOUTS):
+            print(f"No center channel in '{layout}' audio; using {settings['fallback']}")
+            return audio_profile_args(settings["fallback"])
+    return list(settings["args"])
+
+def _merge_audio_filters(args):
+    """ Combine repeated -af options into one filter chain (ffmpeg only keeps the last -af) """
+    filters = [args[i + 1] for i, a in enumerate(args) if a == "-af"]
+    merged = []
+    skip = False
+    for i, a in enumerate(args):
+        if skip:
+            skip = False
+        elif a == "-af":
+            skip = True
+        else:
+            merged.append(a)
+    return merged + (["-af", ",".join(filters)] if filters else [])
+
+def _shell_args(args):
+    """ Join arguments for a shell command string, quoting the ones the shell would split """
+    return " ".join(f'"{a}"' if re.search(r"[\s|&;<>()]", a) else a for a in args)
+
+def measure_audio_profile(path, profile, seconds=120, start=600, ffmpeg_path="ffmpeg"):
+    """ Encode a sample of a file with a profile and report FLAC bytes per audio minute
+
+    Used to fill in AUDIO_PROFILES[...]["bytes_per_minute"].
+    """
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / "sample.flac"
+        command = [ffmpeg_path.strip(), "-nostdin", "-y", "-loglevel", "error", "-ss", str(start), "-t", str(seconds),
+                   "-i", str(path), "-vn", "-c:a", "flac", *_merge_audio_filters(audio_profile_args(profile, path)),
+                   str(output)]
+        subprocess.run(command, check=True)
+        bytes_per_minute = os.path.getsize(output) / (get_length(output, use_cache=False) / 60)
+    print(f"{profile}: {bytes_per_minute / 1e6:.2f} MB per audio minute")
+    return bytes_per_minute
+
 def split_audio(path, name=None, length=3600, start_time="00:00:00", end_time="99:59:59", ffmpeg_path="ffmpeg ",
-                sample_rate=44100, codec="mp3", normalize_audio=True):
+                sample_rate=44100, codec="mp3", normalize_audio=True, profile=None):
     """ Split audio into 1 hour segments
 
     Args:
@@ -150,6 +239,7 @@ def split_audio(path, name=None, length=3600, start_time="00:00:00", end_time="9
         sample_rate: sample rate of output audio
         codec: codec of output audio
         normalize_audio (bool): normalize audio (default is True for audio files, false for video files)
+        profile: extraction profile from AUDIO_PROFILES (None keeps AUDIO_CHANNEL_ARG)
 
     """
     if name is None:
@@ -164,8 +254,9 @@ def split_audio(path, name=None, length=3600, start_time="00:00:00", end_time="9
         codec_command =  f"-ar {sample_rate} "
     else:
         codec_command = ""
-    normalize_audio = "-af dynaudnorm" if normalize_audio else ""
-    command = f"""{ffmpeg_path} -ss {start_time} -to {end_time} -y -i "{path}" -f segment -segment_time {length} {codec_command} {normalize_audio} {AUDIO_CHANNEL_ARG} -vn {output_str}"""
+    normalize_args = ["-af", "dynaudnorm"] if normalize_audio else []
+    audio_command = _shell_args(_merge_audio_filters(normalize_args + audio_profile_args(profile, path)))
+    command = f"""{ffmpeg_path} -ss {start_time} -to {end_time} -y -i "{path}" -f segment -segment_time {length} {codec_command} {audio_command} -vn {output_str}"""
     # -ac 1 : one audio channel
     # -vn   : exclude video
 
@@ -194,7 +285,8 @@ def split_audio(path, name=None, length=3600, start_time="00:00:00", end_time="9
                 ffmpeg_path=ffmpeg_path,
                 sample_rate=sample_rate,
                 codec=codec,
-                normalize_audio=normalize_audio
+                normalize_audio=normalize_audio,
+                profile=profile
             )
             
         except Exception as e:
@@ -215,6 +307,181 @@ def split_audio(path, name=None, length=3600, start_time="00:00:00", end_time="9
 
     return ffmpegResult, output
 
+def split_audio_parallel(path, name=None, length=3600, ffmpeg_path="ffmpeg ", sample_rate=44100, codec="flac",
+                         normalize_audio=False, max_workers=None, ffprobe_path="ffprobe", profile=None):
+    """ Extract audio segments with input-seeking ffmpeg processes running in parallel
+
+    Same output as split_audio (./temp/{name}/%03d.{codec}), but the single-threaded
+    decode+encode of `-f segment` is replaced by concurrent ffmpeg processes, each seeking
+    (-ss before -i) straight to its part of the file. For FLAC each segment is extracted as about
+    max_workers slices (at least MIN_EXTRACT_SLICE_SECONDS long) that are joined with join_audio,
+    so extraction scales with the core count whatever the segment length.
+
+    Args:
+        path: path to video
+        name: name of output folder
+        length: length of each segment in seconds
+        ffmpeg_path: path to ffmpeg
+        sample_rate: sample rate of output audio (mp3 only, as in split_audio)
+        codec: codec of output audio
+        normalize_audio (bool): normalize audio
+        max_workers: concurrent ffmpeg processes (default: one per core)
+        ffprobe_path: path to ffprobe
+        profile: extraction profile from AUDIO_PROFILES (None keeps AUDIO_CHANNEL_ARG)
+
+    Returns:
+        tuple: (list of segment paths, output pattern)
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    path = Path(path)
+    if name is None:
+        name = path.stem
+    output_dir = Path(f"./temp/{name}")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    # Leftovers from an earlier run (e.g. a different segment length) would be uploaded too
+    for stale in output_dir.glob(f"[0-9][0-9][0-9].{codec}"):
+        stale.unlink()
+    # Slices go to a subfolder so an interrupted run never leaves them among the segments
+    slice_dir = output_dir / "slices"
+    shutil.rmtree(slice_dir, ignore_errors=True)
+    slice_dir.mkdir()
+
+    duration = get_length(path, ffprobe_path)
+    boundaries = segment_boundaries(duration, length)
+    max_workers = max(1, max_workers or os.cpu_count() or 1)
+
+    if codec == "flac":
+        codec_args = ["-c:a", "flac"]
+    elif codec == "mp3":
+        codec_args = ["-ar", str(sample_rate)]
+    else:
+        codec_args = []
+    normalize_args = ["-af", "dynaudnorm"] if normalize_audio else []
+    audio_args = _merge_audio_filters(normalize_args + audio_profile_args(profile, path, ffprobe_path))
+
+    # Upload segments are long (an hour), so each is extracted as about max_workers slices that are
+    # joined losslessly afterwards; a film under an hour still uses every core. Only FLAC can be
+    # joined without gaps (lossy encoders add priming samples to every slice).
+    slices = []  # (segment index, start, length)
+    for i, (start, segment_length) in enumerate(boundaries):
+        count = 1
+        if codec == "flac" and not normalize_audio:
+            count = max(1, min(max_workers, int(segment_length // MIN_EXTRACT_SLICE_SECONDS)))
+        for j in range(count):
+            slice_start = start + segment_length * j / count
+            slice_end = start + segment_length * (j + 1) / count
+            slices.append((i, slice_start, slice_end - slice_start))
+
+    def extract(item):
+        k, (i, start, slice_length) = item
+        output = slice_dir / f"{i:03d}_{k:04d}.{codec}"
+        command = [ffmpeg_path.strip(), "-nostdin", "-y", "-loglevel", "error",
+                   "-ss", f"{start:.6f}", "-t", f"{slice_length:.6f}", "-i", str(path),
+                   "-vn", *codec_args, *audio_args, str(output)]
+        print(" ".join(command))
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise ValueError(f"Could not extract segment {i}: {result.stderr.decode(errors='ignore')}")
+        return output
+
+    print(f"Extracting {len(boundaries)} segments as {len(slices)} slices with "
+          f"{min(max_workers, len(slices))} parallel ffmpeg processes...")
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(slices))) as executor:
+        parts = list(executor.map(extract, enumerate(slices)))
+
+    outputs = []
+    for i in range(len(boundaries)):
+        segment_parts = [part for part, (segment, _, _) in zip(parts, slices) if segment == i]
+        output = output_dir / f"{i:03d}.{codec}"
+        if len(segment_parts) == 1:
+            os.replace(segment_parts[0], output)
+        else:
+            join_audio(segment_parts, output, ffmpeg_path)
+        outputs.append(output)
+    shutil.rmtree(slice_dir, ignore_errors=True)
+
+    # The segments must tile the source exactly, or transcript times drift
+    total = sum(get_length(o, ffprobe_path, use_cache=False) for o in outputs)
+    tolerance = 0.1 + 0.05 * len(outputs)
+    if abs(total - duration) > tolerance:
+        raise ValueError(f"Extracted segments cover {total:.2f}s but {path.name} is {duration:.2f}s")
+
+    return outputs, str(output_dir / "%03d")
+
+def join_audio(parts, output, ffmpeg_path="ffmpeg"):
+    """ Join FLAC files back to back, losslessly (concat demuxer)
+
+    The joined stream is re-encoded to FLAC rather than stream copied: with -c copy the FLAC header
+    (STREAMINFO) keeps the first part's sample count and every part restarts the frame numbers,
+    which breaks seeking and duration in other decoders. Decoding FLAC is lossless and cheap next
+    to decoding the video's audio track.
+
+    Args:
+        parts: files in order (same codec and parameters)
+        output: joined file
+        ffmpeg_path: path to ffmpeg
+    """
+    output = Path(output)
+    list_file = output.with_suffix(".concat.txt")
+    with list_file.open("w", encoding="utf-8") as f:
+        for part in parts:
+            escaped = str(Path(part).resolve()).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    command = [ffmpeg_path.strip(), "-nostdin", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+               "-i", str(list_file), "-vn", "-c:a", "flac", str(output)]
+    print(" ".join(command))
+    try:
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    finally:
+        list_file.unlink()
+    if result.returncode != 0:
+        raise ValueError(f"Could not join {output.name}: {result.stderr.decode(errors='ignore')}")
+    return output
+
+def segment_boundaries(duration, length=3600):
+    """ Start/length pairs covering a file in fixed-length segments (same cuts as split_audio)
+
+    Args:
+        duration: total length in seconds
+        length: length of each segment in seconds
+
+    Returns:
+        list: [(start, segment_length), ...]
+    """
+    boundaries = []
+    start = 0.0
+    while start < duration:
+        boundaries.append((start, min(length, duration - start)))
+        start += length
+    return boundaries or [(0.0, duration)]
+
+def stream_audio_command(path, start=0, length=None, ffmpeg_path="ffmpeg", codec="flac", sample_rate=None,
+                         profile=None):
+    """ ffmpeg argument list that encodes one audio segment to stdout
+
+    Args:
+        path: path to video
+        start: segment start in seconds
+        length: segment length in seconds (None for the rest of the file)
+        ffmpeg_path: path to ffmpeg
+        codec: output codec/container ("flac" or "mp3")
+        sample_rate: optional output sample rate
+        profile: extraction profile from AUDIO_PROFILES (None keeps AUDIO_CHANNEL_ARG)
+
+    Returns:
+        list: command for subprocess.Popen
+    """
+    command = [ffmpeg_path.strip(), "-nostdin", "-loglevel", "error", "-ss", str(start)]
+    if length is not None:
+        command += ["-t", str(length)]
+    command += ["-i", str(path), "-vn", "-c:a", codec]
+    if sample_rate:
+        command += ["-ar", str(sample_rate)]
+    command += audio_profile_args(profile, path)
+    command += ["-f", codec, "pipe:1"]
+    return command
+
 def split_video(path, name=None, length=3600, start_time="00:00:00", end_time="99:59:59", ffmpeg_path=None, normalize_audio=False):
     """ Split video into 1 hour segments
 
@@ -302,22 +569,77 @@ def process_config(path=ROOT / "configs/default_config",
 
     return edict(my_config), config
 
-def create_mute_list(time_list):
+def config_tool_paths(config):
+    """ (ffmpeg_path, ffprobe_path) of a processed config; ffprobe is expected next to ffmpeg
     """
+    ffmpeg_path = str(config.get("ffmpeg_path") or "ffmpeg").strip()
+    return ffmpeg_path, str(Path(ffmpeg_path).parent / "ffprobe")
+
+MUTE_PADDING = 0.1  # seconds added before and after every muted word
+MUTE_MERGE_GAP = 0.25  # padded intervals closer than this are muted as one
+
+def coalesce_intervals(time_list, padding=MUTE_PADDING, gap=MUTE_MERGE_GAP):
+    """ Pad, sort and merge overlapping or near-adjacent intervals
 
     Args:
-        subs (tuple): a list of tuples (start,end)
+        time_list: iterable of (start, end) pairs, in any order
+        padding: seconds added to both sides of each interval
+        gap: intervals separated by at most this much (after padding) are merged
 
     Returns:
+        list: sorted, non-overlapping [(start, end), ...]
+    """
+    merged = []
+    for start, end in sorted((max(0.0, a - padding), b + padding) for a, b in time_list):
+        if merged and start - merged[-1][1] <= gap:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [tuple(pair) for pair in merged]
+
+def create_mute_list(time_list, padding=MUTE_PADDING, gap=MUTE_MERGE_GAP):
+    """ Build the ffmpeg audio filter that mutes the given intervals
+
+    Intervals are coalesced first and muted by a single volume filter whose enable expression is
+    a sum of between() terms, instead of one chained filter per word (which ffmpeg evaluates on
+    every audio frame).
+
+    Args:
+        time_list (list): a list of tuples (start, end)
+        padding: seconds added to both sides of each interval
+        gap: padded intervals separated by at most this much are merged
 
+    Returns:
+        list: filters for format_mute_list (a single element)
     """
+    intervals = coalesce_intervals(time_list, padding, gap)
+    if not intervals:
+        return ["anull"]
+    terms = "+".join(f"between(t,{start:.3f},{end:.3f})" for start, end in intervals)
+    mute_filter = f"volume=enable='{terms}':volume=0"
+
+    # Size of the old one-filter-per-word graph, for comparison
+    old_size = sum(len(f"volume=enable='between(t,{a - padding:.3f},{b + padding:.3f})':volume=0,") for a, b in time_list)
+    print(f"Mute list: {len(time_list)} words -> {len(intervals)} intervals; "
+          f"filter graph {len(time_list)} filters -> 1, {old_size} -> {len(mute_filter)} chars")
+    return [mute_filter]
+
+_BETWEEN = re.compile(r"between\(t,\s*(-?[\d.]+)\s*,\s*(-?[\d.]+)\s*\)")
 
-    muteTimeList = []
-    for timePair in time_list:
-        lineStart = timePair[0]
-        lineEnd = timePair[1]
-        muteTimeList.append("volume=enable='between(t," + format(lineStart-.1, '.3f') + "," + format(lineEnd+.1, '.3f') + ")':volume=0")
-    return muteTimeList
+def parse_mute_filters(text):
+    """ Muted intervals in a filter string or list of filters (padding included) """
+    if not isinstance(text, str):
+        text = ",".join(text)
+    return [(float(a), float(b)) for a, b in _BETWEEN.findall(text)]
+
+def parse_mute_list_file(path):
+    """ Read the muted intervals back from a mute list file (either filter format)
+
+    Returns:
+        list: [(start, end), ...] as written (padding included)
+    """
+    return parse_mute_filters(Path(path).read_text())
 
 
 def parse_swears(swears= ROOT / "swears.txt"):
@@ -347,6 +669,31 @@ def format_mute_list(mute_list, mute_list_file):
             f.write(formatted_mute_list)
     return formatted_mute_list
 
+def parse_filename(name):
+    """
+    Extracts (title_slug, season, episode) from filename.
+    Returns (cleaned_title, s, e) or (cleaned_title, None, None).
+    """
+    # Normalize: lower, replace dots/underscores with spaces
+    name = name.lower()
+    
+    # Check for SxxExx pattern
+    match = re.search(r'(.+?)[ ._-]+s(\d+)[ ._-]*e(\d+)', name)
+    if match:
+        title = match.group(1)
+        s = int(match.group(2))
+        e = int(match.group(3))
+        # Clean title
+        title = re.sub(r'[^\w]', '', title)
+        return (title, s, e)
+    
+    # Fallback: just clean stem
+    # Remove year if present (e.g. 1999)
+    # Be careful not to remove "2001" from "2001 A Space Odyssey" if it's the title?
+    # Usually matches are safe if we strip parens and years.
+    clean = re.sub(r'[^\w]', '', name)
+    return (clean, None, None)
+
 def check_for_mute_list(input_video_path):
     input_video_path = Path(input_video_path)
     mute_list_path = input_video_path.parent / (input_video_path.stem + "_clean_MUTE.txt")
@@ -358,11 +705,12 @@ def check_for_mute_list(input_video_path):
 
 def check_for_response_file(input_video_path, response_folder):
     input_video_path = Path(input_video_path)
-    files = list(Path(response_folder).rglob(input_video_path.stem + "*.response"))
-    if files:
-        use_response = input("Response file exists! Use it? (y/n)")
+    import response_catalog
+    response_path = response_catalog.get_catalog(response_folder).find(input_video_path.stem, ".response")
+    if response_path:
+        use_response = input(f"Response file exists ({response_path.name})! Use it? (y/n)")
         if use_response.lower() == "y":
-            return files[-1]
+            return response_path
     return None
 
 def create_clean_video_command(input_path, output_path, mute_list=None, testing=False, ffmpeg_path="ffmpeg ",
@@ -414,7 +762,20 @@ def create_clean_video(input_path,
                        testing=False,
                        ffmpeg_path="ffmpeg ",
                        del_mute_list_after=False,
-                       mute_list_file=None):
+                       mute_list_file=None,
+                       engine=None,
+                       ffprobe_path="ffprobe"):
+    """ Render the clean video (muted audio as the default track, original kept)
+
+    Args:
+        engine: "filter" re-encodes the whole audio track through the mute filter; "splice"
+            stream-copies it and re-encodes only around the mute intervals (see render.py),
+            falling back to "filter" when the codec can't be spliced; "pcm" mutes decoded
+            samples in process with NumPy fades (render.pcm_render).
+            Defaults to Global_Config.RENDER_ENGINE.
+    """
+    import Global_Config
+    engine = engine or Global_Config.RENDER_ENGINE
 
     if mute_list is None and mute_list_file is None:
         mute_list_file = check_for_mute_list(input_path)
@@ -423,6 +784,21 @@ def create_clean_video(input_path,
         else:
             warnings.warn("No mute list provided, using discovered mute list {}".format(mute_list_file))
 
+    if engine in ("splice", "pcm") and not testing:
+        import render
+        intervals = parse_mute_list_file(mute_list_file) if mute_list_file else parse_mute_filters(mute_list)
+        if engine == "pcm":
+            render.pcm_render(input_path, output_path, intervals, ffmpeg_path=ffmpeg_path, ffprobe_path=ffprobe_path)
+            if not os.path.isfile(output_path):
+                raise ValueError('Could not process %s' % (input_path))
+            return
+        try:
+            render.splice_render(input_path, output_path, intervals, ffmpeg_path=ffmpeg_path,
+                                 ffprobe_path=ffprobe_path)
+            return
+        except render.SpliceError as e:
+            print(f"Splice render not possible ({str(e).strip()[:200]}); re-encoding the full track")
+
     command, mute_list_file = create_clean_video_command(input_path, output_path, mute_list, testing, ffmpeg_path,
                                                          mute_list_file=mute_list_file)
     ffmpegResult = delegator.run(command,
@@ -435,7 +811,17 @@ def create_clean_video(input_path,
         os.remove(mute_list_file)
 
 
-def get_length(filename, ffprobe_path=r"ffprobe"):
+def get_length(filename, ffprobe_path=r"ffprobe", use_cache=True):
+    """ Duration of a media file in seconds (read from the ffprobe cache when possible)
+    """
+    if use_cache:
+        try:
+            duration = probe_cache.get_duration(get_ffprobe_json(filename, ffprobe_path))
+        except ValueError: # unparseable ffprobe output, retry with the plain duration query
+            duration = None
+        if duration is not None:
+            return duration
+
     command = [str(ffprobe_path), "-v", "error", "-show_entries",
                "format=duration", "-of",
                "default=noprint_wrappers=1:nokey=1", str(filename)]
@@ -453,17 +839,12 @@ def get_length(filename, ffprobe_path=r"ffprobe"):
         
     return float(valid_float)
 
-def get_ffprobe_json(filename, ffprobe_path=r"ffprobe"):
-    command = [str(ffprobe_path), "-v", "error", "-print_format", "json", "-show_format", "-show_streams", "-show_error",
-               str(filename)]
-    print(" ".join(command))
-    result = subprocess.run(command,
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.STDOUT)
-    # trim to end of json
-    data = result.stdout.decode()
-    data = data[:data.rfind("}")+1]
-    return json.loads(data)
+def get_ffprobe_json(filename, ffprobe_path=r"ffprobe", use_cache=True):
+    """ ffprobe format/stream metadata; cached on disk keyed by (path, size, mtime)
+    """
+    if use_cache:
+        return probe_cache.get_ffprobe_json(filename, ffprobe_path)
+    return probe_cache.run_ffprobe(filename, ffprobe_path)
 
 def get_audio_encoding_from_ffprobe_json(ffprobe_json):
     streams = ffprobe_json["streams"]
@@ -486,12 +867,57 @@ def audio_encoding_test():
     print(get_audio_encoding_from_ffprobe_json(ffprobe_json))
     print(get_audio_bitrate_from_ffprobe_json(ffprobe_json))
     
-def generate_gcs_uri(source_path, bucket_name=None):
-    """Generate the GCS URI for a file, matching the hash convention."""
+def file_digest(path, full=False, sample_size=1024 * 1024, samples=8):
+    """Content digest of a file: its size plus an md5 of the bytes.
+
+    By default only `samples` evenly spaced blocks are hashed, so even a feature film on a network
+    share is fingerprinted in a few MB of reads; small files (and full=True) are hashed entirely.
+
+    Args:
+        path: file to fingerprint
+        full: hash every byte instead of sampling
+        sample_size: bytes per sampled block
+        samples: number of sampled blocks
+
+    Returns:
+        str: e.g. "1a2b3c4s0f1e..." (hex size, "s"ampled or "f"ull, hex md5)
+    """
+    import hashlib
+    size = os.path.getsize(path)
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        if full or size <= sample_size * samples:
+            kind = "f"
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                md5.update(chunk)
+        else:
+            kind = "s"
+            step = (size - sample_size) / (samples - 1)
+            for k in range(samples):
+                f.seek(int(k * step))
+                md5.update(f.read(sample_size))
+    return f"{size:x}{kind}{md5.hexdigest()[:24]}"
+
+def generate_gcs_uri(source_path, bucket_name=None, digest=None):
+    """Generate the GCS URI for a file.
+
+    Objects are content-addressed: the name is the file's digest (see file_digest), so identical
+    audio maps to the same object however the file is named. Paths that don't exist locally and
+    have no digest fall back to the old name-hash convention.
+
+    Args:
+        source_path: local file (or name, for objects without a local file)
+        bucket_name: defaults to Global_Config.BUCKET_NAME
+        digest: precomputed content digest
+    """
     import hashlib
     import Global_Config
     
     bucket_name = bucket_name or Global_Config.BUCKET_NAME
+    if digest is None and Path(source_path).is_file():
+        digest = file_digest(source_path)
+    if digest is not None:
+        return f"gs://{bucket_name}/{digest}"
     
     destination = Path(source_path).name
     destination = re.sub(r"[#\[\]*?]", "_", destination)
@@ -502,6 +928,25 @@ def generate_gcs_uri(source_path, bucket_name=None):
     
     return f"gs://{bucket_name}/{destination}"
 
+def stream_segment_uris(video_path, length=3600, codec="flac", bucket_name=None, ffprobe_path="ffprobe", profile=None):
+    """GCS URIs for audio streamed from a video (see google_speech_api.stream_upload_audio).
+
+    There is no local file to hash, so each name is derived from the video's digest plus the
+    parameters that determine the segment's bytes.
+
+    Returns:
+        list: [(gcs_uri, start, segment_length), ...]
+    """
+    import hashlib
+    video_digest = file_digest(video_path)
+    duration = get_length(video_path, ffprobe_path)
+    segments = []
+    for start, segment_length in segment_boundaries(duration, length):
+        key = f"{video_digest}:{start}:{segment_length}:{codec}:{profile or AUDIO_CHANNEL_ARG}"
+        digest = "v" + hashlib.md5(key.encode()).hexdigest()[:24]
+        segments.append((generate_gcs_uri(video_path, bucket_name, digest=digest), start, segment_length))
+    return segments
+
 if __name__=="__main__":
     audio_encoding_test()
     #ga = google_api(**config)
@@ -0,0 +1,229 @@
+"""
+Persistent, incrementally refreshed index of the video library.
+
+Walking a multi-terabyte library with rglob on every run (and parsing every file name) can take
+longer than the work that needs the index. The index is kept in sqlite instead:
+
+- dirs:   every directory under the roots with its mtime and its subdirectories
+- videos: every video file with its size, mtime and parsed (title, season, episode)
+
+A directory's mtime changes when entries are added, removed or renamed in it, so a directory
+whose mtime matches the stored one is not listed again: its subdirectories come from the table
+and its videos are kept as they are. Only changed directories are listed (os.scandir) and their
+files parsed. Roots are walked in parallel.
+
+    index = VideoIndex()
+    index.refresh(["J:/Media/Videos"])
+    index.by_stem("Argo (2012)")  /  index.by_parsed(("theoffice", 3, 24))  /  index.lookup(name)
+"""
+
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import Global_Config
+import utils
+
+VIDEO_EXTENSIONS = {".mp4", ".mkv", ".avi", ".m4v", ".mov"}
+
+# Bump when utils.parse_filename changes so stored keys are re-parsed
+PARSER_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    root TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    subdirs TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS videos (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    stem TEXT NOT NULL,
+    title TEXT NOT NULL,
+    season INTEGER,
+    episode INTEGER,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS videos_dir ON videos (dir);
+CREATE INDEX IF NOT EXISTS videos_stem ON videos (stem);
+CREATE INDEX IF NOT EXISTS videos_parsed ON videos (title, season, episode);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+def _as_list(roots) -> List:
+    return [roots] if isinstance(roots, (str, Path)) else list(roots)
+
+
+def _walk(root: str, known: Dict[str, Tuple[int, List[str]]]):
+    """Walk one root, listing only directories whose mtime changed.
+
+    Args:
+        root: Root directory.
+        known: {dir: (mtime_ns, subdirs)} stored for this root.
+
+    Returns:
+        (dirs, videos, listed): dirs = {dir: (mtime_ns, subdirs)} for every directory seen;
+        videos = [(path, dir, stem, size, mtime_ns)] in listed directories; listed = set of
+        directories that were listed (their stored videos are replaced).
+    """
+    dirs, videos, listed = {}, [], set()
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            continue
+        stored = known.get(directory)
+        if stored is not None and stored[0] == mtime_ns:
+            subdirs = stored[1]
+        else:
+            subdirs = []
+            listed.add(directory)
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                subdirs.append(entry.path)
+                            elif os.path.splitext(entry.name)[1].lower() in VIDEO_EXTENSIONS and entry.is_file():
+                                stat = entry.stat()
+                                videos.append((entry.path, directory, os.path.splitext(entry.name)[0],
+                                               stat.st_size, stat.st_mtime_ns))
+                        except OSError:
+                            continue
+            except OSError as e:
+                print(f"Could not list {directory}: {e}")
+                continue
+        dirs[directory] = (mtime_ns, subdirs)
+        stack.extend(subdirs)
+    return dirs, videos, listed
+
+
+class VideoIndex:
+    """Video files under one or more roots, persisted in sqlite.
+
+    Args:
+        index_path: sqlite file (default Global_Config.VIDEO_INDEX_FILE).
+    """
+
+    def __init__(self, index_path=None):
+        self.index_path = Path(index_path or Global_Config.VIDEO_INDEX_FILE)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            row = conn.execute("SELECT value FROM meta WHERE key = 'parser_version'").fetchone()
+            if row is None or int(row[0]) != PARSER_VERSION:
+                self._reparse(conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.index_path), timeout=30)
+
+    @staticmethod
+    def _reparse(conn):
+        rows = conn.execute("SELECT path, stem FROM videos").fetchall()
+        conn.executemany("UPDATE videos SET title = ?, season = ?, episode = ? WHERE path = ?",
+                         [(*utils.parse_filename(stem), path) for path, stem in rows])
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('parser_version', ?)", (str(PARSER_VERSION),))
+
+    def refresh(self, roots: Iterable, max_workers=None) -> Dict[str, int]:
+        """Bring the index up to date with the roots (walked in parallel).
+
+        Returns:
+            dict: counts of directories seen/listed, videos (re)indexed and entries removed.
+        """
+        existing = []
+        for root in [str(Path(r).resolve()) for r in _as_list(roots)]:
+            if not os.path.isdir(root):
+                print(f"Warning: path {root} does not exist")
+            else:
+                existing.append(root)
+        roots = existing
+        if not roots:
+            return {"dirs": 0, "listed": 0, "videos": 0, "removed": 0}
+
+        started = time.monotonic()
+        with self._connect() as conn:
+            known = {root: {} for root in roots}
+            for path, root, mtime_ns, subdirs in conn.execute(
+                    f"SELECT path, root, mtime_ns, subdirs FROM dirs WHERE root IN ({','.join('?' * len(roots))})",
+                    roots):
+                known[root][path] = (mtime_ns, json.loads(subdirs))
+
+        with ThreadPoolExecutor(max_workers=max_workers or len(roots)) as executor:
+            walked = list(executor.map(lambda root: _walk(root, known[root]), roots))
+
+        stats = {"dirs": 0, "listed": 0, "videos": 0, "removed": 0}
+        with self._connect() as conn:
+            for root, (dirs, videos, listed) in zip(roots, walked):
+                gone = [d for d in known[root] if d not in dirs]
+                stale = list(listed) + gone
+                previous = set()
+                for k in range(0, len(stale), 500):
+                    chunk = stale[k:k + 500]
+                    marks = ",".join("?" * len(chunk))
+                    previous.update(r[0] for r in conn.execute(f"SELECT path FROM videos WHERE dir IN ({marks})", chunk))
+                    conn.execute(f"DELETE FROM videos WHERE dir IN ({marks})", chunk)
+                    conn.execute(f"DELETE FROM dirs WHERE path IN ({marks})", chunk)
+                conn.executemany("INSERT OR REPLACE INTO dirs (path, root, mtime_ns, subdirs) VALUES (?, ?, ?, ?)",
+                                 [(d, root, m, json.dumps(s)) for d, (m, s) in dirs.items()])
+                conn.executemany(
+                    "INSERT OR REPLACE INTO videos (path, dir, stem, title, season, episode, size, mtime_ns) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(path, d, stem, *utils.parse_filename(stem), size, mtime_ns)
+                     for path, d, stem, size, mtime_ns in videos])
+                stats["dirs"] += len(dirs)
+                stats["listed"] += len(listed)
+                stats["videos"] += len(videos)
+                stats["removed"] += len(previous - {v[0] for v in videos})
+        print(f"Video index: {stats['dirs']} folders ({stats['listed']} changed), {stats['videos']} videos "
+              f"(re)indexed, {stats['removed']} removed in {time.monotonic() - started:.1f}s")
+        return stats
+
+    def by_stem(self, stem) -> Optional[Path]:
+        """Video whose file name (without extension) is exactly `stem`."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT path FROM videos WHERE stem = ? ORDER BY path LIMIT 1", (stem,)).fetchone()
+        return Path(row[0]) if row else None
+
+    def by_parsed(self, parsed: Tuple) -> Optional[Path]:
+        """Video with the given utils.parse_filename key (title, season, episode)."""
+        title, season, episode = parsed
+        with self._connect() as conn:
+            row = conn.execute("SELECT path FROM videos WHERE title = ? AND season IS ? AND episode IS ? "
+                               "ORDER BY path LIMIT 1", (title, season, episode)).fetchone()
+        return Path(row[0]) if row else None
+
+    def lookup(self, name) -> Optional[Path]:
+        """Video for a name: exact stem first, then parsed (title, season, episode)."""
+        return self.by_stem(name) or self.by_parsed(utils.parse_filename(name))
+
+    def _rows(self, roots: Iterable = None) -> List[Tuple]:
+        """(path, stem, title, season, episode) of indexed videos, optionally under `roots`, by path."""
+        columns = "v.path, v.stem, v.title, v.season, v.episode"
+        with self._connect() as conn:
+            if roots is None:
+                return conn.execute(f"SELECT {columns} FROM videos v ORDER BY v.path").fetchall()
+            roots = [str(Path(r).resolve()) for r in _as_list(roots)]
+            return conn.execute(
+                f"SELECT {columns} FROM videos v JOIN dirs d ON v.dir = d.path "
+                f"WHERE d.root IN ({','.join('?' * len(roots))}) ORDER BY v.path", roots).fetchall()
+
+    def videos(self, roots: Iterable = None) -> List[Path]:
+        """All indexed videos (optionally only under the given roots), sorted by path."""
+        return [Path(row[0]) for row in self._rows(roots)]
+
+    def as_dict(self, roots: Iterable = None) -> Dict:
+        """{stem: path, (title, season, episode): path} like the old in-memory index (first path wins)."""
+        index = {}
+        for path, stem, title, season, episode in self._rows(roots):
+            index.setdefault(stem, Path(path))
+            index.setdefault((title, season, episode), Path(path))
+        return index
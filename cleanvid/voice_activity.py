@@ -0,0 +1,238 @@
+"""
+Voice-activity trimming before transcription.
+
+Score, action and credits make up a large share of a film, and every minute of it is billed and
+waited on. This stage runs on the extracted audio segments (Step 1), cuts the stretches without
+speech and writes a remap table next to each segment so word timestamps from the compacted audio
+can be mapped back to the source video:
+
+    temp/{stem}/000.flac         # compacted audio (uploaded and transcribed)
+    temp/{stem}/000.remap.json   # compacted time -> source time
+
+Detection is a simple two-feature classifier on 30 ms frames: energy above an adaptive noise floor
+and the share of that energy in the speech band (300-3400 Hz). It is tuned to keep too much rather
+than too little: only gaps of at least `min_gap` seconds are cut, and every kept span is padded.
+
+The remap also carries the segment's offset in the source video, so words from the second and
+later segments come back on the film's timeline.
+"""
+
+import bisect
+import json
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.03
+SPEECH_BAND = (300.0, 3400.0)
+MIN_GAP = 2.0          # only cut non-speech stretches at least this long (seconds)
+PADDING = 0.5          # kept around every speech span (seconds)
+ENERGY_MARGIN_DB = 10  # speech frames are this far above the noise floor
+BAND_RATIO = 0.45      # minimum share of frame energy in the speech band
+MIN_SAVING = 0.1       # don't rewrite a segment for less than this fraction of its length
+
+
+class Remap:
+    """Piecewise-linear map from compacted (transcribed) time to source time.
+
+    Attributes:
+        spans: [(compact_start, source_start, duration), ...] sorted by compact_start
+        offset: start of this audio segment in the source video (seconds)
+    """
+
+    def __init__(self, spans: List[Tuple[float, float, float]], offset: float = 0.0):
+        self.spans = [tuple(s) for s in spans]
+        self.offset = offset
+        self._compact_starts = [s[0] for s in self.spans]
+
+    @classmethod
+    def identity(cls, duration, offset=0.0) -> "Remap":
+        return cls([(0.0, 0.0, duration)], offset)
+
+    @classmethod
+    def from_kept(cls, kept: List[Tuple[float, float]], offset=0.0) -> "Remap":
+        """Remap for audio made by concatenating the source spans `kept` = [(start, end), ...]."""
+        spans = []
+        compact = 0.0
+        for start, end in kept:
+            spans.append((compact, start, end - start))
+            compact += end - start
+        return cls(spans, offset)
+
+    @property
+    def compact_duration(self) -> float:
+        return sum(d for _, _, d in self.spans)
+
+    def to_source(self, t: float) -> float:
+        """Source-video time for a time in the compacted audio."""
+        if not self.spans:
+            return self.offset + t
+        i = max(0, bisect.bisect_right(self._compact_starts, t) - 1)
+        compact_start, source_start, duration = self.spans[i]
+        return self.offset + source_start + min(max(t - compact_start, 0.0), duration)
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({"version": 1, "offset": self.offset, "spans": self.spans}, f)
+
+    @classmethod
+    def load(cls, path) -> Optional["Remap"]:
+        path = Path(path)
+        if not path.exists():
+            return None
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["spans"], data.get("offset", 0.0))
+
+
+def remap_path(audio_or_response_path) -> Path:
+    """Sidecar path: 000.flac -> 000.remap.json, movie_2024-01-01.response -> ...response.remap.json"""
+    path = Path(audio_or_response_path)
+    if path.suffix == ".response":
+        return path.with_name(path.name + ".remap.json")
+    return path.with_suffix(".remap.json")
+
+
+def _decode(path, ffmpeg_path="ffmpeg"):
+    command = [ffmpeg_path.strip(), "-nostdin", "-loglevel", "error", "-i", str(path),
+               "-vn", "-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"]
+    return subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+
+def frame_features(path, ffmpeg_path="ffmpeg", block_frames=2000) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-frame energy (dBFS) and speech-band energy share, streamed in blocks."""
+    frame = int(FRAME_SECONDS * SAMPLE_RATE)
+    freqs = np.fft.rfftfreq(frame, 1.0 / SAMPLE_RATE)
+    band = (freqs >= SPEECH_BAND[0]) & (freqs <= SPEECH_BAND[1])
+    window = np.hanning(frame).astype(np.float32)
+
+    energies, ratios = [], []
+    process = _decode(path, ffmpeg_path)
+    try:
+        while True:
+            data = process.stdout.read(frame * block_frames * 4)
+            count = len(data) // (4 * frame)
+            if count == 0:
+                break
+            frames = np.frombuffer(data, dtype="<f4", count=count * frame).reshape(count, frame)
+            energies.append(10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10))
+            power = np.abs(np.fft.rfft(frames * window, axis=1)) ** 2
+            ratios.append(power[:, band].sum(axis=1) / (power.sum(axis=1) + 1e-12))
+    finally:
+        process.stdout.close()
+        process.wait()
+    if not energies:
+        return np.zeros(0), np.zeros(0)
+    return np.concatenate(energies), np.concatenate(ratios)
+
+
+def detect_speech(energy_db: np.ndarray, band_ratio: np.ndarray, min_gap=MIN_GAP,
+                  padding=PADDING) -> List[Tuple[float, float]]:
+    """Speech spans [(start, end)] in seconds from per-frame features."""
+    if len(energy_db) == 0:
+        return []
+    floor = np.percentile(energy_db, 10)
+    speech = (energy_db > floor + ENERGY_MARGIN_DB) & (band_ratio > BAND_RATIO)
+    idx = np.flatnonzero(speech)
+    if len(idx) == 0:
+        return []
+
+    # Runs of speech frames, joined across gaps shorter than min_gap (after padding)
+    breaks = np.flatnonzero(np.diff(idx) * FRAME_SECONDS > min_gap + 2 * padding)
+    starts = np.concatenate([[idx[0]], idx[breaks + 1]]) * FRAME_SECONDS - padding
+    ends = (np.concatenate([idx[breaks], [idx[-1]]]) + 1) * FRAME_SECONDS + padding
+    duration = len(energy_db) * FRAME_SECONDS
+    return [(float(max(0.0, s)), float(min(duration, e))) for s, e in zip(starts, ends)]
+
+
+def write_spans(path, output, kept, ffmpeg_path="ffmpeg", codec="flac", block_seconds=10.0):
+    """Write the concatenation of the source spans `kept` to `output` (sample-exact)."""
+    encode = [ffmpeg_path.strip(), "-nostdin", "-y", "-loglevel", "error",
+              "-f", "f32le", "-ar", str(SAMPLE_RATE), "-ac", "1", "-i", "pipe:0", "-c:a", codec, str(output)]
+    bounds = [(int(round(s * SAMPLE_RATE)), int(round(e * SAMPLE_RATE))) for s, e in kept]
+    block = int(block_seconds * SAMPLE_RATE)
+
+    decoder = _decode(path, ffmpeg_path)
+    encoder = subprocess.Popen(encode, stdin=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    position = 0
+    span = 0
+    try:
+        while span < len(bounds):
+            data = decoder.stdout.read(block * 4)
+            if not data:
+                break
+            count = len(data) // 4
+            block_end = position + count
+            # Spans overlapping this block
+            while span < len(bounds) and bounds[span][0] < block_end:
+                start, end = bounds[span]
+                lo, hi = max(start, position) - position, min(end, block_end) - position
+                if hi > lo:
+                    encoder.stdin.write(data[lo * 4:hi * 4])
+                if end > block_end:
+                    break
+                span += 1
+            position = block_end
+    finally:
+        decoder.stdout.close()
+        decoder.wait()
+        encoder.stdin.close()
+        if encoder.wait() != 0:
+            raise ValueError(f"Could not write trimmed audio {output}")
+
+
+def trim_non_speech(path, offset=0.0, ffmpeg_path="ffmpeg", min_gap=MIN_GAP, padding=PADDING) -> Remap:
+    """Cut non-speech from an extracted audio segment in place and write its remap sidecar.
+
+    The compacted audio is written at the analysis format (16 kHz mono), which is what the speech
+    models use anyway.
+
+    Args:
+        path: Extracted segment (e.g. temp/{stem}/000.flac); replaced by the compacted audio.
+        offset: Start of this segment in the source video.
+
+    Returns:
+        Remap: compacted time -> source time (also saved to remap_path(path)).
+    """
+    path = Path(path)
+    energy_db, band_ratio = frame_features(path, ffmpeg_path)
+    duration = len(energy_db) * FRAME_SECONDS
+    kept = detect_speech(energy_db, band_ratio, min_gap, padding)
+    kept_seconds = sum(e - s for s, e in kept)
+
+    if not kept or kept_seconds > duration * (1 - MIN_SAVING):
+        # Nothing (or too little) to cut; still record the segment offset
+        remap = Remap.identity(duration, offset)
+        print(f"  {path.name}: {kept_seconds / 60:.1f} of {duration / 60:.1f} min is speech; not trimmed")
+    else:
+        with tempfile.NamedTemporaryFile(dir=path.parent, suffix=path.suffix, delete=False) as tmp:
+            tmp_path = Path(tmp.name)
+        try:
+            write_spans(path, tmp_path, kept, ffmpeg_path, codec=path.suffix.lstrip(".") or "flac")
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        remap = Remap.from_kept(kept, offset)
+        print(f"  {path.name}: kept {kept_seconds / 60:.1f} of {duration / 60:.1f} min "
+              f"({len(kept)} speech spans, {100 * (1 - kept_seconds / max(duration, 1e-9)):.0f}% cut)")
+    remap.save(remap_path(path))
+    return remap
+
+
+def trim_segments(segments, ffmpeg_path="ffmpeg", ffprobe_path="ffprobe") -> List[Remap]:
+    """Trim each extracted segment in order; offsets accumulate from the untrimmed lengths."""
+    import utils  # utils imports google_api, which imports this module
+
+    remaps = []
+    offset = 0.0
+    for segment in segments:
+        length = utils.get_length(segment, ffprobe_path, use_cache=False)
+        remaps.append(trim_non_speech(segment, offset, ffmpeg_path))
+        offset += length
+    return remaps
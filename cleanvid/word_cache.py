@@ -0,0 +1,159 @@
+"""
+Columnar word cache for API responses.
+
+Loading words from a .response file means json-loading a double-encoded JSON string, parsing the
+whole AnnotateVideoResponse protobuf and walking every word. The words are instead extracted once
+and stored next to the response as a structured NumPy array (start/end as float64, confidence as
+float32, interned token ids) plus a small JSON sidecar with the vocabulary and the source file's
+size and mtime. The words are stored after the response's remap (voice_activity) is applied, so
+the remap file's size and mtime (or None when there is none) are part of the key too. The array
+is memory-mapped on load; the cache is rebuilt when the response or its remap changes.
+
+    {name}.response
+    {name}.response.remap.json  # optional (trimmed audio)
+    {name}.response.words.npy   # records: start, end, confidence, token
+    {name}.response.words.json  # {"version", "source_size", "source_mtime_ns", "remap", "vocab"}
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+import voice_activity
+
+VERSION = 2
+
+WORD_DTYPE = np.dtype([
+    ("start", "<f8"),
+    ("end", "<f8"),
+    ("confidence", "<f4"),
+    ("token", "<u4"),
+])
+
+
+def cache_paths(response_path):
+    """(array_path, sidecar_path) for a response file."""
+    response_path = Path(response_path)
+    return (response_path.with_name(response_path.name + ".words.npy"),
+            response_path.with_name(response_path.name + ".words.json"))
+
+
+def _source_key(response_path):
+    stat = os.stat(response_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _remap_key(response_path) -> Optional[List[int]]:
+    """[size, mtime_ns] of the response's remap file, or None if it has none."""
+    try:
+        stat = os.stat(voice_activity.remap_path(response_path))
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class WordTable:
+    """Words of one response as parallel columns.
+
+    Attributes:
+        records: structured array with WORD_DTYPE fields (possibly memory-mapped).
+        vocab: token id -> word text.
+    """
+
+    def __init__(self, records: np.ndarray, vocab: List[str]):
+        self.records = records
+        self.vocab = vocab
+
+    @classmethod
+    def from_words(cls, words: List[Dict]) -> "WordTable":
+        """Build a table from word dicts ('word', 'start', 'end', optional 'confidence')."""
+        ids = {}
+        records = np.empty(len(words), dtype=WORD_DTYPE)
+        for i, w in enumerate(words):
+            records[i] = (w["start"], w["end"], w.get("confidence", 0.0) or 0.0, ids.setdefault(w["word"], len(ids)))
+        return cls(records, list(ids))
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def starts(self) -> np.ndarray:
+        return self.records["start"]
+
+    @property
+    def ends(self) -> np.ndarray:
+        return self.records["end"]
+
+    @property
+    def confidences(self) -> np.ndarray:
+        return self.records["confidence"]
+
+    @property
+    def tokens(self) -> np.ndarray:
+        return self.records["token"]
+
+    def to_words(self) -> List[Dict]:
+        """Word dicts in the format returned by google_speech_api.get_words_from_response."""
+        vocab = self.vocab
+        # float32 confidences are rounded back to the API's precision (0.702, not 0.70200002)
+        confidences = self.confidences.astype(np.float64).round(6).tolist()
+        return [{"word": vocab[t], "start": s, "end": e, "confidence": c}
+                for t, s, e, c in zip(self.tokens.tolist(), self.starts.tolist(), self.ends.tolist(), confidences)]
+
+
+def save(table: WordTable, response_path):
+    """Write the cache for a response file (atomically, so readers never see a partial file)."""
+    array_path, sidecar_path = cache_paths(response_path)
+    size, mtime_ns = _source_key(response_path)
+
+    tmp_array = array_path.with_name(array_path.name + ".tmp")
+    with open(tmp_array, "wb") as f:
+        np.save(f, np.ascontiguousarray(table.records, dtype=WORD_DTYPE))
+    os.replace(tmp_array, array_path)
+
+    tmp_sidecar = sidecar_path.with_name(sidecar_path.name + ".tmp")
+    with open(tmp_sidecar, "w", encoding="utf-8") as f:
+        json.dump({"version": VERSION, "source_size": size, "source_mtime_ns": mtime_ns,
+                   "remap": _remap_key(response_path), "count": len(table), "vocab": table.vocab}, f)
+    # Sidecar last: it is what marks the cache as valid
+    os.replace(tmp_sidecar, sidecar_path)
+
+
+def load(response_path, mmap=True) -> Optional[WordTable]:
+    """Cached word table for a response, or None if missing or stale."""
+    array_path, sidecar_path = cache_paths(response_path)
+    try:
+        with open(sidecar_path, "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+        if sidecar.get("version") != VERSION:
+            return None
+        if (sidecar["source_size"], sidecar["source_mtime_ns"]) != _source_key(response_path):
+            return None
+        if sidecar["remap"] != _remap_key(response_path):
+            return None
+        records = np.load(array_path, mmap_mode="r" if mmap else None)
+    except (OSError, ValueError, KeyError):
+        return None
+    if records.dtype != WORD_DTYPE or len(records) != sidecar.get("count", len(records)):
+        return None
+    return WordTable(records, sidecar["vocab"])
+
+
+def load_table(response_path, parse: Callable[[Path], List[Dict]], mmap=True) -> WordTable:
+    """Word table for a response, building the cache with parse(response_path) on a miss."""
+    table = load(response_path, mmap=mmap)
+    if table is None:
+        table = WordTable.from_words(parse(Path(response_path)))
+        try:
+            save(table, response_path)
+        except OSError as e:
+            print(f"Could not write word cache for {response_path}: {e}")
+    return table
+
+
+def load_words(response_path, parse: Callable[[Path], List[Dict]]) -> List[Dict]:
+    """Word dicts for a response, read from the cache (built with parse on a miss)."""
+    return load_table(response_path, parse).to_words()